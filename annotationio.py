@@ -0,0 +1,166 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import numpy as np
+from PyQt5.QtGui import QColor
+
+from objects.rorationrectangle import RotationRectangle
+from objects.rotationrectanglearray import RotationRectangleArray
+from objects.ellipse import Ellipse
+from objects.polygon import Polygon
+from notifyobjectcollection import NotifyObjectCollection
+
+# 2 adds ellipses and polygons; version 1 files hold rectangles only
+FORMAT_VERSION = 2
+
+ELLIPSE_COLUMNS = ('ellipse_cx', 'ellipse_cy', 'ellipse_width', 'ellipse_height',
+                   'ellipse_angle', 'ellipse_color')
+# One vertex count and colour per polygon; the vertices of all polygons are
+# stacked in one (M, 2) table
+POLYGON_COLUMNS = ('polygon_sizes', 'polygon_color', 'polygon_vertices')
+
+def collect_columns(objects: Iterable) -> Dict[str, np.ndarray]:
+    # One column per RotationRectangleArray.COLUMNS over every rectangle in
+    # `objects`; array stores contribute their arrays as they are. Ellipses
+    # and polygons go in ELLIPSE_COLUMNS and POLYGON_COLUMNS. Objects of any
+    # other type raise ValueError rather than being left out of the file.
+    parts = []
+    rows = []
+    ellipses = []
+    polygons = []
+    for obj in objects:
+        if isinstance(obj, RotationRectangleArray):
+            if rows:
+                parts.append(_rows_to_columns(rows))
+                rows = []
+            parts.append(obj.columns())
+        elif isinstance(obj, RotationRectangle):
+            rows.append((obj.center.x(), obj.center.y(), obj.width, obj.height, obj.angle,
+                         QColor(obj.color).rgba(), False))
+        elif isinstance(obj, Ellipse):
+            ellipses.append(obj)
+        elif isinstance(obj, Polygon):
+            polygons.append(obj)
+        else:
+            raise ValueError("cannot save shapes of type %s" % type(obj).__name__)
+    if rows or not parts:
+        parts.append(_rows_to_columns(rows))
+    columns = {name: np.concatenate([part[name] for part in parts])
+               for name in RotationRectangleArray.COLUMNS}
+    columns.update(_ellipse_columns(ellipses))
+    columns.update(_polygon_columns(polygons))
+    return columns
+
+def _ellipse_columns(ellipses: List[Ellipse]) -> Dict[str, np.ndarray]:
+    values = [(e.center.x(), e.center.y(), e.width, e.height, e.angle) for e in ellipses]
+    geometry = np.array(values, dtype=np.float64).reshape(-1, 5)
+    columns = dict(zip(ELLIPSE_COLUMNS, geometry.T))
+    columns['ellipse_color'] = np.array([QColor(e.color).rgba() for e in ellipses], dtype=np.uint32)
+    return columns
+
+def _polygon_columns(polygons: List[Polygon]) -> Dict[str, np.ndarray]:
+    return {'polygon_sizes': np.array([len(p.points) for p in polygons], dtype=np.int64),
+            'polygon_color': np.array([QColor(p.color).rgba() for p in polygons], dtype=np.uint32),
+            'polygon_vertices': np.concatenate([p.points for p in polygons]) if polygons
+            else np.zeros((0, 2), dtype=np.float64)}
+
+def shapes_from_columns(columns) -> List:
+    # Ellipse and Polygon objects from ELLIPSE_COLUMNS and POLYGON_COLUMNS;
+    # a version 1 file has neither and gives an empty list
+    shapes = []
+    if 'ellipse_cx' in columns:
+        geometry = zip(*(np.asarray(columns[name]).tolist() for name in ELLIPSE_COLUMNS))
+        for cx, cy, width, height, angle, color in geometry:
+            ellipse = Ellipse(cx, cy, width, height, angle)
+            ellipse.color = QColor.fromRgba(color)
+            shapes.append(ellipse)
+    if 'polygon_sizes' in columns:
+        vertices = np.asarray(columns['polygon_vertices'], dtype=np.float64).reshape(-1, 2)
+        sizes = np.asarray(columns['polygon_sizes'])
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        for start, size, color in zip(starts.tolist(), sizes.tolist(),
+                                      np.asarray(columns['polygon_color']).tolist()):
+            polygon = Polygon(vertices[start:start + size])
+            polygon.color = QColor.fromRgba(color)
+            shapes.append(polygon)
+    return shapes
+
+def _add_to(collection: Optional[NotifyObjectCollection], store: RotationRectangleArray, shapes: List):
+    if collection is not None:
+        with collection.batch_update():
+            collection.add(store)
+            collection.extend(shapes)
+
+def _rows_to_columns(rows) -> Dict[str, np.ndarray]:
+    columns = list(zip(*rows)) or [()] * len(RotationRectangleArray.COLUMNS)
+    dtypes = (np.float64,) * 5 + (np.uint32, bool)
+    return {name: np.array(values, dtype=dtype) for name, values, dtype in
+            zip(RotationRectangleArray.COLUMNS, columns, dtypes)}
+
+def save_annotations(path: str, objects: Iterable, compressed: bool = False):
+    # Columnar .npz: one array per column plus a format version
+    columns = collect_columns(objects)
+    save = np.savez_compressed if compressed else np.savez
+    save(path, version=np.array(FORMAT_VERSION), **columns)
+
+def read_annotations(path: str) -> Tuple[RotationRectangleArray, List]:
+    # Every rectangle in one RotationRectangleArray, without a Python object
+    # per row, and the ellipses and polygons as objects
+    with np.load(path) as data:
+        version = int(data['version']) if 'version' in data else FORMAT_VERSION
+        if version > FORMAT_VERSION:
+            raise ValueError("annotation file version %d is newer than supported (%d)"
+                             % (version, FORMAT_VERSION))
+        return RotationRectangleArray.from_columns(data), shapes_from_columns(data)
+
+def load_annotations(path: str,
+                     collection: Optional[NotifyObjectCollection] = None) -> RotationRectangleArray:
+    # Adds the rectangle store and the other shapes to `collection` in a
+    # single change; returns the rectangles, see read_annotations for the rest
+    store, shapes = read_annotations(path)
+    _add_to(collection, store, shapes)
+    return store
+
+def export_annotations_json(path: str, objects: Iterable):
+    columns = collect_columns(objects)
+    rectangles = [{'center': [cx, cy], 'size': [width, height], 'angle': angle,
+                   'color': '#%08x' % color, 'selected': selected}
+                  for cx, cy, width, height, angle, color, selected in
+                  zip(*(columns[name].tolist() for name in RotationRectangleArray.COLUMNS))]
+    ellipses = [{'center': [cx, cy], 'size': [width, height], 'angle': angle, 'color': '#%08x' % color}
+                for cx, cy, width, height, angle, color in
+                zip(*(columns[name].tolist() for name in ELLIPSE_COLUMNS))]
+    vertices = columns['polygon_vertices'].tolist()
+    polygons = []
+    for size, color in zip(columns['polygon_sizes'].tolist(), columns['polygon_color'].tolist()):
+        polygons.append({'points': vertices[:size], 'color': '#%08x' % color})
+        vertices = vertices[size:]
+    with open(path, 'w') as f:
+        json.dump({'version': FORMAT_VERSION, 'rectangles': rectangles,
+                   'ellipses': ellipses, 'polygons': polygons}, f)
+
+def read_annotations_json(path: str) -> Tuple[RotationRectangleArray, List]:
+    with open(path) as f:
+        document = json.load(f)
+    color = lambda entry: int(entry.get('color', '#ff0000ff')[1:], 16)
+    rows = [(r['center'][0], r['center'][1], r['size'][0], r['size'][1], r['angle'],
+             color(r), r.get('selected', False))
+            for r in document['rectangles']]
+    ellipses = document.get('ellipses', [])
+    polygons = document.get('polygons', [])
+    columns = {
+        'ellipse_cx': [e['center'][0] for e in ellipses],
+        'ellipse_cy': [e['center'][1] for e in ellipses],
+        'ellipse_width': [e['size'][0] for e in ellipses],
+        'ellipse_height': [e['size'][1] for e in ellipses],
+        'ellipse_angle': [e['angle'] for e in ellipses],
+        'ellipse_color': np.array([color(e) for e in ellipses], dtype=np.uint32),
+        'polygon_sizes': [len(p['points']) for p in polygons],
+        'polygon_color': np.array([color(p) for p in polygons], dtype=np.uint32),
+        'polygon_vertices': [point for p in polygons for point in p['points']]}
+    return RotationRectangleArray.from_columns(_rows_to_columns(rows)), shapes_from_columns(columns)
+
+def import_annotations_json(path: str,
+                            collection: Optional[NotifyObjectCollection] = None) -> RotationRectangleArray:
+    store, shapes = read_annotations_json(path)
+    _add_to(collection, store, shapes)
+    return store
@@ -0,0 +1,216 @@
+# Headless batch ROI extraction: applies a saved shape layout to every
+# image in a directory or glob and writes the crops plus a JSON-lines index.
+#
+#   python batchextract.py layout.npz "scans/*.png" -o crops --workers 8
+#
+# Images are processed in sorted path order and the index is written in that
+# order whatever the worker count. Re-running with the same output directory
+# skips images already in the index.
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import cv2
+
+from objects.regionextract import extract_polygon_region
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+INDEX_NAME = 'index.jsonl'
+STAGES = ('decode', 'extract', 'encode')
+
+def load_layout(path: str) -> List[np.ndarray]:
+    # int32 polygons, the same ones getShapeRegion would use: the rectangles'
+    # corners, then the outlines of ellipses and polygons
+    from annotationio import read_annotations, read_annotations_json
+    if path.lower().endswith('.json'):
+        store, shapes = read_annotations_json(path)
+    else:
+        store, shapes = read_annotations(path)
+    return list(store.get_corners().astype(np.int32)) + [shape.get_polygon() for shape in shapes]
+
+def find_images(inputs: List[str]) -> List[str]:
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths.update(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.update(glob.glob(pattern, recursive=True))
+    return sorted(paths)
+
+def read_index(path: str) -> dict:
+    # Completed entries by image path; a line cut off by a crash is ignored
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('status') == 'ok':
+                    done[entry['image']] = entry
+    return done
+
+def trim_partial_line(path: str):
+    # Drop a final line left without its newline so appends start clean
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+def input_root(paths: List[str]) -> str:
+    # Deepest directory holding every input image
+    if not paths:
+        return ''
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+
+def output_name(image_path: str, index: int, extension: str, root: str = '') -> str:
+    # Crops go in a directory named after the image's path below `root`, file
+    # extension included, so a/img.png, b/img.png and img.jpg never share one
+    relative = os.path.relpath(os.path.abspath(image_path), root) if root \
+        else os.path.basename(image_path)
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(relative, '%s_%04d%s' % (stem, index, extension))
+
+_polygons: Optional[List[np.ndarray]] = None
+
+def _init_worker(polygons: List[np.ndarray]):
+    global _polygons
+    _polygons = polygons
+    # One process per core already; OpenCV threads would oversubscribe
+    cv2.setNumThreads(1)
+
+def process_image(image_path: str, output_dir: Optional[str], extension: str,
+                  root: str = '') -> dict:
+    timings = dict.fromkeys(STAGES, 0.0)
+    start = time.perf_counter()
+    image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    timings['decode'] = time.perf_counter() - start
+    if image is None:
+        return {'image': image_path, 'status': 'unreadable', 'times': timings}
+
+    start = time.perf_counter()
+    regions = [extract_polygon_region(image, pts) for pts in _polygons]
+    timings['extract'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crops = []
+    for index, region in enumerate(regions):
+        entry = {'roi': index, 'shape': list(region.shape)}
+        if output_dir is not None and region.size:
+            name = output_name(image_path, index, extension, root)
+            target = os.path.join(output_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if extension == '.npy':
+                np.save(target, region)
+            else:
+                ok, encoded = cv2.imencode(extension, region)
+                if not ok:
+                    return {'image': image_path, 'status': 'encode failed', 'times': timings}
+                encoded.tofile(target)
+            entry['file'] = name
+        crops.append(entry)
+    timings['encode'] = time.perf_counter() - start
+    return {'image': image_path, 'status': 'ok', 'size': list(image.shape),
+            'bytes': int(image.nbytes), 'crops': crops, 'times': timings}
+
+class StageThroughput:
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.images = 0
+        self.crops = 0
+        self.pixel_bytes = 0
+        self.start = time.perf_counter()
+
+    def record(self, result: dict):
+        for stage in STAGES:
+            self.seconds[stage] += result['times'][stage]
+        if result['status'] == 'ok':
+            self.images += 1
+            self.crops += len(result['crops'])
+            self.pixel_bytes += result['bytes']
+
+    def report(self, workers: int) -> str:
+        wall = time.perf_counter() - self.start
+        lines = ['%d images, %d crops in %.1f s (%.1f images/s)'
+                 % (self.images, self.crops, wall, self.images / wall if wall else 0.0)]
+        for stage in STAGES:
+            # Worker seconds over all processes, so per-worker rates
+            busy = self.seconds[stage]
+            rate = self.images / busy if busy else float('inf')
+            lines.append('  %-8s %8.2f worker-s  %9.1f images/s per worker  %9.1f MB/s'
+                         % (stage, busy, rate, self.pixel_bytes / busy / 1e6 if busy else 0.0))
+        lines.append('  workers  %d' % workers)
+        return '\n'.join(lines)
+
+def run(layout: str, inputs: List[str], output_dir: str, workers: int = os.cpu_count() or 1,
+        prefetch: int = 0, extension: str = '.png', write_crops: bool = True,
+        progress: bool = False) -> StageThroughput:
+    polygons = load_layout(layout)
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    trim_partial_line(index_path)
+    done = read_index(index_path)
+    images = find_images(inputs)
+    # From every matched image, done or not, so a resumed run names crops the
+    # same way as long as it is given the same inputs
+    root = input_root(images)
+    todo = [path for path in images if path not in done]
+    prefetch = prefetch or 2 * workers
+    throughput = StageThroughput()
+    crop_dir = output_dir if write_crops else None
+
+    with open(index_path, 'a') as index, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(polygons,)) as pool:
+        # At most `prefetch` images in flight; results are taken in submission
+        # order, so the index order does not depend on which worker is faster
+        pending = deque()
+        paths = iter(todo)
+        for path in paths:
+            pending.append(pool.submit(process_image, path, crop_dir, extension, root))
+            if len(pending) >= prefetch:
+                break
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append(pool.submit(process_image, next_path, crop_dir, extension, root))
+            throughput.record(result)
+            index.write(json.dumps(result) + '\n')
+            index.flush()
+            if progress:
+                print('%s: %s' % (result['image'], result['status']), file=sys.stderr)
+    return throughput
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply a saved shape layout to many images.')
+    parser.add_argument('layout', help='shape layout (.npz from save_annotations, or .json)')
+    parser.add_argument('inputs', nargs='+', help='image directories or glob patterns')
+    parser.add_argument('-o', '--output', required=True, help='output directory for crops and index')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='images in flight (default: twice the worker count)')
+    parser.add_argument('--format', default='png', choices=('png', 'jpg', 'tif', 'bmp', 'npy'),
+                        help='crop file format')
+    parser.add_argument('--index-only', action='store_true',
+                        help='only write index.jsonl, no crop files')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    throughput = run(args.layout, args.inputs, args.output, args.workers, args.prefetch,
+                     '.' + args.format, not args.index_only, args.verbose)
+    print(throughput.report(args.workers))
+
+if __name__ == '__main__':
+    main()
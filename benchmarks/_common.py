@@ -0,0 +1,24 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def timeit(fn, repeat=5, number=1):
+    # Best-of-N wall time of `number` calls, in milliseconds per call
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000.0
+
+def print_table(header, rows):
+    widths = [max(len(str(c)) for c in col) for col in zip(header, *rows)]
+    line = '  '.join('{:>%d}' % w for w in widths)
+    print(line.format(*header))
+    for row in rows:
+        print(line.format(*row))
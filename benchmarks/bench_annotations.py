@@ -0,0 +1,90 @@
+# Saving and loading 100k rotated rectangles: columnar .npz (plain and
+# compressed) and JSON, against rebuilding RotationRectangle objects one by
+# one. Every format is round-tripped and compared column by column first.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_annotations.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sys
+import tempfile
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from annotationio import (collect_columns, export_annotations_json, import_annotations_json,
+                          load_annotations, save_annotations)
+from notifyobjectcollection import NotifyObjectCollection
+from objects.rorationrectangle import RotationRectangle
+from objects.rotationrectanglearray import RotationRectangleArray
+
+def make_store(count, rng):
+    store = RotationRectangleArray(rng.uniform(0, 8000, count), rng.uniform(0, 6000, count),
+                                   rng.uniform(10, 80, count), rng.uniform(10, 80, count),
+                                   rng.uniform(0, 360, count),
+                                   rng.integers(0, 2 ** 32, count, dtype=np.uint32))
+    store.select(rng.random(count) < 0.1)
+    return store
+
+def same_columns(a, b):
+    return all(np.array_equal(a[name], b[name]) for name in RotationRectangleArray.COLUMNS)
+
+def check_round_trips(directory, store):
+    failures = []
+    npz = os.path.join(directory, 'check.npz')
+    for compressed in (False, True):
+        save_annotations(npz, [store], compressed)
+        if not same_columns(load_annotations(npz).columns(), store.columns()):
+            failures.append('npz compressed=%s' % compressed)
+    json_path = os.path.join(directory, 'check.json')
+    export_annotations_json(json_path, [store])
+    if not same_columns(import_annotations_json(json_path).columns(), store.columns()):
+        failures.append('json')
+    # Individual objects and array stores mixed in one collection keep their order
+    objects = [RotationRectangle(10.5, 20.25, 30, 40, 15), store,
+               RotationRectangle(1, 2, 50, 60, 350)]
+    save_annotations(npz, objects)
+    loaded = load_annotations(npz)
+    if not same_columns(loaded.columns(), collect_columns(objects)) or len(loaded) != len(store) + 2:
+        failures.append('mixed objects')
+    collection = NotifyObjectCollection()
+    changes = []
+    collection.changed_collection = lambda sender, change: changes.append(change)
+    load_annotations(npz, collection)
+    if len(changes) != 1 or len(collection) != 1:
+        failures.append('collection notification')
+    return failures
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    count = 100000
+    store = make_store(count, np.random.default_rng(0))
+    with tempfile.TemporaryDirectory() as directory:
+        failures = check_round_trips(directory, make_store(1000, np.random.default_rng(1)))
+        print('round trip:', 'FAIL ' + ', '.join(failures) if failures else 'ok')
+
+        rows = []
+        columns = store.columns()
+        row_values = list(zip(*(columns[name].tolist() for name in ('cx', 'cy', 'width',
+                                                                     'height', 'angle'))))
+        objects_ms = timeit(lambda: [RotationRectangle(*row) for row in row_values], repeat=1)
+        rows.append(('RotationRectangle per row', '-', '-', '%.1f' % objects_ms))
+        for name, compressed in (('npz', False), ('npz compressed', True)):
+            path = os.path.join(directory, 'shapes.npz')
+            save_ms = timeit(lambda: save_annotations(path, [store], compressed), repeat=3)
+            load_ms = timeit(lambda: load_annotations(path), repeat=3)
+            rows.append((name, '%.2f' % (os.path.getsize(path) / 2 ** 20), '%.1f' % save_ms,
+                         '%.1f' % load_ms))
+        path = os.path.join(directory, 'shapes.json')
+        save_ms = timeit(lambda: export_annotations_json(path, [store]), repeat=1)
+        load_ms = timeit(lambda: import_annotations_json(path), repeat=1)
+        rows.append(('json', '%.2f' % (os.path.getsize(path) / 2 ** 20), '%.1f' % save_ms,
+                     '%.1f' % load_ms))
+    print('%d rectangles' % count)
+    print_table(('format', 'MiB', 'save ms', 'load ms'), rows)
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
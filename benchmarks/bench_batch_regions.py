@@ -0,0 +1,44 @@
+# Many ROIs over one frame: per-object getShapeRegion loops vs
+# NotifyObjectCollection.extract_regions (sequential and threaded).
+# Run: python benchmarks/bench_batch_regions.py
+import _common
+from _common import timeit, print_table
+
+import os
+import numpy as np
+
+from notifyobjectcollection import NotifyObjectCollection
+from objects.rorationrectangle import RotationRectangle
+from bench_shape_region import full_mask_region
+
+def make_collection(rng, count, shape):
+    collection = NotifyObjectCollection()
+    for _ in range(count):
+        collection.add(RotationRectangle(rng.uniform(0, shape[1]), rng.uniform(0, shape[0]),
+                                         rng.uniform(50, 300), rng.uniform(50, 300),
+                                         rng.uniform(0, 360)))
+    return collection
+
+def main():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8)
+    workers = os.cpu_count() or 1
+    rows = []
+    for count in (1, 10, 100, 1000):
+        collection = make_collection(rng, count, frame.shape)
+        loop = [item.getShapeRegion(frame) for item in collection]
+        batch = collection.extract_regions(frame, workers=workers)
+        assert all(np.array_equal(a, b) for a, b in zip(loop, batch))
+
+        old = timeit(lambda: [full_mask_region(item, frame) for item in collection], repeat=1) \
+            if count <= 100 else float('nan')
+        per_object = timeit(lambda: [item.getShapeRegion(frame) for item in collection], repeat=3)
+        sequential = timeit(lambda: collection.extract_regions(frame), repeat=3)
+        threaded = timeit(lambda: collection.extract_regions(frame, workers=workers), repeat=3)
+        rows.append((count, '%.2f' % old, '%.2f' % per_object,
+                     '%.2f' % sequential, '%.2f' % threaded))
+    print('12 MP BGR frame, %d worker threads' % workers)
+    print_table(('rois', 'full-mask loop ms', 'window loop ms', 'batch ms', 'batch threaded ms'), rows)
+
+if __name__ == '__main__':
+    main()
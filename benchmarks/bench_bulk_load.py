@@ -0,0 +1,60 @@
+# Loading detector results into a visible ImageViewer: add() per object, which
+# notifies, indexes and schedules a repaint each time, vs one extend() inside
+# batch_update(). The time to the next painted frame is included.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_bulk_load.py
+import _common
+from _common import print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import time
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def make_objects(count, rng):
+    cx, cy = rng.uniform(0, 8000, count), rng.uniform(0, 6000, count)
+    w, h = rng.uniform(10, 60, count), rng.uniform(10, 60, count)
+    angle = rng.uniform(0, 360, count)
+    return [RotationRectangle(*row) for row in
+            zip(cx.tolist(), cy.tolist(), w.tolist(), h.tolist(), angle.tolist())]
+
+def load(app, objects, batched):
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.show()
+    view.setImage(np.zeros((6000, 8000), dtype=np.uint8))
+    app.processEvents()
+    collection = view.drawable_object_collection
+    start = time.perf_counter()
+    if batched:
+        with collection.batch_update():
+            collection.extend(objects)
+    else:
+        for obj in objects:
+            collection.add(obj)
+    loaded = time.perf_counter()
+    view.viewport().grab()
+    painted = time.perf_counter()
+    lookup = collection.get_by_id(id(objects[-1])) is objects[-1]
+    collection.clear()
+    view.close()
+    return (loaded - start) * 1000.0, (painted - start) * 1000.0, lookup
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    rows = []
+    for count in (1000, 10000, 100000):
+        objects = make_objects(count, rng)
+        for name, batched in (('add() loop', False), ('batch extend', True)):
+            load_ms, paint_ms, lookup = load(app, objects, batched)
+            rows.append((count, name, '%.1f' % load_ms, '%.1f' % paint_ms,
+                         'ok' if lookup else 'FAIL'))
+    print_table(('objects', 'method', 'load ms', 'load+paint ms', 'id lookup'), rows)
+
+if __name__ == '__main__':
+    main()
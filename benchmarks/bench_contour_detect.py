@@ -0,0 +1,94 @@
+# Dense synthetic board (a grid of small rotated parts): the old per-contour
+# loop into a viewer's collection vs ContourDetector.populate (one
+# RotationRectangleArray), plus the first paint after each, a local
+# redetect after editing one area, and rotated NMS on jittered duplicates.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_contour_detect.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import cv2
+import keyboard
+from PyQt5.QtWidgets import QApplication
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+from contourdetect import ContourDetector, box_corners, normalize_boxes, rotated_nms
+
+def make_board(rng, rows=100, columns=200, pitch=20):
+    image = np.zeros((rows * pitch, columns * pitch), dtype=np.uint8)
+    ys, xs = np.mgrid[0:rows, 0:columns]
+    boxes = np.column_stack([(xs.ravel() + 0.5) * pitch, (ys.ravel() + 0.5) * pitch,
+                             rng.uniform(8, 14, xs.size), rng.uniform(4, 8, xs.size),
+                             rng.uniform(0, 180, xs.size)])
+    cv2.fillPoly(image, list(box_corners(boxes).astype(np.int32)), 255)
+    return image
+
+def loop_detect(view, image):
+    contours, _ = cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+        if w * h >= 10:
+            view.drawable_object_collection.add(RotationRectangle(cx, cy, w, h, angle))
+
+def fresh_view(image):
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.setImage(image)
+    return view
+
+def main():
+    keyboard.is_pressed = lambda key: False
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    image = make_board(rng)
+    rows = []
+
+    view = fresh_view(image)
+    loop_ms = timeit(lambda: loop_detect(view, image), repeat=1)
+    loop_count = len(view.drawable_object_collection)
+    loop_paint_ms = timeit(lambda: view.viewport().grab(), repeat=1)
+
+    view = fresh_view(image)
+    detector = ContourDetector(min_area=10)
+    populate_ms = timeit(lambda: detector.populate(view.drawable_object_collection, image), repeat=3)
+    count = len(detector.store)
+    populate_paint_ms = timeit(lambda: view.viewport().grab(), repeat=1)
+    detect_ms = timeit(lambda: detector.detect(image), repeat=3)
+    rows.append(('findContours loop + add()', loop_count, '%.1f' % loop_ms))
+    rows.append(('  first paint', loop_count, '%.1f' % loop_paint_ms))
+    rows.append(('ContourDetector.detect', count, '%.1f' % detect_ms))
+    rows.append(('ContourDetector.populate', count, '%.1f' % populate_ms))
+    rows.append(('  first paint', count, '%.1f' % populate_paint_ms))
+
+    # Edit a 200x200 area: erase it and draw one bigger part across its edge
+    edited = image.copy()
+    edited[900:1100, 1900:2100] = 0
+    cv2.fillPoly(edited, [box_corners(np.array([[1990.0, 1000, 260, 30, 20]])).astype(np.int32)], 255)
+    window = (1900, 900, 2100, 1100)
+    redetect_ms = timeit(lambda: detector.redetect(view.drawable_object_collection, edited, window),
+                         repeat=3)
+    rows.append(('redetect 200x200 window', len(detector.store), '%.1f' % redetect_ms))
+    rows.append(('  paint after redetect', len(detector.store),
+                 '%.1f' % timeit(lambda: view.viewport().grab(), repeat=1)))
+    full = ContourDetector(min_area=10).detect(edited)
+    assert len(view.drawable_object_collection) == 1
+    kept = np.array(sorted(zip(detector.store.cx, detector.store.cy)))
+    assert np.allclose(kept, np.array(sorted(map(tuple, full[:, :2])))), 'redetect differs from full'
+    print('%dx%d board' % (image.shape[1], image.shape[0]))
+    print_table(('pipeline', 'rectangles', 'ms'), rows)
+
+    base = np.column_stack([rng.uniform(0, 4000, 20000), rng.uniform(0, 2000, 20000),
+                            rng.uniform(10, 30, 20000), rng.uniform(5, 15, 20000),
+                            rng.uniform(0, 180, 20000)])
+    jitter = base + np.column_stack([rng.normal(0, 1, (20000, 2)), np.zeros((20000, 2)),
+                                     rng.normal(0, 3, 20000)])
+    boxes = normalize_boxes(np.vstack([base, jitter]))
+    nms_ms = timeit(lambda: rotated_nms(boxes, 0.5), repeat=3)
+    print('rotated NMS: %d boxes -> %d in %.1f ms' % (len(boxes), rotated_nms(boxes, 0.5).sum(), nms_ms))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Replays a 1000 Hz mouse stream that drags one rectangle among many, in real
+# time, and counts geometry updates and viewport paints per second with and
+# without drag-move coalescing. Pass a .npy of (t_seconds, x, y) rows recorded
+# in scene coordinates to replay your own stream instead of the synthetic one.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_drag.py [stream.npy]
+import _common
+from _common import print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sys
+import time
+import numpy as np
+import keyboard
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def synthetic_stream(seconds=2.0, rate=1000, center=(640, 400), radius=150):
+    t = np.arange(int(seconds * rate)) / rate
+    phase = 2 * np.pi * t / seconds
+    return np.stack([t, center[0] + radius * np.sin(phase),
+                     center[1] - radius * np.cos(phase) + radius], axis=1)
+
+def replay(app, stream, coalesce, objects=500):
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.show()
+    view.setImage(np.zeros((800, 1280), dtype=np.uint8))
+    view.resetTransform()
+    view.setSceneRect(0, 0, 1280, 800)
+    view.coalesce_drag_moves = coalesce
+    rng = np.random.default_rng(0)
+    with view.drawable_object_collection.batch_update():
+        view.drawable_object_collection.extend(
+            RotationRectangle(*row) for row in zip(
+                rng.uniform(0, 1280, objects).tolist(), rng.uniform(0, 800, objects).tolist(),
+                rng.uniform(20, 60, objects).tolist(), rng.uniform(20, 60, objects).tolist(),
+                rng.uniform(0, 360, objects).tolist()))
+        dragged = RotationRectangle(stream[0, 1], stream[0, 2], 80, 60, 0)
+        view.drawable_object_collection.add(dragged)
+    app.processEvents()
+
+    updates = []
+    view.objectGeometryChanged.connect(lambda item: updates.append(item))
+    view.repaint_stats.reset()
+    to_view = lambda x, y: QPointF(view.mapFromScene(QPointF(x, y)))
+    start_pos = to_view(stream[0, 1], stream[0, 2])
+    view.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, start_pos, Qt.NoButton, Qt.NoButton, Qt.NoModifier))
+    view.mousePressEvent(QMouseEvent(QEvent.MouseButtonPress, start_pos, Qt.LeftButton,
+                                     Qt.LeftButton, Qt.NoModifier))
+    begin = time.perf_counter()
+    late = 0.0
+    handler = 0.0
+    for t, x, y in stream[1:]:
+        while time.perf_counter() - begin < t:
+            app.processEvents()
+        late = max(late, time.perf_counter() - begin - t)
+        event_start = time.perf_counter()
+        view.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, to_view(x, y), Qt.LeftButton,
+                                        Qt.LeftButton, Qt.NoModifier))
+        handler += time.perf_counter() - event_start
+    view.mouseReleaseEvent(QMouseEvent(QEvent.MouseButtonRelease, to_view(*stream[-1, 1:]),
+                                       Qt.LeftButton, Qt.NoButton, Qt.NoModifier))
+    app.processEvents()
+    elapsed = time.perf_counter() - begin
+    final = (dragged.center.x(), dragged.center.y())
+    view.close()
+    return (len(updates) / elapsed, view.repaint_stats.repaints / elapsed,
+            handler / (len(stream) - 1) * 1000.0, late * 1000.0, final)
+
+def main():
+    keyboard.is_pressed = lambda key: False
+    app = QApplication.instance() or QApplication([])
+    stream = np.load(sys.argv[1]) if len(sys.argv) > 1 else synthetic_stream()
+    rows = []
+    finals = []
+    for name, coalesce in (('every event', False), ('coalesced', True)):
+        updates, paints, handler_ms, late_ms, final = replay(app, stream, coalesce)
+        finals.append(final)
+        rows.append((name, '%.0f' % updates, '%.0f' % paints, '%.3f' % handler_ms, '%.1f' % late_ms))
+    rate = (len(stream) - 1) / (stream[-1, 0] - stream[0, 0])
+    print('%d events at %.0f Hz' % (len(stream), rate))
+    print_table(('drag moves', 'geometry updates/s', 'paints/s', 'ms per move event',
+                 'max lag ms'), rows)
+    print('same final position:', np.allclose(finals[0], finals[1]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Derived-geometry cache on RotationRectangle: cost of cached vs recomputed
+# lookups, and the hit rate over a headless paint-heavy session.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_geometry_cache.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QPointF
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rect = RotationRectangle(300, 300, 200, 100, 30)
+    point = QPointF(310, 290)
+    rows = []
+    for name, call in (('get_corners', rect.get_corners),
+                       ('get_rotation_handle_pos', rect.get_rotation_handle_pos),
+                       ('get_polygon', rect.get_polygon),
+                       ('findPoint (miss)', lambda: rect._is_point_in_rotated_rect(point))):
+        def cold():
+            rect._geometry_cache.clear()
+            call()
+        rows.append((name, '%.2f' % (timeit(cold, number=10000) * 1000),
+                     '%.2f' % (timeit(call, number=10000) * 1000)))
+    print_table(('lookup', 'recompute us', 'cached us'), rows)
+
+    rng = np.random.default_rng(0)
+    view = ImageViewer()
+    view.resize(1024, 768)
+    view.image = np.zeros((768, 1024), dtype=np.uint8)
+    for _ in range(200):
+        view.drawable_object_collection.add(
+            RotationRectangle(rng.uniform(0, 1024), rng.uniform(0, 768),
+                              rng.uniform(20, 120), rng.uniform(20, 120), rng.uniform(0, 360)))
+    view.show()
+    RotationRectangle.cache_stats.reset()
+    for frame in range(60):
+        # one object moves per frame, everything repaints
+        view.drawable_object_collection[frame % 200].angle += 1
+        view.viewport().grab()
+    print('paint session (200 shapes, 60 frames):', RotationRectangle.cache_stats.snapshot())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Hover hit-test latency per mouse move: findPoint on every object vs the
+# ImageViewer spatial index. Runs headless.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_hit_test.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QPointF
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def make_view(rng, count, extent):
+    view = ImageViewer()
+    for _ in range(count):
+        view.drawable_object_collection.add(
+            RotationRectangle(rng.uniform(0, extent), rng.uniform(0, extent),
+                              rng.uniform(20, 120), rng.uniform(20, 120), rng.uniform(0, 360)))
+    return view
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    extent = 4000
+    points = [QPointF(*p) for p in rng.uniform(0, extent, (200, 2))]
+    rows = []
+    for count in (10, 100, 1000, 5000):
+        view = make_view(rng, count, extent)
+        objects = view.drawable_object_collection
+
+        def scan_all():
+            for point in points:
+                for obj in objects:
+                    obj.findPoint(point)
+
+        def indexed():
+            for point in points:
+                view._find_point(point)
+
+        full = timeit(scan_all, repeat=3) / len(points)
+        fast = timeit(indexed, repeat=3) / len(points)
+        rows.append((count, '%.4f' % full, '%.4f' % fast, '%.0fx' % (full / fast)))
+    print_table(('objects', 'scan ms/move', 'index ms/move', 'speedup'), rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Per-frame cost of getting a 12 MP frame on screen: the old copy + Indexed8
+# path vs wrapping the array with ndarray_to_qimage, and the QPixmap upload.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_image_convert.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPixmap
+
+from imageconvert import ndarray_to_qimage
+from imageviewer import ImageViewer
+
+def legacy_qimage(frame):
+    kept = frame.copy()
+    return kept, QImage(frame.data, frame.shape[1], frame.shape[0], frame.strides[0],
+                        QImage.Format_Indexed8)
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    frames = {
+        'mono8': rng.integers(0, 256, (3000, 4000), dtype=np.uint8),
+        'mono16': rng.integers(0, 65536, (3000, 4000), dtype=np.uint16),
+        'bgr8': rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8),
+        'bgra8': rng.integers(0, 256, (3000, 4000, 4), dtype=np.uint8),
+    }
+    view = ImageViewer()
+    view.autoFit = False
+    rows = []
+    for name, frame in frames.items():
+        legacy = timeit(lambda: legacy_qimage(frame)) if name == 'mono8' else float('nan')
+        wrap = timeit(lambda: ndarray_to_qimage(frame), number=100)
+        image = ndarray_to_qimage(frame)
+        upload = timeit(lambda: QPixmap.fromImage(image))
+        set_image = timeit(lambda: view.setImage(frame))
+        rows.append((name, '%.3f' % legacy, '%.4f' % wrap, '%.2f' % upload, '%.2f' % set_image))
+    print('4000x3000 frames')
+    print_table(('format', 'copy+Indexed8 ms', 'wrap ms', 'QPixmap.fromImage ms',
+                 'setImage(ndarray) ms'), rows)
+
+if __name__ == '__main__':
+    main()
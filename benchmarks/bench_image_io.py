@@ -0,0 +1,134 @@
+# Loading and saving a large frame in the viewer: the old synchronous path on
+# the GUI thread vs the background loader/saver. Reports the longest stall of
+# the GUI event loop (a 5 ms timer that should keep ticking) and when the
+# first and the full-resolution pixels are on screen.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_image_io.py [--size 8000x6000]
+import _common
+from _common import print_table
+
+import argparse
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import tempfile
+import time
+
+import numpy as np
+import cv2
+import keyboard
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from imageviewer import ImageViewer
+from imagesource import open_image_source
+from objects.rorationrectangle import RotationRectangle
+
+class StallMeter:
+    def __init__(self, interval=5):
+        self.gaps = []
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._tick)
+        self._interval = interval
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.gaps.append(now - self._last)
+        self._last = now
+
+    def __enter__(self):
+        self._last = time.perf_counter()
+        self._timer.start(self._interval)
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.stop()
+        self._tick()
+
+    @property
+    def max_ms(self):
+        return max(self.gaps) * 1000.0
+
+def run_loop(seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+def async_load(view, path):
+    shown = {}
+    start = time.perf_counter()
+    on_preview = lambda *args: shown.setdefault('preview', time.perf_counter() - start)
+    on_loaded = lambda *args: shown.setdefault('full', time.perf_counter() - start)
+    view.loader.previewReady.connect(on_preview)
+    view.loader.loaded.connect(on_loaded)
+    loop = QEventLoop()
+    view.loader.loaded.connect(lambda *args: QTimer.singleShot(0, loop.quit))
+    with StallMeter() as meter:
+        view.loadImage(path)
+        loop.exec_()
+        run_loop(0.05)
+    view.loader.previewReady.disconnect(on_preview)
+    view.loader.loaded.disconnect()
+    view.loader.loaded.connect(view._finish_load)
+    return meter.max_ms, shown.get('preview'), shown['full']
+
+def sync_load(view, path):
+    with StallMeter() as meter:
+        QTimer.singleShot(10, lambda: view.setImage(open_image_source(path)))
+        run_loop(0.05)
+        while view.image is None:
+            run_loop(0.01)
+        run_loop(0.05)
+    return meter.max_ms
+
+def async_save(view, path, overlays):
+    loop = QEventLoop()
+    start = time.perf_counter()
+    with StallMeter() as meter:
+        job = view.saveImage(path, overlays)
+        view.saver.saved.connect(lambda *args: QTimer.singleShot(0, loop.quit))
+        loop.exec_()
+        view.saver.saved.disconnect()
+    return meter.max_ms, time.perf_counter() - start, job
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default='8000x6000')
+    args = parser.parse_args()
+    width, height = map(int, args.size.split('x'))
+    keyboard.is_pressed = lambda key: False
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    image = cv2.resize(rng.integers(0, 256, (height // 10, width // 10, 3), dtype=np.uint8),
+                       (width, height), interpolation=cv2.INTER_CUBIC)
+    directory = tempfile.mkdtemp()
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.show()
+    for i in range(200):
+        view.drawable_object_collection.add(RotationRectangle(
+            rng.uniform(0, width), rng.uniform(0, height), 200, 100, rng.uniform(0, 180)))
+
+    rows = []
+    for extension in ('.jpg', '.png'):
+        path = os.path.join(directory, 'frame' + extension)
+        cv2.imwrite(path, image)
+        view.setImage(None)
+        view.image = None
+        sync_stall = sync_load(view, path)
+        view.setImage(None)
+        view.image = None
+        stall, preview, full = async_load(view, path)
+        rows.append(('load ' + extension, '%.0f' % sync_stall, '%.0f' % stall,
+                     '%.0f' % (preview * 1000) if preview is not None else '-', '%.0f' % (full * 1000)))
+    for extension, overlays in (('.png', False), ('.jpg', True)):
+        path = os.path.join(directory, 'saved' + extension)
+        start = time.perf_counter()
+        cv2.imwrite(path, np.asarray(view.image))
+        sync_ms = (time.perf_counter() - start) * 1000
+        stall, total, _ = async_save(view, path, overlays)
+        rows.append(('save ' + extension + (' + shapes' if overlays else ''),
+                     '%.0f' % sync_ms, '%.0f' % stall, '-', '%.0f' % (total * 1000)))
+    print('%dx%d BGR frame' % (width, height))
+    print_table(('operation', 'sync stall ms', 'async stall ms', 'preview ms', 'done ms'), rows)
+
+if __name__ == '__main__':
+    main()
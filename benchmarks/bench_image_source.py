@@ -0,0 +1,98 @@
+# Peak RSS of cropping one small rotated ROI from a multi-GB image file through
+# an ImageSource. Each case runs in a fresh process and reports how much its
+# peak resident set grew during open + getShapeRegion; the script exits
+# non-zero if any case grows by more than --limit MiB.
+# Run: python benchmarks/bench_image_source.py [--gigabytes 3] [--limit 64]
+import _common
+from _common import print_table
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+ROI = (12000.0, 9000.0, 300.0, 120.0, 30.0)
+
+def peak_rss_bytes():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def make_files(directory, gigabytes):
+    import numpy as np
+    width = 40000
+    height = int(gigabytes * 2 ** 30 // width)
+    paths = {'npy': os.path.join(directory, 'big.npy'),
+             'raw': os.path.join(directory, 'big.raw')}
+    # Sparse files: only the rows around the ROI are actually written
+    array = np.lib.format.open_memmap(paths['npy'], mode='w+', dtype=np.uint8,
+                                      shape=(height, width))
+    array[8500:9500, 11500:12500] = np.arange(1000, dtype=np.uint8)
+    array.flush()
+    del array
+    raw = np.memmap(paths['raw'], dtype=np.uint8, mode='w+', shape=(height, width))
+    raw[8500:9500, 11500:12500] = np.arange(1000, dtype=np.uint8)
+    raw.flush()
+    del raw
+    try:
+        import tifffile
+        paths['tiff'] = os.path.join(directory, 'big.tif')
+        with tifffile.TiffWriter(paths['tiff'], bigtiff=True) as tif:
+            tif.write(shape=(height, width), dtype=np.uint8, tile=(256, 256), compression='zlib',
+                      data=(np.zeros((256, 256), np.uint8) for _ in range(
+                          -(-height // 256) * -(-width // 256))))
+    except ImportError:
+        pass
+    return (height, width), paths
+
+def crop(kind, path, height, width):
+    from imagesource import open_image_source
+    from objects.rorationrectangle import RotationRectangle
+
+    # Imports are done, so the growth below is the file access alone
+    before = peak_rss_bytes()
+    start = time.perf_counter()
+    if kind == 'raw':
+        source = open_image_source(path, shape=(height, width))
+    else:
+        source = open_image_source(path)
+    roi = RotationRectangle(*ROI).getShapeRegion(source)
+    elapsed = time.perf_counter() - start
+    print(elapsed * 1000, (peak_rss_bytes() - before) / 2 ** 20, roi.shape[0], roi.shape[1],
+          int(roi.sum()))
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == 'crop':
+        crop(sys.argv[2], sys.argv[3], *map(int, sys.argv[4].split('x')))
+        return
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--gigabytes', type=float, default=3.0)
+    parser.add_argument('--limit', type=float, default=64.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        (height, width), paths = make_files(directory, args.gigabytes)
+        rows = []
+        failed = False
+        for kind, path in paths.items():
+            out = subprocess.run([sys.executable, __file__, 'crop', kind, path,
+                                  '%dx%d' % (height, width)],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            crop_ms, peak_mib = float(out[0]), float(out[1])
+            failed |= peak_mib > args.limit
+            rows.append((kind, '%.2f GiB' % (os.path.getsize(path) / 2 ** 30),
+                         '%.1f' % crop_ms, '%.1f' % peak_mib, '%sx%s' % (out[2], out[3])))
+        if 'tiff' not in paths:
+            print('tifffile not installed; tiled TIFF case skipped')
+        print('%dx%d uint8 image, one %gx%g ROI at %g deg' % (width, height, ROI[2], ROI[3], ROI[4]))
+        print_table(('file', 'on disk', 'open+crop ms', 'peak RSS growth MiB', 'roi'), rows)
+    if failed:
+        print('FAIL: peak RSS grew by more than %.0f MiB' % args.limit)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Overlay frame time in ImageViewer.paintEvent: the old per-object draw loop
+# vs culled, batched painting. Renders offscreen.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_paint.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QImage, QPainter, QPen
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def legacy_draw(rect, painter, scale):
+    pen = QPen(rect.color, 2)
+    pen.setCosmetic(True)
+    painter.setPen(pen)
+    painter.setBrush(Qt.NoBrush)
+    corners = rect.get_corners()
+    painter.drawPolygon(*corners)
+    handle_size = max(4, int(6 / scale))
+    painter.setPen(QPen(Qt.green, 1))
+    painter.setBrush(Qt.green)
+    for corner in corners:
+        painter.drawEllipse(QRectF(corner.x() - handle_size / 2, corner.y() - handle_size / 2,
+                                   handle_size, handle_size))
+    rot_handle = rect.get_rotation_handle_pos()
+    painter.setPen(QPen(Qt.red, 2))
+    painter.setBrush(Qt.NoBrush)
+    painter.drawEllipse(QRectF(rot_handle.x() - handle_size, rot_handle.y() - handle_size,
+                               handle_size * 2, handle_size * 2))
+    painter.drawLine(rect.center, rot_handle)
+    painter.setPen(QPen(Qt.yellow, 1))
+    painter.setBrush(Qt.yellow)
+    painter.drawEllipse(QRectF(rect.center.x() - handle_size / 3, rect.center.y() - handle_size / 3,
+                               handle_size / 1.5, handle_size / 1.5))
+
+class LegacyViewer(ImageViewer):
+    def paintEvent(self, event):
+        super(ImageViewer, self).paintEvent(event)
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setTransform(self.viewportTransform())
+        scale = self.transform().m11()
+        for obj in self.drawable_object_collection:
+            legacy_draw(obj, painter, scale)
+
+def make_view(cls, count, extent, rng):
+    view = cls()
+    view.resize(1920, 1080)
+    frame = np.zeros((extent, extent), dtype=np.uint8)
+    view.image = frame
+    view.setImage(QImage(frame.data, extent, extent, extent, QImage.Format_Grayscale8))
+    for _ in range(count):
+        view.drawable_object_collection.add(
+            RotationRectangle(rng.uniform(0, extent), rng.uniform(0, extent),
+                              rng.uniform(20, 80), rng.uniform(20, 80), rng.uniform(0, 360)))
+    return view
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    extent = 4000
+    rows = []
+    for count in (500, 5000):
+        for zoom in ('fit', '4x'):
+            times = []
+            for cls in (LegacyViewer, ImageViewer):
+                view = make_view(cls, count, extent, np.random.default_rng(0))
+                view.fitInView()
+                if zoom == '4x':
+                    view.scale(4, 4)
+                times.append(timeit(view.viewport().grab, repeat=5))
+            rows.append((count, zoom, '%.1f' % times[0], '%.1f' % times[1]))
+    print_table(('shapes', 'zoom', 'per-object ms', 'batched ms'), rows)
+
+if __name__ == '__main__':
+    main()
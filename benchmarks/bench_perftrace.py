@@ -0,0 +1,69 @@
+# Cost of the timing hooks per call: never enabled, enabled, and after
+# disable(). Disabled hooks must leave the original functions in place.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_perftrace.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import json
+import sys
+import tempfile
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+import imageconvert
+from objects.rorationrectangle import RotationRectangle
+from perftrace import PerfTracer
+
+CALLS = 20000
+
+def per_call_ns(fn):
+    return timeit(fn, repeat=7, number=CALLS) * 1e6
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rect = RotationRectangle(32, 32, 20, 10, 30)
+    small = np.zeros((64, 64), dtype=np.uint8)
+    cases = {
+        'RotationRectangle.getShapeRegion': lambda: rect.getShapeRegion(small),
+        'ndarray_to_qimage': lambda: imageconvert.ndarray_to_qimage(small),
+    }
+    originals = (RotationRectangle.getShapeRegion, imageconvert.ndarray_to_qimage)
+    tracer = PerfTracer(capacity=CALLS)
+
+    for fn in cases.values():
+        per_call_ns(fn)  # warm-up
+    timings = {name: [per_call_ns(fn)] for name, fn in cases.items()}
+    tracer.enable()
+    for name, fn in cases.items():
+        timings[name].append(per_call_ns(fn))
+    summary = tracer.summary()
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        path = f.name
+    tracer.dump_chrome_trace(path)
+    with open(path) as f:
+        events = len(json.load(f)['traceEvents'])
+    os.remove(path)
+    tracer.disable()
+    for name, fn in cases.items():
+        timings[name].append(per_call_ns(fn))
+
+    restored = (RotationRectangle.getShapeRegion, imageconvert.ndarray_to_qimage) == originals
+    rows = [(name, '%.0f' % base, '%.0f' % enabled, '%.0f' % disabled,
+             '%+.1f%%' % ((disabled - base) / base * 100))
+            for name, (base, enabled, disabled) in timings.items()]
+    print('%d calls per run, best of 7' % CALLS)
+    print_table(('function', 'never enabled ns', 'enabled ns', 'disabled ns',
+                 'disabled vs never'), rows)
+    for name, stats in summary.items():
+        print('%s: p50 %.4f ms, p95 %.4f ms, p99 %.4f ms over %d calls'
+              % (name, stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['count']))
+    print('chrome trace events:', events)
+    print('originals restored after disable():', restored)
+    if not restored:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
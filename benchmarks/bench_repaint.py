@@ -0,0 +1,80 @@
+# Repaint count and repainted pixel area for hover and drag on a 4K viewport:
+# full-viewport invalidation on every move vs dirty-region repaint.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_repaint.py
+import _common
+from _common import print_table
+
+import os
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QGraphicsView
+from PyQt5.QtCore import QEvent, QPoint, QPointF, Qt
+from PyQt5.QtGui import QImage, QMouseEvent
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+class LegacyViewer(ImageViewer):
+    def mouseMoveEvent(self, event):
+        emit_point = self.mapToScene(event.pos())
+        for drawObject in self.drawable_object_collection:
+            if drawObject.findPoint(emit_point):
+                self.invalidate()
+        self.viewport().update()
+        QGraphicsView.mouseMoveEvent(self, event)
+
+    def invalidate(self, scene_rect=None):
+        self.viewport().update()
+
+def move(app, view, pos):
+    view.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, QPointF(pos), Qt.NoButton,
+                                    Qt.NoButton, Qt.NoModifier))
+    app.processEvents()
+
+def session(app, cls, frame):
+    view = cls()
+    view.resize(3840, 2160)
+    view.image = frame
+    view.setImage(QImage(frame.data, frame.shape[1], frame.shape[0], frame.strides[0],
+                         QImage.Format_Grayscale8))
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        view.drawable_object_collection.add(
+            RotationRectangle(rng.uniform(500, 7500), rng.uniform(500, 5500),
+                              rng.uniform(100, 400), rng.uniform(100, 400), rng.uniform(0, 360)))
+    view.show()
+    view.fitInView()
+    app.processEvents()
+    view.repaint_stats.reset()
+    start = time.perf_counter()
+
+    # Hover over empty background, then drag one rectangle
+    for x in range(0, 200, 2):
+        move(app, view, QPoint(5 + x, 5))
+    target = view.drawable_object_collection[0]
+    pos = view.mapFromScene(target.center)
+    move(app, view, pos)
+    target.selectPoint()
+    for step in range(100):
+        move(app, view, pos + QPoint(step, step // 2))
+    target.resetSelectPoint()
+    elapsed = time.perf_counter() - start
+    stats = view.repaint_stats
+    view.close()
+    return stats.repaints, stats.pixels, elapsed
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    frame = np.random.default_rng(0).integers(0, 256, (6000, 8000), dtype=np.uint8)
+    rows = []
+    for name, cls in (('full viewport', LegacyViewer), ('dirty region', ImageViewer)):
+        repaints, pixels, elapsed = session(app, cls, frame)
+        rows.append((name, repaints, '%.1f' % (pixels / 1e6), '%.0f' % (repaints / elapsed),
+                     '%.1f' % (pixels / elapsed / 1e6), '%.2f' % elapsed))
+    print('3840x2160 viewport, 48 MP image, 100 hover moves + 100 drag moves')
+    print_table(('policy', 'repaints', 'Mpx painted', 'repaints/s', 'Mpx/s', 'session s'), rows)
+
+if __name__ == '__main__':
+    main()
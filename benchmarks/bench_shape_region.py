@@ -0,0 +1,49 @@
+# ROI extraction cost: full-image mask (old) vs clipped-window mask (current).
+# Run: python benchmarks/bench_shape_region.py
+import _common
+from _common import timeit, print_table
+
+import numpy as np
+import cv2
+
+from objects.rorationrectangle import RotationRectangle
+
+def full_mask_region(rect, image):
+    pts = np.array([[p.x(), p.y()] for p in rect.get_corners()], dtype=np.int32)
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [pts], 255)
+    result = cv2.bitwise_and(image, image, mask=mask)
+    x, y, w, h = cv2.boundingRect(pts)
+    if (x + w <= 0 or x >= image.shape[1] or
+        y + h <= 0 or y >= image.shape[0]):
+        return np.array([])
+    return result[max(0, y):min(y+h, image.shape[0]),
+                  max(0, x):min(x+w, image.shape[1])]
+
+def check_identical(rng, count=500):
+    image = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    for _ in range(count):
+        rect = RotationRectangle(rng.uniform(-200, 840), rng.uniform(-200, 680),
+                                 rng.uniform(10, 400), rng.uniform(10, 400),
+                                 rng.uniform(0, 360))
+        a = full_mask_region(rect, image)
+        b = rect.getShapeRegion(image)
+        assert a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+
+def main():
+    rng = np.random.default_rng(0)
+    check_identical(rng)
+    rows = []
+    for megapixels in (1, 12, 48):
+        side = int((megapixels * 1e6) ** 0.5)
+        image = rng.integers(0, 256, (side, side), dtype=np.uint8)
+        for roi in ((200, 100), (800, 400), (2000, 1000)):
+            rect = RotationRectangle(side / 2, side / 2, roi[0], roi[1], 30)
+            old = timeit(lambda: full_mask_region(rect, image))
+            new = timeit(lambda: rect.getShapeRegion(image))
+            rows.append(('%d MP' % megapixels, '%dx%d' % roi,
+                         '%.3f' % old, '%.3f' % new, '%.1fx' % (old / new)))
+    print_table(('image', 'roi', 'full mask ms', 'window ms', 'speedup'), rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Loading many detector regions: one RotationRectangle QObject per shape vs a
+# single RotationRectangleArray. Each model is measured in a fresh process.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_shape_store.py
+import _common
+from _common import print_table
+
+import os
+import subprocess
+import sys
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def load(model, count):
+    import numpy as np
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QPointF
+    from imageviewer import ImageViewer
+    from objects.rorationrectangle import RotationRectangle
+    from objects.rotationrectanglearray import RotationRectangleArray
+
+    app = QApplication.instance() or QApplication([])
+    view = ImageViewer()
+    rng = np.random.default_rng(0)
+    cx, cy = rng.uniform(0, 8000, count), rng.uniform(0, 8000, count)
+    w, h = rng.uniform(20, 120, count), rng.uniform(20, 120, count)
+    angle = rng.uniform(0, 360, count)
+    before = rss_bytes()
+    start = time.perf_counter()
+    if model == 'objects':
+        for row in zip(cx.tolist(), cy.tolist(), w.tolist(), h.tolist(), angle.tolist()):
+            view.drawable_object_collection.add(RotationRectangle(*row))
+        hit = lambda p: [o.findPoint(p) for o in view.drawable_object_collection]
+    else:
+        store = RotationRectangleArray(cx, cy, w, h, angle)
+        view.drawable_object_collection.add(store)
+        hit = store.findPoint
+    elapsed = time.perf_counter() - start
+    memory = rss_bytes() - before
+    start = time.perf_counter()
+    for p in rng.uniform(0, 8000, (20, 2)):
+        hit(QPointF(*p))
+    hit_ms = (time.perf_counter() - start) / 20 * 1000
+    print(elapsed * 1000, memory / count, hit_ms)
+
+def main():
+    if len(sys.argv) == 3:
+        load(sys.argv[1], int(sys.argv[2]))
+        return
+    rows = []
+    for count in (1000, 10000, 50000):
+        for model in ('objects', 'array'):
+            out = subprocess.run([sys.executable, __file__, model, str(count)],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            load_ms, per_shape, hit_ms = map(float, out)
+            rows.append((count, model, '%.1f' % load_ms, '%.0f' % per_shape, '%.2f' % hit_ms))
+    print_table(('shapes', 'model', 'load ms', 'bytes/shape', 'hit-test ms'), rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# 3x3 inspection grid over one frame: nine independent viewers (each with its
+# own scene, pixmap and shape collection) vs nine viewers sharing one
+# ImageDocument. Each grid cell is zoomed 1:1 onto its own tile of the frame,
+# so an edited shape is visible in one cell only.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_shared_views.py [--grid 3]
+import _common
+from _common import print_table
+
+import argparse
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import time
+
+import numpy as np
+import keyboard
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication, QGridLayout, QWidget
+
+from imageviewer import ImageViewer
+from imagedocument import ImageDocument
+from objects.rorationrectangle import RotationRectangle
+
+def pump(app, rounds=5):
+    for _ in range(rounds):
+        app.processEvents(QEventLoop.AllEvents, 10)
+
+def build_grid(grid, shared):
+    window = QWidget()
+    layout = QGridLayout(window)
+    document = ImageDocument() if shared else None
+    views = []
+    for i in range(grid * grid):
+        view = ImageViewer(document=document)
+        view.autoFit = False
+        layout.addWidget(view, i // grid, i % grid)
+        views.append(view)
+    window.resize(400 * grid, 300 * grid)
+    window.show()
+    return window, views
+
+def run(app, grid, shared, frame, shapes):
+    window, views = build_grid(grid, shared)
+    pump(app)
+    targets = views[:1] if shared else views
+    start = time.perf_counter()
+    for view in targets:
+        view.setImage(frame)
+    set_image_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for view in targets:
+        with view.drawable_object_collection.batch_update():
+            view.drawable_object_collection.extend(RotationRectangle(*row) for row in shapes)
+    add_ms = (time.perf_counter() - start) * 1000
+    height, width = frame.shape[:2]
+    # The scene rect follows the new image once the event loop has run
+    pump(app)
+    for i, view in enumerate(views):
+        view.resetTransform()
+        view.centerOn((i % grid + 0.5) * width / grid, (i // grid + 0.5) * height / grid)
+    pump(app)
+    pixmaps = {id(view.document.pixmap_item) for view in views}
+    pixmap_mb = len(pixmaps) * width * height * 4 / 2 ** 20
+    store = {id(view.drawable_object_collection) for view in views}
+
+    # Nudge one shape in the first cell, in every copy when views are independent
+    for view in views:
+        view.repaint_stats.reset()
+    start = time.perf_counter()
+    for step in range(20):
+        for view in targets:
+            item = view.drawable_object_collection[0]
+            item.set_pose(item.center.x() + 1, item.center.y(), item.angle)
+        pump(app, 1)
+    edit_ms = (time.perf_counter() - start) * 1000 / 20
+    pump(app)
+    repainted = sum(view.repaint_stats.repaints > 0 for view in views)
+    window.close()
+    return ('shared document' if shared else 'independent views', '%.0f' % set_image_ms,
+            '%.0f' % add_ms, '%.0f' % pixmap_mb, len(store) * len(shapes),
+            '%.2f' % edit_ms, '%d/%d' % (repainted, len(views)))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grid', type=int, default=3)
+    parser.add_argument('--shapes', type=int, default=2000)
+    args = parser.parse_args()
+    keyboard.is_pressed = lambda key: False
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8)
+    first_cell = (4000 / args.grid / 2, 3000 / args.grid / 2, 120, 60, 15)
+    shapes = [first_cell] + list(zip(rng.uniform(0, 4000, args.shapes - 1).tolist(),
+                                     rng.uniform(0, 3000, args.shapes - 1).tolist(),
+                                     [60.0] * (args.shapes - 1), [30.0] * (args.shapes - 1),
+                                     rng.uniform(0, 180, args.shapes - 1).tolist()))
+    rows = [run(app, args.grid, shared, frame, shapes) for shared in (False, True)]
+    print('%dx%d grid over a 4000x3000 BGR frame, %d shapes' % (args.grid, args.grid, args.shapes))
+    print_table(('layout', 'setImage ms', 'add shapes ms', 'pixmaps MB', 'shape objects',
+                 'edit ms', 'views repainted'), rows)
+
+if __name__ == '__main__':
+    main()
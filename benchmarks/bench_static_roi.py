@@ -0,0 +1,83 @@
+# Per-frame ROI extraction over a video stream with ROIs that do not move:
+# rasterizing every mask on every frame (old) vs the cached window masks of
+# getShapeRegion, against a plain copy of each bounding window as the floor.
+# Also times the point-in-shape test used for hovering.
+# Run: python benchmarks/bench_static_roi.py
+import _common
+from _common import timeit, print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import cv2
+from PyQt5.QtCore import QPointF, Qt
+
+from objects.ellipse import Ellipse
+from objects.polygon import Polygon
+from objects.rorationrectangle import RotationRectangle
+from objects.regionextract import clip_bounding_rect, extract_polygon_region
+
+def make_shapes(kind, count, rng, width, height, size):
+    shapes = []
+    for _ in range(count):
+        cx, cy = rng.uniform(size, width - size), rng.uniform(size, height - size)
+        angle = rng.uniform(0, 180)
+        if kind == 'rectangle':
+            shapes.append(RotationRectangle(cx, cy, size, size * 0.6, angle))
+        elif kind == 'ellipse':
+            shapes.append(Ellipse(cx, cy, size, size * 0.6, angle))
+        else:
+            # Star-shaped 12-gon
+            t = np.linspace(0, 2 * np.pi, 12, endpoint=False)
+            radius = np.where(np.arange(12) % 2, size / 2, size / 4)
+            shapes.append(Polygon(np.stack((cx + radius * np.cos(t), cy + radius * np.sin(t)), axis=1)))
+    return shapes
+
+def copy_windows(frame, windows):
+    return [frame[y0:y1, x0:x1].copy() for x0, y0, x1, y1 in windows]
+
+def main():
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8) for _ in range(4)]
+    height, width = frames[0].shape[:2]
+    rows = []
+    for kind in ('rectangle', 'ellipse', 'polygon'):
+        for count, size in ((20, 300), (200, 80)):
+            shapes = make_shapes(kind, count, rng, width, height, size)
+            for frame in frames:
+                for shape in shapes:
+                    assert np.array_equal(shape.getShapeRegion(frame),
+                                          extract_polygon_region(frame, shape.get_polygon()))
+            windows = [clip_bounding_rect(shape.get_polygon(), frames[0].shape) for shape in shapes]
+            stream = iter(range(10 ** 9))
+            frame = lambda: frames[next(stream) % len(frames)]
+            old = timeit(lambda: [extract_polygon_region(f, s.get_polygon())
+                                  for f in [frame()] for s in shapes], repeat=5, number=4)
+            cached = timeit(lambda: [s.getShapeRegion(f) for f in [frame()] for s in shapes],
+                            repeat=5, number=4)
+            copy = timeit(lambda: copy_windows(frame(), windows), repeat=5, number=4)
+            rows.append(('%s %dpx' % (kind, size), count, '%.2f' % old, '%.2f' % cached,
+                         '%.2f' % copy, '%.1fx' % (cached / copy)))
+    print('per frame, 4000x3000 BGR frames')
+    print_table(('rois', 'count', 'rasterize ms', 'cached mask ms', 'window copy ms', 'cached / copy'), rows)
+
+    rows = []
+    points = [QPointF(x, y) for x, y in rng.uniform(0, 400, (2000, 2))]
+    for shape in (Ellipse(200, 200, 300, 180, 30), make_shapes('polygon', 1, rng, 400, 400, 150)[0]):
+        contour = shape.get_outline().astype(np.float32)
+        polygonf = shape.get_polygonf()
+        table = shape.get_edge_table()
+        assert all(table.contains(p.x(), p.y()) == polygonf.containsPoint(p, Qt.OddEvenFill)
+                   for p in points)
+        per_point = lambda run: timeit(run, repeat=5) * 1000 / len(points)
+        qt = per_point(lambda: [polygonf.containsPoint(p, Qt.OddEvenFill) for p in points])
+        opencv = per_point(lambda: [cv2.pointPolygonTest(contour, (p.x(), p.y()), False) for p in points])
+        edges = per_point(lambda: [table.contains(p.x(), p.y()) for p in points])
+        rows.append(('%s, %d vertices' % (type(shape).__name__, len(contour)),
+                     '%.2f' % qt, '%.2f' % opencv, '%.2f' % edges))
+    print()
+    print_table(('hit test', 'QPolygonF us', 'pointPolygonTest us', 'edge table us'), rows)
+
+if __name__ == '__main__':
+    main()
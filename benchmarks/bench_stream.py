@@ -0,0 +1,50 @@
+# Streaming a synthetic 60 fps camera into ImageViewer while the GUI thread is
+# idle or busy; reports delivered fps, dropped frames and paint latency.
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_stream.py
+import _common
+from _common import print_table
+
+import os
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from framestream import FrameStream, synthetic_frames
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+def run(app, width, height, channels, busy_ms, seconds=2.0):
+    view = ImageViewer()
+    view.resize(1280, 720)
+    view.drawable_object_collection.add(RotationRectangle(200, 200, 150, 80, 20))
+    view.show()
+    stream = FrameStream(synthetic_frames(width, height, fps=60, channels=channels))
+    view.attachStream(stream)
+    stream.start()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        if busy_ms:
+            time.sleep(busy_ms / 1000.0)
+    stream.stop()
+    snapshot = view.stream_metrics.snapshot()
+    snapshot['produced'] = stream.buffer.received
+    view.detachStream()
+    view.close()
+    return snapshot
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    rows = []
+    for width, height, channels in ((1280, 720, 1), (1920, 1080, 3)):
+        for busy_ms in (0, 30):
+            m = run(app, width, height, channels, busy_ms)
+            rows.append(('%dx%dx%d' % (width, height, channels), busy_ms, m['produced'],
+                         m['delivered'], m['dropped'], '%.0f' % m['fps'],
+                         '%.1f' % m['latency_ms_mean'], '%.1f' % m['latency_ms_max']))
+    print_table(('frames', 'gui busy ms', 'produced', 'delivered', 'dropped', 'fps',
+                 'latency ms', 'max latency ms'), rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Large-image display: one full-resolution pixmap vs the tiled pyramid item.
+# Measures setImage, the first fully resolved paint at fit zoom and at 1:1,
+# and a warm repaint. Pass the edge length in pixels (default 16000).
+# Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_tiled.py [size]
+import _common
+from _common import print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sys
+import time
+import numpy as np
+import cv2
+from PyQt5.QtWidgets import QApplication
+
+from imageviewer import ImageViewer
+
+def make_image(size):
+    # Cheap deterministic texture; random noise would dominate setup time
+    row = (np.arange(size, dtype=np.uint32) * 7 % 256).astype(np.uint8)
+    image = np.empty((size, size), dtype=np.uint8)
+    image[:] = row
+    cv2.circle(image, (size // 2, size // 2), size // 3, 255, size // 100)
+    return image
+
+def settle(app, view):
+    # Paint until no tile requests are outstanding
+    start = time.perf_counter()
+    view.viewport().grab()
+    item = view.document.tiled_item
+    while item is not None and item.pyramid._pending:
+        time.sleep(0.001)
+        app.processEvents()
+        if not item.pyramid._pending:
+            view.viewport().grab()
+    return (time.perf_counter() - start) * 1000.0
+
+def measure(app, image, tiled):
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.show()
+    view.tiled_pixel_threshold = 1 if tiled else image.size + 1
+    start = time.perf_counter()
+    view.setImage(image)
+    set_image = (time.perf_counter() - start) * 1000.0
+    view.fitInView()
+    fit_cold = settle(app, view)
+    start = time.perf_counter()
+    view.viewport().grab()
+    fit_warm = (time.perf_counter() - start) * 1000.0
+    view.resetTransform()
+    view.centerOn(image.shape[1] / 2, image.shape[0] / 2)
+    one_cold = settle(app, view)
+    cache = view.document.tiled_item.pyramid.cache.bytes_used / 2 ** 20 if tiled else float('nan')
+    view.clearImage()
+    view.close()
+    return set_image, fit_cold, fit_warm, one_cold, cache
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 16000
+    app = QApplication.instance() or QApplication([])
+    image = make_image(size)
+    rows = []
+    for name, tiled in (('pixmap', False), ('tiled', True)):
+        result = measure(app, image, tiled)
+        rows.append((name,) + tuple('%.1f' % v for v in result))
+    print('%dx%d mono8, 1280x800 viewport' % (size, size))
+    print_table(('item', 'setImage ms', 'fit first ms', 'fit warm ms', '1:1 first ms',
+                 'tile cache MiB'), rows)
+
+if __name__ == '__main__':
+    main()
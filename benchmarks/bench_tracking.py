@@ -0,0 +1,108 @@
+# Synthetic conveyor: textured parts drift and turn over a textured
+# background; RoiTracker follows one rectangle per part. Reports tracking time
+# per frame against the 30 fps budget and the pose error against ground truth.
+# Run: python benchmarks/bench_tracking.py [--rois 50] [--frames 120]
+import _common
+from _common import print_table
+
+import argparse
+import os
+import numpy as np
+import cv2
+
+from roitracker import RoiTracker
+
+def texture(rng, height, width, blur=3):
+    noise = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), blur)
+
+class Scene:
+    # Parts are square textures pasted at their pose each frame. Each part
+    # sways around its own grid cell and keeps turning, so parts never overlap.
+    def __init__(self, rng, count, shape=(1080, 1920), part=72, sway=32.0, period=60, spin=1.0):
+        self.shape = shape
+        self.part = part
+        self.background = cv2.cvtColor(texture(rng, *shape, blur=2), cv2.COLOR_GRAY2BGR) // 2
+        self.textures = [cv2.cvtColor(texture(rng, part, part), cv2.COLOR_GRAY2BGR)
+                         for _ in range(count)]
+        columns = int(np.ceil(np.sqrt(count * shape[1] / shape[0])))
+        rows = int(np.ceil(count / columns))
+        cells = [(x, y) for y in range(rows) for x in range(columns)][:count]
+        self.home = np.array([((x + 0.5) * shape[1] / columns, (y + 0.5) * shape[0] / rows)
+                              for x, y in cells])
+        self.phase = rng.uniform(0, 2 * np.pi, (count, 2))
+        self.spin = rng.uniform(-spin, spin, count)
+        self.sway = sway
+        self.period = period
+        self.frame = 0
+        self.poses = np.zeros((count, 3))
+        self.poses[:, 2] = rng.uniform(0, 360, count)
+        self.step(0)
+
+    def step(self, frames=1):
+        self.frame += frames
+        t = 2 * np.pi * self.frame / self.period
+        self.poses[:, :2] = self.home + self.sway * np.sin(t + self.phase)
+        self.poses[:, 2] += self.spin * frames
+
+    def render(self) -> np.ndarray:
+        frame = self.background.copy()
+        half = (self.part - 1) / 2
+        for (cx, cy, angle), tex in zip(self.poses, self.textures):
+            matrix = cv2.getRotationMatrix2D((half, half), -angle, 1.0)
+            matrix[:, 2] += (cx - half, cy - half)
+            size = int(np.ceil(self.part * 1.5))  # holds the rotated part
+            x0, y0 = int(cx) - size // 2, int(cy) - size // 2
+            matrix[:, 2] -= (x0, y0)
+            patch = cv2.warpAffine(tex, matrix, (size, size))
+            mask = cv2.warpAffine(np.full(tex.shape[:2], 255, np.uint8), matrix, (size, size))
+            # Clip to the frame
+            left, top = max(0, -x0), max(0, -y0)
+            window = frame[y0 + top:y0 + size, x0 + left:x0 + size]
+            h, w = window.shape[:2]
+            np.copyto(window, patch[top:top + h, left:left + w],
+                      where=mask[top:top + h, left:left + w, None] == 255)
+        return frame
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rois', type=int, default=50)
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scene = Scene(rng, args.rois)
+    tracker = RoiTracker(workers=args.workers)
+    # Rectangles a little inside each part, so the template holds no background
+    side = scene.part * 0.8
+    keys = list(range(args.rois))
+    poses = {key: (x, y, side, side, angle) for key, (x, y, angle) in zip(keys, scene.poses)}
+    tracker.track(scene.render(), poses)
+    tracker.stats.reset()
+    errors = []
+    for _ in range(args.frames):
+        scene.step()
+        for result in tracker.track(scene.render(), poses):
+            poses[result.key] = result.pose
+        tracked = np.array([poses[key] for key in keys])
+        position = np.hypot(*(tracked[:, :2] - scene.poses[:, :2]).T)
+        angle = np.abs((tracked[:, 4] - scene.poses[:, 2] + 180) % 360 - 180)
+        errors.append((position, angle))
+    tracker.stop()
+
+    stats = tracker.stats.snapshot()
+    position = np.array([e[0] for e in errors])
+    angle = np.array([e[1] for e in errors])
+    print('%d ROIs, %d frames of 1920x1080, %d worker threads' % (args.rois, args.frames, args.workers))
+    print_table(('budget ms', 'mean ms', 'p95 ms', 'max ms', 'over budget', 'lost'),
+                [('%.1f' % stats['budget_ms'], '%.2f' % stats['mean_ms'], '%.2f' % stats['p95_ms'],
+                  '%.2f' % stats['max_ms'], stats['over_budget'], stats['lost'])])
+    print_table(('error', 'mean', 'p95', 'max', 'final mean'),
+                [('position px', '%.2f' % position.mean(), '%.2f' % np.percentile(position, 95),
+                  '%.2f' % position.max(), '%.2f' % position[-1].mean()),
+                 ('angle deg', '%.2f' % angle.mean(), '%.2f' % np.percentile(angle, 95),
+                  '%.2f' % angle.max(), '%.2f' % angle[-1].mean())])
+
+if __name__ == '__main__':
+    main()
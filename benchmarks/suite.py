@@ -0,0 +1,231 @@
+# Regression benchmark suite for the hot paths: rectangle geometry, hit
+# testing, ROI extraction, paintEvent and setImage, over image sizes, object
+# counts and angles. Everything is synthetic and renders offscreen.
+#
+#   python benchmarks/suite.py --save baseline.json
+#   python benchmarks/suite.py --compare baseline.json --threshold 0.2
+#
+# benchmarks/baseline-quick.json is the committed reference, recorded with
+#   python benchmarks/suite.py --quick --save benchmarks/baseline-quick.json
+# Timings only compare on the machine that recorded them; anywhere else,
+# record a baseline from the unchanged tree first and compare the change
+# against that. compare prints a note when the environments differ.
+#
+# Each case reports the median of --repeat runs in milliseconds. Compare mode
+# exits with status 1 when any case is slower than its baseline by more than
+# the threshold (a fraction, 0.2 = 20%) and by more than --min-delta-ms, which
+# keeps timer noise on microsecond cases from failing the run.
+import _common
+from _common import print_table
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import cv2
+import keyboard
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QPointF, QT_VERSION_STR, PYQT_VERSION_STR
+
+from imageviewer import ImageViewer
+from objects.rorationrectangle import RotationRectangle
+
+ANGLES = (0.0, 30.0, 45.0, 90.0, 137.5)
+MEGAPIXELS = (1, 12, 100)
+OBJECT_COUNTS = (1, 100, 1000, 10000)
+QUICK_MEGAPIXELS = (1, 12)
+QUICK_OBJECT_COUNTS = (1, 100, 1000)
+
+# Setup for one case; returns the callable to time
+Case = Callable[[], Callable[[], None]]
+
+def synthetic_image(megapixels: int, channels: int = 3) -> np.ndarray:
+    height = int(round((megapixels * 1e6 * 3 / 4) ** 0.5))
+    width = int(round(megapixels * 1e6 / height))
+    row = (np.arange(width, dtype=np.uint32) * 7 % 256).astype(np.uint8)
+    image = np.empty((height, width, channels), dtype=np.uint8)
+    image[:] = row[None, :, None]
+    return image
+
+_images: Dict[int, np.ndarray] = {}
+
+def cached_image(megapixels: int) -> np.ndarray:
+    # One image per size for the whole run; building a 100 MP frame costs
+    # more than most cases
+    if megapixels not in _images:
+        _images[megapixels] = synthetic_image(megapixels)
+    return _images[megapixels]
+
+def random_rectangles(count: int, width: float, height: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [RotationRectangle(*row) for row in zip(
+        rng.uniform(0, width, count).tolist(), rng.uniform(0, height, count).tolist(),
+        rng.uniform(20, 120, count).tolist(), rng.uniform(20, 120, count).tolist(),
+        rng.uniform(0, 360, count).tolist())]
+
+def make_viewer(count: int, image: np.ndarray) -> ImageViewer:
+    view = ImageViewer()
+    view.resize(1280, 800)
+    view.show()
+    view.setImage(image)
+    collection = view.drawable_object_collection
+    with collection.batch_update():
+        collection.extend(random_rectangles(count, image.shape[1], image.shape[0]))
+    return view
+
+def geometry_cases(quick: bool) -> Dict[str, Case]:
+    cases = {}
+    for angle in ANGLES:
+        def corners_cold(angle=angle):
+            rect = RotationRectangle(500, 400, 300, 120, angle)
+            def run():
+                rect.angle = angle  # invalidates the geometry cache
+                rect.get_corners()
+            return run
+        def corners_cached(angle=angle):
+            rect = RotationRectangle(500, 400, 300, 120, angle)
+            return rect.get_corners
+        def point_in_rect(angle=angle):
+            rect = RotationRectangle(500, 400, 300, 120, angle)
+            points = [QPointF(*p) for p in np.random.default_rng(1).uniform(300, 700, (100, 2))]
+            return lambda: [rect._is_point_in_rotated_rect(p) for p in points]
+        cases['geometry/get_corners/cold/angle=%g' % angle] = corners_cold
+        cases['geometry/get_corners/cached/angle=%g' % angle] = corners_cached
+        cases['hit/_is_point_in_rotated_rect/x100/angle=%g' % angle] = point_in_rect
+    for count in (QUICK_OBJECT_COUNTS if quick else OBJECT_COUNTS):
+        def find_point(count=count):
+            view = make_viewer(count, synthetic_image(1, 1))
+            points = [QPointF(*p) for p in np.random.default_rng(2).uniform(0, 1000, (50, 2))]
+            return lambda: [view._find_point(p) for p in points]
+        cases['hit/_find_point/x50/objects=%d' % count] = find_point
+    return cases
+
+def roi_cases(quick: bool) -> Dict[str, Case]:
+    cases = {}
+    for megapixels in (QUICK_MEGAPIXELS if quick else MEGAPIXELS):
+        for angle in ANGLES:
+            for size in ((400, 200), (2000, 1000)):
+                def region(megapixels=megapixels, angle=angle, size=size):
+                    image = cached_image(megapixels)
+                    rect = RotationRectangle(image.shape[1] / 2, image.shape[0] / 2,
+                                             size[0], size[1], angle)
+                    return lambda: rect.getShapeRegion(image)
+                cases['roi/getShapeRegion/%dx%d/mp=%d/angle=%g'
+                      % (size[0], size[1], megapixels, angle)] = region
+    return cases
+
+def render_cases(quick: bool) -> Dict[str, Case]:
+    cases = {}
+    for count in (QUICK_OBJECT_COUNTS if quick else OBJECT_COUNTS):
+        def paint(count=count):
+            view = make_viewer(count, synthetic_image(12))
+            view.fitInView()
+            return view.viewport().grab
+        cases['render/paintEvent/fit/objects=%d' % count] = paint
+    for megapixels in (QUICK_MEGAPIXELS if quick else MEGAPIXELS):
+        def set_image(megapixels=megapixels):
+            image = cached_image(megapixels)
+            view = ImageViewer()
+            view.autoFit = False
+            return lambda: view.setImage(image)
+        cases['render/setImage/mp=%d' % megapixels] = set_image
+    return cases
+
+def all_cases(quick: bool) -> Dict[str, Case]:
+    cases = {}
+    for group in (geometry_cases, roi_cases, render_cases):
+        cases.update(group(quick))
+    return cases
+
+def measure(setup, repeat: int, min_time: float = 0.05) -> float:
+    fn = setup()
+    fn()  # warm-up, also fills lazy caches
+    # Enough calls per run that a run takes min_time, so fast cases are not
+    # dominated by timer and scheduling noise
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1000.0)
+    return float(np.median(samples))
+
+def environment() -> dict:
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'opencv': cv2.__version__, 'qt': QT_VERSION_STR, 'pyqt': PYQT_VERSION_STR,
+            'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'platform': platform.platform()}
+
+def compare(results: Dict[str, float], baseline: dict, threshold: float,
+            min_delta: float = 0.0) -> List[str]:
+    base = baseline['results']
+    rows = []
+    regressions = []
+    for name, value in results.items():
+        if name not in base:
+            rows.append((name, '-', '%.4f' % value, 'new'))
+            continue
+        change = value / base[name] - 1 if base[name] else 0.0
+        status = 'ok'
+        if change > threshold and value - base[name] > min_delta:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            status = 'faster'
+        rows.append((name, '%.4f' % base[name], '%.4f' % value, '%+.1f%% %s' % (change * 100, status)))
+    print_table(('case', 'baseline ms', 'current ms', 'change'), rows)
+    if baseline.get('environment') != environment():
+        print('note: baseline was recorded on a different environment:',
+              json.dumps(baseline.get('environment')))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless regression benchmarks.')
+    parser.add_argument('--filter', default='', help='only cases whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help='skip 100 MP images and 10k objects')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help='write results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before a case counts as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.005,
+                        help='smallest absolute slowdown that counts as a regression')
+    args = parser.parse_args(argv)
+
+    keyboard.is_pressed = lambda key: False
+    app = QApplication.instance() or QApplication([])
+    cases = {name: case for name, case in all_cases(args.quick).items() if args.filter in name}
+    results = {}
+    for name, setup in cases.items():
+        results[name] = measure(setup, args.repeat)
+        print('%-60s %10.4f ms' % (name, results[name]), flush=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'repeat': args.repeat,
+                       'results': results}, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print('%d regression(s) beyond %.0f%%' % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
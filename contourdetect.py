@@ -0,0 +1,306 @@
+# Turns a binary or thresholded image into rotated rectangles: one
+# cv2.minAreaRect per connected component's outer contour, then area/aspect filters and rotated
+# non-maximum suppression on whole arrays, then the boxes go into the
+# collection as the columns of one RotationRectangleArray.
+#
+#   detector = ContourDetector(threshold='otsu', min_area=50, nms_iou=0.5)
+#   detector.populate(view.drawable_object_collection, image)
+#   ...edit the image locally...
+#   detector.redetect(view.drawable_object_collection, image, (x0, y0, x1, y1))
+from typing import Optional, Tuple, Union
+import numpy as np
+import cv2
+
+from notifyobjectcollection import NotifyObjectCollection
+from objects.rotationrectanglearray import RotationRectangleArray
+from objects.regionextract import rotated_rect_corners
+
+# Detections are (N, 5) float64 rows of cx, cy, width, height, angle with
+# width >= height and angle in [0, 180), in the pixel coordinates used by
+# getShapeRegion
+Window = Tuple[int, int, int, int]
+
+def binarize(image: np.ndarray, threshold: Union[None, float, str] = None,
+             invert: bool = False) -> np.ndarray:
+    # None: any non-zero pixel is foreground; 'otsu': Otsu's threshold
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        image = cv2.cvtColor(image, code)
+    if threshold is None:
+        binary = (image != 0).view(np.uint8)
+    elif threshold == 'otsu':
+        if image.dtype != np.uint8:
+            raise ValueError("'otsu' needs an 8-bit image")
+        _, binary = cv2.threshold(image, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    else:
+        binary = (image > threshold).view(np.uint8)
+    return 1 - binary if invert else binary
+
+def contour_rects(binary: np.ndarray, offset=(0, 0)) -> Tuple[np.ndarray, np.ndarray]:
+    # (N, 5) boxes and (N, 4) x0, y0, x1, y1 pixel extents, one per connected
+    # component. RETR_CCOMP puts the outer boundary of every component on the
+    # top level, also for components inside another one's hole, so a
+    # component's box never depends on what surrounds it.
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE,
+                                           offset=tuple(offset))
+    contours = [contour for contour, links in zip(contours, hierarchy[0] if contours else ())
+                if links[3] < 0]
+    if not contours:
+        return np.zeros((0, 5)), np.zeros((0, 4), dtype=np.intp)
+    boxes = np.array([(cx, cy, w, h, a) for (cx, cy), (w, h), a in map(cv2.minAreaRect, contours)],
+                     dtype=np.float64)
+    extents = np.array([cv2.boundingRect(contour) for contour in contours], dtype=np.intp)
+    extents[:, 2:] += extents[:, :2]
+    return normalize_boxes(boxes), extents
+
+def normalize_boxes(boxes: np.ndarray) -> np.ndarray:
+    boxes = boxes.copy()
+    swap = boxes[:, 2] < boxes[:, 3]
+    boxes[swap, 2], boxes[swap, 3] = boxes[swap, 3], boxes[swap, 2].copy()
+    boxes[swap, 4] += 90
+    boxes[:, 4] %= 180
+    return boxes
+
+def filter_boxes(boxes: np.ndarray, min_area: float = 0, max_area: float = np.inf,
+                 min_aspect: float = 1.0, max_aspect: float = np.inf) -> np.ndarray:
+    # Boolean keep mask; aspect is long side over short side
+    area = boxes[:, 2] * boxes[:, 3]
+    aspect = boxes[:, 2] / np.maximum(boxes[:, 3], 1e-9)
+    return ((area >= min_area) & (area <= max_area) &
+            (aspect >= min_aspect) & (aspect <= max_aspect))
+
+def box_corners(boxes: np.ndarray) -> np.ndarray:
+    return rotated_rect_corners(boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3], boxes[:, 4])
+
+def overlapping_pairs(corners: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Index pairs (i < j in x order) whose axis-aligned bounds overlap, by a
+    # sort-and-sweep on x and a vectorized y test
+    x0, y0 = corners[..., 0].min(1), corners[..., 1].min(1)
+    x1, y1 = corners[..., 0].max(1), corners[..., 1].max(1)
+    order = np.argsort(x0, kind='stable')
+    first = np.arange(len(order)) + 1
+    stop = np.searchsorted(x0[order], x1[order], side='right')
+    counts = np.maximum(stop - first, 0)
+    i = np.repeat(np.arange(len(order)), counts)
+    j = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+    i, j = order[i], order[j]
+    hit = (y0[i] <= y1[j]) & (y0[j] <= y1[i])
+    return i[hit], j[hit]
+
+def _polygon_area(points: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Shoelace over the first counts[k] vertices of each row
+    index = np.arange(points.shape[1])
+    following = (index[None, :] + 1) % np.maximum(counts, 1)[:, None]
+    nxt = np.take_along_axis(points, following[..., None], axis=1)
+    cross = points[..., 0] * nxt[..., 1] - nxt[..., 0] * points[..., 1]
+    cross[index[None, :] >= counts[:, None]] = 0
+    return np.abs(cross.sum(1)) / 2
+
+def convex_intersection_area(subject: np.ndarray, clip: np.ndarray) -> np.ndarray:
+    # Area of each quad in `subject` clipped by the matching quad in `clip`
+    # (both (P, 4, 2), convex), Sutherland-Hodgman on all pairs at once.
+    # Clipping a quad by four half-planes leaves at most eight vertices.
+    count = len(subject)
+    points = np.zeros((count, 8, 2))
+    points[:, :4] = subject
+    counts = np.full(count, 4)
+    index = np.arange(8)
+    orientation = np.sign(_signed_area(clip))[:, None]
+    for edge in range(4):
+        a = clip[:, edge][:, None, :]
+        b = clip[:, (edge + 1) % 4][:, None, :]
+        valid = index[None, :] < counts[:, None]
+        following = (index[None, :] + 1) % np.maximum(counts, 1)[:, None]
+        nxt = np.take_along_axis(points, following[..., None], axis=1)
+        direction = b - a
+        side = lambda p: orientation * (direction[..., 0] * (p[..., 1] - a[..., 1]) -
+                                        direction[..., 1] * (p[..., 0] - a[..., 0]))
+        side_cur, side_nxt = side(points), side(nxt)
+        inside_cur, inside_nxt = side_cur >= 0, side_nxt >= 0
+        crossing = (inside_cur != inside_nxt) & valid
+        denominator = np.where(crossing, side_cur - side_nxt, 1.0)
+        t = (side_cur / denominator)[..., None]
+        candidates = np.stack([points, points + t * (nxt - points)], axis=2).reshape(count, 16, 2)
+        keep = np.stack([inside_cur & valid, crossing], axis=2).reshape(count, 16)
+        order = np.argsort(~keep, axis=1, kind='stable')[:, :8]
+        points = np.take_along_axis(candidates, order[..., None], axis=1)
+        counts = np.minimum(keep.sum(1), 8)
+    return _polygon_area(points, counts)
+
+def _signed_area(quads: np.ndarray) -> np.ndarray:
+    nxt = np.roll(quads, -1, axis=1)
+    return (quads[..., 0] * nxt[..., 1] - nxt[..., 0] * quads[..., 1]).sum(1) / 2
+
+def rotated_iou(corners_a: np.ndarray, corners_b: np.ndarray) -> np.ndarray:
+    # Elementwise IoU of two (P, 4, 2) arrays of rotated boxes
+    inter = convex_intersection_area(corners_a, corners_b)
+    union = np.abs(_signed_area(corners_a)) + np.abs(_signed_area(corners_b)) - inter
+    return inter / np.maximum(union, 1e-9)
+
+def rotated_nms(boxes: np.ndarray, iou_threshold: float,
+                scores: Optional[np.ndarray] = None) -> np.ndarray:
+    # Keep mask after greedy suppression, highest score first (default: the
+    # larger box wins). IoU is computed only for pairs whose bounds overlap,
+    # and the greedy pass only visits boxes that overlap something.
+    count = len(boxes)
+    keep = np.ones(count, dtype=bool)
+    if count < 2:
+        return keep
+    if scores is None:
+        scores = boxes[:, 2] * boxes[:, 3]
+    corners = box_corners(boxes)
+    i, j = overlapping_pairs(corners)
+    if len(i):
+        # Upper bound first: the intersection is no larger than the overlap
+        # of the two axis-aligned bounds, or than the smaller box
+        low, high = corners.min(1), corners.max(1)
+        overlap = np.prod(np.clip(np.minimum(high[i], high[j]) - np.maximum(low[i], low[j]), 0, None), axis=1)
+        area = boxes[:, 2] * boxes[:, 3]
+        bound = np.minimum(overlap, np.minimum(area[i], area[j]))
+        possible = bound > iou_threshold * np.maximum(area[i] + area[j] - bound, 1e-9)
+        i, j = i[possible], j[possible]
+    if len(i):
+        hit = rotated_iou(corners[i], corners[j]) > iou_threshold
+        i, j = i[hit], j[hit]
+    if not len(i):
+        return keep
+    rank = np.empty(count, dtype=np.intp)
+    rank[np.argsort(-scores, kind='stable')] = np.arange(count)
+    winner = np.where(rank[i] < rank[j], i, j)
+    loser = np.where(rank[i] < rank[j], j, i)
+    order = np.argsort(rank[winner], kind='stable')
+    winner, loser = winner[order], loser[order]
+    starts = np.flatnonzero(np.r_[True, winner[1:] != winner[:-1]])
+    for start, stop in zip(starts, np.r_[starts[1:], len(winner)]):
+        if keep[winner[start]]:
+            keep[loser[start:stop]] = False
+    return keep
+
+class ContourDetector:
+    # Detection options plus the store of rectangles this detector put into a
+    # collection (with their contours' pixel extents), so populate() and
+    # redetect() only ever replace the detector's own shapes
+    def __init__(self, threshold: Union[None, float, str] = None, invert: bool = False,
+                 min_area: float = 0, max_area: float = np.inf, min_aspect: float = 1.0,
+                 max_aspect: float = np.inf, nms_iou: Optional[float] = None):
+        self.threshold = threshold
+        self.invert = invert
+        self.min_area = min_area
+        self.max_area = max_area
+        self.min_aspect = min_aspect
+        self.max_aspect = max_aspect
+        self.nms_iou = nms_iou
+        self.store: Optional[RotationRectangleArray] = None
+        self._extents = np.zeros((0, 4), dtype=np.int64)  # one row per store row
+
+    def detect(self, image: np.ndarray, window: Optional[Window] = None) -> np.ndarray:
+        # Boxes for every contour in the whole image, or in the (x0, y0, x1,
+        # y1) window only, in image coordinates
+        window = window or (0, 0, image.shape[1], image.shape[0])
+        return self._select(*self._detect_window(image, window))[0]
+
+    def _detect_window(self, image: np.ndarray, window: Window):
+        x0, y0, x1, y1 = window
+        binary = binarize(image[y0:y1, x0:x1], self.threshold, self.invert)
+        return contour_rects(binary, (x0, y0))
+
+    def _select(self, boxes: np.ndarray, extents: np.ndarray):
+        keep = filter_boxes(boxes, self.min_area, self.max_area, self.min_aspect, self.max_aspect)
+        boxes, extents = boxes[keep], extents[keep]
+        if self.nms_iou is not None:
+            keep = rotated_nms(boxes, self.nms_iou)
+            boxes, extents = boxes[keep], extents[keep]
+        return boxes, extents
+
+    def populate(self, collection: NotifyObjectCollection, image: np.ndarray) -> RotationRectangleArray:
+        # Replaces this detector's previous store, in one collection change
+        boxes, extents = self._select(*self._detect_window(image, (0, 0, image.shape[1], image.shape[0])))
+        store = make_store(boxes)
+        with collection.batch_update():
+            if self.store is not None and self.store in collection:
+                collection.replace(self.store, store)
+            else:
+                collection.add(store)
+        self.store = store
+        self._extents = extents
+        return store
+
+    def redetect(self, collection: NotifyObjectCollection, image: np.ndarray,
+                 window: Window, max_grow: int = 6) -> Tuple[np.ndarray, np.ndarray]:
+        # Re-runs detection after pixels changed inside `window` only. Every
+        # contour whose extent meets the window (grown by one pixel, so pieces
+        # split off by the edit count too) is replaced, old and new alike.
+        # Shapes outside the window are replaced too when the edit joined their
+        # contour to one that meets it. Detection runs on a search area that
+        # starts at the window plus the old contours and grows until none of
+        # them is cut by its edge; with more than max_grow rounds it falls back
+        # to the whole image. NMS only compares the re-detected boxes with each
+        # other. Rows of the store are rewritten in place where possible, so
+        # only the chunks they fall in are redrawn. Returns the (added,
+        # removed) boxes.
+        height, width = image.shape[:2]
+        wx0, wy0 = max(0, window[0] - 1), max(0, window[1] - 1)
+        wx1, wy1 = min(width, window[2] + 1), min(height, window[3] + 1)
+        meets = lambda e: (e[..., 0] < wx1) & (e[..., 2] > wx0) & (e[..., 1] < wy1) & (e[..., 3] > wy0)
+
+        if self.store is None:
+            self.store = make_store(np.zeros((0, 5)))
+            collection.add(self.store)
+        # Own shapes are replaced, so their contours must be found again
+        own = self._extents
+        stale = meets(own)
+        x0, y0, x1, y1 = wx0, wy0, wx1, wy1
+        if stale.any():
+            old = own[stale]
+            x0, y0 = min(x0, old[:, 0].min()), min(y0, old[:, 1].min())
+            x1, y1 = max(x1, old[:, 2].max()), max(y1, old[:, 3].max())
+        margin = 16
+        for attempt in range(max_grow + 1):
+            boxes, found = self._detect_window(image, (x0, y0, x1, y1))
+            relevant = meets(found)
+            boxes, extents = boxes[relevant], found[relevant]
+            # On a search edge that is not the image edge: may continue outside
+            cut = (((extents[:, 0] == x0) & (x0 > 0)) | ((extents[:, 1] == y0) & (y0 > 0)) |
+                   ((extents[:, 2] == x1) & (x1 < width)) | ((extents[:, 3] == y1) & (y1 < height)))
+            if not cut.any():
+                break
+            if attempt >= max_grow - 1:
+                x0, y0, x1, y1 = 0, 0, width, height
+                continue
+            grown = extents[cut]
+            x0 = max(0, min(x0, grown[:, 0].min() - margin))
+            y0 = max(0, min(y0, grown[:, 1].min() - margin))
+            x1 = min(width, max(x1, grown[:, 2].max() + margin))
+            y1 = min(height, max(y1, grown[:, 3].max() + margin))
+            margin *= 2
+        # Shapes outside the window whose contour the edit joined to a
+        # re-detected one: inside the search area, but no longer found there
+        found = set(map(tuple, found.tolist()))
+        inside = ~stale & (own[:, 0] >= x0) & (own[:, 1] >= y0) & (own[:, 2] <= x1) & (own[:, 3] <= y1)
+        for i in np.flatnonzero(inside):
+            e = own[i]
+            if tuple(e.tolist()) not in found and ((extents[:, 0] < e[2]) & (extents[:, 2] > e[0]) &
+                                                   (extents[:, 1] < e[3]) & (extents[:, 3] > e[1])).any():
+                stale[i] = True
+        boxes, extents = self._select(boxes, extents)
+
+        store = self.store
+        stale_rows = np.flatnonzero(stale)
+        removed = np.column_stack([store.cx, store.cy, store.width, store.height, store.angle])[stale_rows]
+        reused = min(len(stale_rows), len(boxes))
+        own = own.copy()
+        if reused:
+            store.set_rows(stale_rows[:reused], *boxes[:reused].T)
+            own[stale_rows[:reused]] = extents[:reused]
+        if len(boxes) > reused:
+            store.extend(*boxes[reused:].T)
+            own = np.concatenate([own, extents[reused:]])
+        elif len(stale_rows) > reused:
+            store.remove_rows(stale_rows[reused:])
+            own = np.delete(own, stale_rows[reused:], axis=0)
+        self._extents = own
+        return boxes, removed
+
+def make_store(boxes: np.ndarray) -> RotationRectangleArray:
+    return RotationRectangleArray.from_columns(
+        dict(zip(('cx', 'cy', 'width', 'height', 'angle'), boxes.T.copy())))
@@ -0,0 +1,188 @@
+from PyQt5.QtWidgets import QGraphicsItem
+from PyQt5.QtCore import QObject, QRectF, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from collections import deque
+from typing import Iterable, Optional, Union
+import threading
+import time
+import numpy as np
+import cv2
+
+class LatestFrameBuffer:
+    # Single-slot, latest-frame-wins buffer. put() never blocks; a frame that is
+    # replaced before anyone takes it counts as dropped.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self._timestamp = 0.0
+        self.dropped = 0
+        self.received = 0
+
+    def put(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        # Returns True when the slot was empty, i.e. the consumer needs a wake-up
+        with self._lock:
+            was_empty = self._frame is None
+            if not was_empty:
+                self.dropped += 1
+            self._frame = frame
+            self._timestamp = time.perf_counter() if timestamp is None else timestamp
+            self.received += 1
+            return was_empty
+
+    def take(self):
+        # (frame, timestamp), or (None, 0.0) when nothing new arrived
+        with self._lock:
+            frame, timestamp = self._frame, self._timestamp
+            self._frame = None
+            return frame, timestamp
+
+class StreamMetrics:
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.delivered = 0
+        self.dropped = 0
+        self._deliveries = deque()
+        self._latencies = deque(maxlen=256)
+
+    def record_delivery(self):
+        now = time.perf_counter()
+        self.delivered += 1
+        self._deliveries.append(now)
+        while now - self._deliveries[0] > self.window:
+            self._deliveries.popleft()
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+
+    @property
+    def fps(self) -> float:
+        now = time.perf_counter()
+        while self._deliveries and now - self._deliveries[0] > self.window:
+            self._deliveries.popleft()
+        return len(self._deliveries) / self.window
+
+    def snapshot(self) -> dict:
+        latencies = np.array(self._latencies) * 1000.0
+        return {'delivered': self.delivered, 'dropped': self.dropped, 'fps': self.fps,
+                'latency_ms_mean': float(latencies.mean()) if len(latencies) else 0.0,
+                'latency_ms_max': float(latencies.max()) if len(latencies) else 0.0}
+
+class FrameStream(QObject):
+    # Pulls frames from a cv2.VideoCapture or any iterable of ndarrays on a
+    # worker thread into a LatestFrameBuffer. frameReady is emitted from the
+    # worker, so connected GUI slots run queued on the GUI thread.
+    frameReady = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, source: Union[cv2.VideoCapture, Iterable[np.ndarray], None] = None,
+                 parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.buffer = LatestFrameBuffer()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def push(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        # Safe from any thread
+        if self.buffer.put(frame, timestamp):
+            self.frameReady.emit()
+
+    def start(self):
+        if self._thread is not None or self.source is None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _frames(self):
+        if isinstance(self.source, cv2.VideoCapture):
+            while self.source.isOpened():
+                ok, frame = self.source.read()
+                if not ok:
+                    return
+                yield frame
+        else:
+            yield from self.source
+
+    def _run(self):
+        for frame in self._frames():
+            if self._stop.is_set():
+                break
+            self.push(frame)
+        self.finished.emit()
+
+class FrameItem(QGraphicsItem):
+    # Paints the current stream frame from a reused 32-bit buffer. Frames are
+    # converted into that buffer in place, so no pixmap or image is allocated
+    # per frame unless the frame size changes.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self._buffer: Optional[np.ndarray] = None
+        self._qimage: Optional[QImage] = None
+        self._timestamp = None
+        self.metrics: Optional[StreamMetrics] = None
+
+    def boundingRect(self):
+        if self._buffer is None:
+            return QRectF()
+        return QRectF(0, 0, self._buffer.shape[1], self._buffer.shape[0])
+
+    def setFrame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        # Returns True when the frame size changed
+        height, width = frame.shape[:2]
+        resized = self._buffer is None or self._buffer.shape[:2] != (height, width)
+        if resized:
+            self.prepareGeometryChange()
+            self._buffer = np.empty((height, width, 4), dtype=np.uint8)
+            self._qimage = QImage(self._buffer.data, width, height, self._buffer.strides[0],
+                                  QImage.Format_RGB32)
+        if frame.dtype == np.uint16:
+            frame = cv2.convertScaleAbs(frame, alpha=1 / 257)
+        if frame.ndim == 2 or frame.shape[2] == 1:
+            cv2.cvtColor(frame, cv2.COLOR_GRAY2BGRA, dst=self._buffer)
+        elif frame.shape[2] == 3:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=self._buffer)
+        else:
+            np.copyto(self._buffer, frame)
+        self._timestamp = timestamp
+        self.update()
+        return resized
+
+    def paint(self, painter, option, widget=None):
+        if self._qimage is None:
+            return
+        painter.drawImage(option.exposedRect, self._qimage, option.exposedRect)
+        if self._timestamp is not None and self.metrics is not None:
+            self.metrics.record_latency(time.perf_counter() - self._timestamp)
+            self._timestamp = None
+
+def synthetic_frames(width: int = 640, height: int = 480, count: Optional[int] = None,
+                     fps: Optional[float] = None, channels: int = 1):
+    # Moving-bar test pattern, optionally paced to `fps`
+    x = np.arange(width, dtype=np.int32)
+    index = 0
+    next_time = time.perf_counter()
+    while count is None or index < count:
+        row = ((x + index * 4) % 256).astype(np.uint8)
+        frame = np.repeat(row[None, :], height, axis=0)
+        frame[:, (index * 8) % width:(index * 8) % width + 16] = 255
+        if channels == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        if fps:
+            next_time += 1.0 / fps
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield frame
+        index += 1
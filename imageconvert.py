@@ -0,0 +1,65 @@
+from PyQt5.QtGui import QImage
+from PyQt5 import sip
+import numpy as np
+import cv2
+import sys
+
+class NDArrayImage(QImage):
+    # QImage sharing memory with a NumPy array. The array is kept on the image,
+    # so the buffer lives as long as this Python object. Implicitly shared
+    # C++ copies (QImage(image), signal arguments) do not hold the array;
+    # convert those with .copy() or QPixmap.fromImage while this object lives.
+    def __init__(self, array: np.ndarray, image_format):
+        height, width = array.shape[:2]
+        # Pointer form so row-strided views (crops) wrap without a copy
+        super().__init__(sip.voidptr(array.ctypes.data), width, height,
+                         array.strides[0], image_format)
+        self.array = array
+
+def qimage_format(array: np.ndarray):
+    # QImage format that matches the array's memory layout, or None
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    if array.dtype == np.uint8:
+        if channels == 1:
+            return QImage.Format_Grayscale8
+        if channels == 3:
+            return QImage.Format_BGR888
+        if channels == 4 and sys.byteorder == 'little':
+            # ARGB32 is stored as B, G, R, A bytes on little-endian machines
+            return QImage.Format_ARGB32
+    elif array.dtype == np.uint16 and channels == 1:
+        return QImage.Format_Grayscale16
+    return None
+
+def ndarray_to_qimage(array: np.ndarray) -> NDArrayImage:
+    # Wraps uint8 gray/BGR/BGRA and uint16 gray arrays without copying. Only
+    # arrays whose pixels are not packed within a row are copied first.
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+    if array.ndim not in (2, 3):
+        raise ValueError("expected a 2-D gray or 3-D colour image, got shape %s" % (array.shape,))
+    image_format = qimage_format(array)
+    if image_format is None:
+        raise TypeError("unsupported image layout: dtype %s, shape %s" % (array.dtype, array.shape))
+    pixel_bytes = array.itemsize * (1 if array.ndim == 2 else array.shape[2])
+    packed = (array.strides[1] == pixel_bytes and
+              (array.ndim == 2 or array.strides[2] == array.itemsize) and
+              array.strides[0] >= array.shape[1] * pixel_bytes)
+    if not packed:
+        array = np.ascontiguousarray(array)
+    return NDArrayImage(array, image_format)
+
+def ndarray_to_display_qimage(array: np.ndarray) -> NDArrayImage:
+    # 32-bit copy of a uint8 gray/BGR/BGRA array, the layout raster pixmaps
+    # use, so QPixmap.fromImage is a plain copy instead of a conversion. Meant
+    # for worker threads preparing a large frame for the GUI thread.
+    if array.dtype != np.uint8:
+        raise TypeError("display images need uint8 data, got %s" % array.dtype)
+    if array.ndim == 3 and array.shape[2] == 4:
+        # Keeps its alpha, like ndarray_to_qimage
+        return NDArrayImage(np.ascontiguousarray(array), QImage.Format_ARGB32)
+    height, width = array.shape[:2]
+    buffer = np.empty((height, width, 4), dtype=np.uint8)
+    code = cv2.COLOR_BGR2BGRA if array.ndim == 3 and array.shape[2] == 3 else cv2.COLOR_GRAY2BGRA
+    cv2.cvtColor(array, code, dst=buffer)
+    return NDArrayImage(buffer, QImage.Format_RGB32)
@@ -0,0 +1,105 @@
+from PyQt5.QtWidgets import QGraphicsPixmapItem, QGraphicsScene
+from PyQt5 import sip
+
+from typing import List
+import threading
+
+from objects.idrawableobject import InteractDrawableObject
+from notifyobjectcollection import CollectionChange, NotifyObjectCollection
+from spatialindex import SpatialGridIndex
+
+class ImageDocument:
+    # What several ImageViewers can share: one scene holding the image item
+    # (pixmap, tiled pyramid or stream frame), the decoded image and the shape
+    # collection with its spatial index. Each view keeps its own zoom, pan,
+    # hover and drag state. Shape changes are indexed once here and then
+    # reported to every view, which repaints only where its viewport shows them.
+    def __init__(self):
+        self.scene = QGraphicsScene()
+        self.pixmap_item = QGraphicsPixmapItem()
+        self.scene.addItem(self.pixmap_item)
+        # QImage behind the pixmap; see ImageViewer._showPixmap
+        self.shown_image = None
+        # Array or ImageSource for crops, tracking and saving
+        self.image = None
+        self.empty = True
+        self.tiled_item = None
+        self.frame_item = None
+        # Set while a reduced preview stands in for the image being loaded
+        self.preview_scale = None
+        self.load_job = None
+        self.lock = threading.Lock()
+
+        self.collection: NotifyObjectCollection[InteractDrawableObject] = NotifyObjectCollection()
+        self.collection.changed_collection = self._changed_collection
+        self.collection.cleared_collection = self._cleared_collection
+        self.object_index = SpatialGridIndex()
+        self._views: List = []
+
+    @property
+    def views(self) -> List:
+        # Views whose widgets still exist
+        self._views = [view for view in self._views if not sip.isdeleted(view)]
+        return list(self._views)
+
+    def add_view(self, view):
+        if view not in self._views:
+            self._views.append(view)
+            for item in self.collection:
+                if item.display is None:
+                    item.display = view
+
+    def remove_view(self, view):
+        if view in self._views:
+            self._views.remove(view)
+        fallback = self._views[0] if self._views else None
+        for item in self.collection:
+            if item.display is view:
+                item.display = fallback
+
+    def _default_display(self):
+        # Shapes set their cursor on, and scale their fallback drawing to,
+        # their display; views take it over when the mouse reaches the shape
+        return self._views[0] if self._views else None
+
+    def _changed_collection(self, sender, change: CollectionChange):
+        # One coalesced change: a single index pass for all views
+        removed_bounds = [self.object_index.bounds_of(item) for item in change.removed]
+        for item in change.removed:
+            item.geometry_changed = None
+        display = self._default_display()
+        for item in change.added:
+            item.display = display
+            item.geometry_changed = self._geometry_changed
+        tail = len(sender) - len(change.added)
+        if not change.reordered and all(sender[tail + i] is item for i, item in enumerate(change.added)):
+            # Survivors keep their order and the new items come last, so the
+            # index order still follows collection order without a rebuild
+            for item in change.removed:
+                self.object_index.remove(item)
+            for item in change.added:
+                self.object_index.insert(item)
+        else:
+            # Index order must follow collection order
+            self.object_index.rebuild(sender)
+        for view in self.views:
+            view._collection_changed(change, removed_bounds)
+
+    def _cleared_collection(self, sender, _):
+        self.object_index.clear()
+        for view in self.views:
+            view._collection_cleared()
+
+    def _geometry_changed(self, item, dirty=None):
+        old_bounds = self.object_index.bounds_of(item)
+        if dirty is not None:
+            # Only part of the item changed: views repaint just that part, and
+            # the index keeps the item's bounds unless the part moved outside
+            if old_bounds is None or not old_bounds.contains(dirty[1]):
+                self.object_index.update(item)
+            old_bounds, new_bounds = dirty
+        else:
+            self.object_index.update(item)
+            new_bounds = self.object_index.bounds_of(item)
+        for view in self.views:
+            view._object_geometry_changed(item, old_bounds, new_bounds)
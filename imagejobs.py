@@ -0,0 +1,228 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QPainter
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+import itertools
+import os
+import threading
+import numpy as np
+import cv2
+
+from imagesource import ArraySource, ImageSource, decode_image, decoded_by_opencv, open_image_source
+from imageconvert import ndarray_to_display_qimage, ndarray_to_qimage
+from objects.drawbatch import DrawBatch
+
+class JobCancelled(Exception):
+    pass
+
+class ImageJob:
+    # Handle for one background load or save. Cancelling is checked between
+    # steps (file chunks, decode, render, encode); an OpenCV decode or encode
+    # already running finishes, but its result is dropped.
+    def __init__(self, job_id: int, path: str):
+        self.id = job_id
+        self.path = path
+        self.future: Optional[Future] = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def wait(self, timeout: Optional[float] = None):
+        # Result of the job, or None when it was cancelled or failed
+        return self.future.result(timeout)
+
+class ImageJobRunner(QObject):
+    # Runs jobs on a small thread pool. Signals are emitted from the workers,
+    # so connected GUI slots run queued on the GUI thread; without an event
+    # loop (scripts, headless checks) ImageJob.wait() gives the result.
+    progress = pyqtSignal(int, float)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+    _ids = itertools.count(1)
+
+    def __init__(self, workers: int = 2, chunk_size: int = 4 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.workers = workers
+        # File bytes are read and written in chunks of this size, so progress
+        # and cancellation also cover the I/O of large files
+        self.chunk_size = chunk_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _submit(self, path: str, run) -> ImageJob:
+        job = ImageJob(next(self._ids), path)
+        job.future = self._get_executor().submit(self._run, job, run)
+        return job
+
+    def _run(self, job: ImageJob, run):
+        try:
+            job.check()
+            return run(job)
+        except JobCancelled:
+            self.cancelled.emit(job.id)
+        except Exception as e:
+            self.failed.emit(job.id, str(e))
+        return None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+class ImageLoader(ImageJobRunner):
+    # Reads and decodes image files off the GUI thread. JPEG files first get
+    # a preview decoded at 1/2, 1/4 or 1/8 size (libjpeg scales while
+    # decoding, so this costs a fraction of the full decode); other formats
+    # decode the whole frame either way and go straight to loaded.
+    # previewReady carries the preview and its scale to full-frame pixels;
+    # loaded carries the ImageSource and, for uint8 frames below
+    # display_pixels, a 32-bit QImage ready for QPixmap.fromImage (else None).
+    previewReady = pyqtSignal(int, object, float)
+    loaded = pyqtSignal(int, object, object)
+
+    REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4}
+
+    def __init__(self, workers: int = 2, preview_pixels: int = 2 * 1000 * 1000,
+                 preview_extensions=('.jpg', '.jpeg', '.jpe'), parent=None):
+        super().__init__(workers, parent=parent)
+        # Frames up to this many pixels are shown without a preview
+        self.preview_pixels = preview_pixels
+        self.preview_extensions = preview_extensions
+        self.display_pixels = 64 * 1000 * 1000
+
+    def load(self, path: str) -> ImageJob:
+        return self._submit(path, self._load)
+
+    def _load(self, job: ImageJob) -> ImageSource:
+        if not decoded_by_opencv(job.path):
+            # Memory-mapped or tiled: opening is cheap, pixels load on demand
+            source = open_image_source(job.path)
+            job.check()
+            self.progress.emit(job.id, 1.0)
+            self.loaded.emit(job.id, source, None)
+            return source
+        data = self._read(job)
+        if job.path.lower().endswith(self.preview_extensions):
+            self._preview(job, data)
+        image = decode_image(data, job.path)
+        job.check()
+        display = None
+        if image.dtype == np.uint8 and image.shape[0] * image.shape[1] < self.display_pixels:
+            # Converted here so the GUI thread only copies it into a pixmap
+            display = ndarray_to_display_qimage(image)
+            job.check()
+        source = ArraySource(image)
+        self.progress.emit(job.id, 1.0)
+        self.loaded.emit(job.id, source, display)
+        return source
+
+    def _read(self, job: ImageJob) -> np.ndarray:
+        # The whole file in one buffer, decoded from memory afterwards; reading
+        # covers the first half of the progress range
+        size = os.path.getsize(job.path)
+        data = np.empty(size, dtype=np.uint8)
+        with open(job.path, 'rb') as f:
+            done = 0
+            while done < size:
+                job.check()
+                read = f.readinto(memoryview(data)[done:done + self.chunk_size])
+                if not read:
+                    break
+                done += read
+                self.progress.emit(job.id, 0.5 * done / size)
+        return data[:done]
+
+    def _preview(self, job: ImageJob, data: np.ndarray):
+        # Largest preview up to preview_pixels, judged from a 1/8 decode,
+        # which is nearly free for JPEG
+        smallest = cv2.imdecode(data, cv2.IMREAD_REDUCED_COLOR_8)
+        if smallest is None:
+            return
+        full_pixels = smallest.shape[0] * smallest.shape[1] * 64
+        if full_pixels <= self.preview_pixels:
+            return
+        factor = next((f for f in (2, 4) if full_pixels / f ** 2 <= self.preview_pixels), 8)
+        job.check()
+        preview = smallest if factor == 8 else cv2.imdecode(data, self.REDUCED_FLAGS[factor])
+        job.check()
+        self.progress.emit(job.id, 0.6)
+        self.previewReady.emit(job.id, preview, float(factor))
+
+class ImageSaver(ImageJobRunner):
+    # Encodes and writes images off the GUI thread. The format follows the
+    # file extension. Overlays come as a DrawBatch filled on the GUI thread
+    # and are painted at the image's native resolution on the worker. The file
+    # is written under a temporary name and renamed at the end, so a cancelled
+    # or failed save leaves any previous file untouched.
+    saved = pyqtSignal(int, str)
+
+    def save(self, path: str, image, overlays: Optional[DrawBatch] = None) -> ImageJob:
+        return self._submit(path, lambda job: self._save(job, image, overlays))
+
+    def _save(self, job: ImageJob, image, overlays: Optional[DrawBatch]) -> str:
+        array = np.asarray(image)
+        if overlays is not None:
+            array = render_overlays(array, overlays)
+            job.check()
+        self.progress.emit(job.id, 0.3)
+        extension = os.path.splitext(job.path)[1] or '.png'
+        ok, encoded = cv2.imencode(extension, array)
+        if not ok:
+            raise IOError("cannot encode image as %s" % extension)
+        job.check()
+        self.progress.emit(job.id, 0.5)
+        self._write(job, encoded.reshape(-1))
+        self.progress.emit(job.id, 1.0)
+        self.saved.emit(job.id, job.path)
+        return job.path
+
+    def _write(self, job: ImageJob, data: np.ndarray):
+        temporary = job.path + '.part'
+        try:
+            with open(temporary, 'wb') as f:
+                for start in range(0, len(data), self.chunk_size):
+                    job.check()
+                    f.write(memoryview(data)[start:start + self.chunk_size])
+                    self.progress.emit(job.id, 0.5 + 0.5 * min(len(data), start + self.chunk_size) / len(data))
+            job.check()
+            os.replace(temporary, job.path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+def render_overlays(array: np.ndarray, overlays: DrawBatch) -> np.ndarray:
+    # BGR copy of `array` with the batch painted on it, one scene unit per
+    # pixel. 16-bit frames are scaled to 8 bits the way the viewer shows them.
+    if array.dtype == np.uint16:
+        array = cv2.convertScaleAbs(array, alpha=1 / 257)
+    if array.ndim == 2 or array.shape[2] == 1:
+        canvas = cv2.cvtColor(array, cv2.COLOR_GRAY2BGRA)
+    elif array.shape[2] == 3:
+        canvas = cv2.cvtColor(array, cv2.COLOR_BGR2BGRA)
+    else:
+        canvas = array.copy()
+    image = ndarray_to_qimage(canvas)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing, not overlays.dense)
+    overlays.flush(painter)
+    painter.end()
+    return cv2.cvtColor(canvas, cv2.COLOR_BGRA2BGR)
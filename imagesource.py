@@ -0,0 +1,162 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import os
+import threading
+import numpy as np
+import cv2
+
+from imageconvert import qimage_format
+
+try:
+    import tifffile
+except ImportError:  # tiled TIFF support is optional
+    tifffile = None
+
+class ImageSource(ABC):
+    # Read-only image that hands out windows on demand. Sources index like a
+    # 2-D ndarray (source[y0:y1, x0:x1]) and expose shape/dtype, so the ROI
+    # extractors and the tiled viewer accept them in place of a full frame.
+    shape: Tuple[int, ...] = ()
+    dtype = np.dtype(np.uint8)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @abstractmethod
+    def read(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        pass
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple) or len(key) != 2 or not all(isinstance(k, slice) for k in key):
+            raise IndexError("image sources only support [y0:y1, x0:x1] windows")
+        rows, columns = key
+        y0, y1, ystep = rows.indices(self.shape[0])
+        x0, x1, xstep = columns.indices(self.shape[1])
+        if ystep != 1 or xstep != 1:
+            raise IndexError("image source windows must be contiguous")
+        return self.read(x0, y0, max(x0, x1), max(y0, y1))
+
+    def __array__(self, dtype=None, copy=None):
+        # Whole frame; only for callers that really need every pixel
+        array = self.read(0, 0, self.shape[1], self.shape[0])
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+class ArraySource(ImageSource):
+    # In-memory or np.memmap array; windows are views, so reading a window of a
+    # memmap only faults in the pages under it
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self.shape = array.shape
+        self.dtype = array.dtype
+
+    def read(self, x0, y0, x1, y1):
+        return self.array[y0:y1, x0:x1]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.array if dtype is None else self.array.astype(dtype, copy=False)
+
+class MemmapSource(ArraySource):
+    # .npy files map their own header; raw files need shape and dtype
+    def __init__(self, path: str, shape: Optional[Tuple[int, ...]] = None,
+                 dtype=np.uint8, offset: int = 0):
+        if path.lower().endswith('.npy'):
+            array = np.load(path, mmap_mode='r')
+        else:
+            if shape is None:
+                raise ValueError("raw image files need an explicit shape")
+            array = np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape), offset=offset)
+        super().__init__(array)
+        self.path = path
+
+class TiffSource(ImageSource):
+    # First page of a TIFF. Tiled pages decode only the tiles under a window,
+    # uncompressed strip pages are memory-mapped, anything else is decoded once.
+    def __init__(self, path: str):
+        if tifffile is None:
+            raise ImportError("TiffSource requires the tifffile package")
+        self.path = path
+        self._tiff = tifffile.TiffFile(path)
+        self._page = page = self._tiff.pages[0]
+        self._lock = threading.Lock()
+        self._rgb = page.photometric == tifffile.PHOTOMETRIC.RGB and page.samplesperpixel >= 3
+        self.shape = tuple(page.shape)
+        self.dtype = page.dtype
+        self._array: Optional[np.ndarray] = None
+        if page.is_tiled:
+            self._tiles_across = -(-page.imagewidth // page.tilewidth)
+        elif page.is_contiguous is not None and page.compression == 1:
+            self._array = self._tiff.asarray(key=0, out='memmap')
+        else:
+            self._array = page.asarray()
+
+    def read(self, x0, y0, x1, y1):
+        if self._array is not None:
+            window = self._array[y0:y1, x0:x1]
+        else:
+            window = self._read_tiles(x0, y0, x1, y1)
+        if self._rgb:
+            # Keep the BGR order every other frame in the viewer uses
+            window = window[..., [2, 1, 0] + list(range(3, window.shape[2]))]
+        return window
+
+    def _read_tiles(self, x0, y0, x1, y1):
+        page = self._page
+        tile_w, tile_h = page.tilewidth, page.tilelength
+        window = np.zeros((y1 - y0, x1 - x0) + self.shape[2:], dtype=self.dtype)
+        for ty in range(y0 // tile_h, -(-y1 // tile_h)):
+            for tx in range(x0 // tile_w, -(-x1 // tile_w)):
+                index = ty * self._tiles_across + tx
+                with self._lock:
+                    handle = self._tiff.filehandle
+                    handle.seek(page.dataoffsets[index])
+                    data = handle.read(page.databytecounts[index])
+                segment = page.decode(data, index, jpegtables=page.jpegtables)[0]
+                if segment is None:
+                    continue
+                tile = segment.reshape((tile_h, tile_w) + self.shape[2:])
+                sx0, sy0 = tx * tile_w, ty * tile_h
+                ix0, iy0 = max(x0, sx0), max(y0, sy0)
+                ix1, iy1 = min(x1, sx0 + tile_w), min(y1, sy0 + tile_h)
+                window[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = \
+                    tile[iy0 - sy0:iy1 - sy0, ix0 - sx0:ix1 - sx0]
+        return window
+
+    def close(self):
+        self._tiff.close()
+
+def as_image_source(image) -> ImageSource:
+    if isinstance(image, ImageSource):
+        return image
+    return ArraySource(np.asarray(image))
+
+def decoded_by_opencv(path: str, shape: Optional[Tuple[int, ...]] = None) -> bool:
+    # False for the files open_image_source maps or reads lazily
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy' or shape is not None:
+        return False
+    return not (extension in ('.tif', '.tiff') and tifffile is not None)
+
+def decode_image(data: np.ndarray, path: str = '') -> np.ndarray:
+    # Encoded file bytes to an array the viewer can show
+    image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise IOError("cannot read image %s" % path)
+    if qimage_format(image) is None:
+        # e.g. 16-bit colour: fall back to 8-bit BGR
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    return image
+
+def open_image_source(path: str, shape: Optional[Tuple[int, ...]] = None,
+                      dtype=np.uint8, offset: int = 0) -> ImageSource:
+    # .npy and raw files are memory-mapped, TIFF goes through tifffile when it
+    # is installed, everything else is decoded by OpenCV
+    if not decoded_by_opencv(path, shape):
+        if shape is None and path.lower().endswith(('.tif', '.tiff')):
+            return TiffSource(path)
+        return MemmapSource(path, shape, dtype, offset)
+    return ArraySource(decode_image(np.fromfile(path, dtype=np.uint8), path))
@@ -2,45 +2,59 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+import os
 import sys
+import json
 import keyboard
 import numpy as np
-import threading
 import datetime
-import cv2
+import math
+import time
 
 #Part2: Import the drawable object interface
 from objects.idrawableobject import InteractDrawableObject
 from objects.rorationrectangle import RotationRectangle
+from objects.ellipse import Ellipse
+from objects.drawbatch import DrawBatch
 from notifyobjectcollection import NotifyObjectCollection
+from spatialindex import SpatialGridIndex
+from repaintstats import RepaintStats
+from imageconvert import ndarray_to_qimage
+from framestream import FrameItem, FrameStream, StreamMetrics
+from tiledimage import ImagePyramid, TiledImageItem
+from imagesource import ImageSource
+from imagejobs import ImageLoader, ImageSaver
+from imagedocument import ImageDocument
+from annotationio import export_annotations_json, load_annotations, save_annotations
+from roipreview import RoiPreview
+from roitracker import RoiTracker
+from perftrace import tracer
 
 class ImageViewer(QGraphicsView):
     mouseClicked = pyqtSignal(QPointF)
     mouseMoving = pyqtSignal(QPointF)
     mouseReleased = pyqtSignal(QPointF)
     clicked = pyqtSignal(str)
-    def __init__(self, parent=None, name = None):
+    # Emitted with the object after each geometry change, e.g. while dragging
+    objectGeometryChanged = pyqtSignal(object)
+    def __init__(self, parent=None, name = None, document=None):
         super(ImageViewer, self).__init__(parent)
         self.name = name
         self.initBegin()
 
-        self._empty = True
         self._zoom = 0 
-        # Item
-        self._pixmapImage = QGraphicsPixmapItem()
-        self.image = None
-        # Scenes
-        self._scene = QGraphicsScene()
-        self._scene.addItem(self._pixmapImage)
-
-        self.setScene(self._scene)
+        # Image, scene and shapes live in the document, which other views may share
+        self.document = None
 
         self.popMenu = QMenu(self)
         self.saveAction = QAction('Save Image', self)
+        self.saveOverlaysAction = QAction('Save Image With Shapes', self)
         self.fitInViewAction = QAction('Fit In View', self)
         self.popMenu.addAction(self.saveAction)
+        self.popMenu.addAction(self.saveOverlaysAction)
         self.popMenu.addAction(self.fitInViewAction)
         self.saveAction.triggered.connect(lambda: self.save_pixmapImage())
+        self.saveOverlaysAction.triggered.connect(lambda: self.save_pixmapImage(overlays=True))
         self.fitInViewAction.triggered.connect(lambda: self.fitInView())
         self.isDrag = False
 
@@ -50,11 +64,93 @@ class ImageViewer(QGraphicsView):
 
         self.isPositionSelected = False
         self.currentObject = None
-        self.locker = threading.Lock()
 
-        # Part2: Drawable object collection
-        self.drawable_object_collection : NotifyObjectCollection[InteractDrawableObject] = NotifyObjectCollection()
-        self.drawable_object_collection.added_item = self.added_item_object_collection
+        # Part2: Drawable objects come from the document; hover is per view
+        self._hovered_objects = set()
+        self._draw_batch = DrawBatch()
+        # Above this many visible objects, overlays drop antialiasing, outlines
+        # thin to 1 px and only hovered objects get handles
+        self.dense_object_count = 1000
+        # Scene area waiting for a repaint; _dirty_full means the whole viewport
+        self._dirty_rect = QRectF()
+        self._dirty_full = False
+        self.repaint_stats = RepaintStats()
+
+        # Streaming mode: frames go to the document's FrameItem instead of the
+        # pixmap item
+        self._stream = None
+        self.stream_metrics = StreamMetrics()
+
+        # Drag moves are applied at most once per display frame; the newest
+        # pending position wins
+        self.coalesce_drag_moves = True
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        self.frame_interval = 1.0 / (refresh_rate if refresh_rate > 0 else 60.0)
+        self._pending_move = None
+        self._last_move_applied = 0.0
+        self._move_timer = QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.setTimerType(Qt.PreciseTimer)
+        # Looked up per call so instrumentation hooks see timer-driven moves
+        self._move_timer.timeout.connect(lambda: self._apply_pending_move())
+        # Views that did not cause a shape edit (another view of the document,
+        # or code) flush their dirty area once control returns to the event loop
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_dirty)
+
+        # Arrays with at least this many pixels are shown through a tiled
+        # pyramid instead of one full-resolution pixmap
+        self.tiled_pixel_threshold = 64 * 1000 * 1000
+        self.tile_memory_budget = 256 * 1024 * 1024
+
+        # Tracking mode: each new frame moves the tracked rectangles
+        self.tracker = None
+        self._tracked_objects = []
+        self._applying_tracked_poses = False
+
+        # Background file I/O: loadImage shows a reduced preview first when the
+        # format allows it, then swaps in the full frame; only the newest load
+        # is shown
+        self.loader = ImageLoader(parent=self)
+        self.loader.previewReady.connect(self._show_load_preview)
+        self.loader.loaded.connect(self._finish_load)
+        self.saver = ImageSaver(parent=self)
+
+        self.setDocument(document if document is not None else ImageDocument())
+
+    @property
+    def image(self):
+        return self.document.image
+
+    @image.setter
+    def image(self, value):
+        self.document.image = value
+
+    @property
+    def drawable_object_collection(self) -> NotifyObjectCollection[InteractDrawableObject]:
+        return self.document.collection
+
+    @property
+    def object_index(self) -> SpatialGridIndex:
+        return self.document.object_index
+
+    def setDocument(self, document: ImageDocument):
+        # Shows `document` here; zoom, pan, hover and drag state stay per view
+        if self.document is not None:
+            self.stopTracking()
+            self.detachStream()
+            self._hovered_objects.clear()
+            self.currentObject = None
+            self._pending_move = None
+            self.document.remove_view(self)
+        self.document = document
+        document.add_view(self)
+        self.setScene(document.scene)
+        if self.autoFit:
+            self.fitInView()
+        self.invalidate()
 
     @property
     def autoFit(self): return self._autoFit
@@ -77,17 +173,93 @@ class ImageViewer(QGraphicsView):
         self.setRenderHint(QPainter.HighQualityAntialiasing, True)
         self.setRenderHint(QPainter.TextAntialiasing, True)
 
-    # Part2: Set display for object
-    def added_item_object_collection(self, sender, item):
-        item.display = self
+    # Part2: the document indexes collection changes once and reports them
+    # to each of its views
+    def _collection_changed(self, change, removed_bounds):
+        # One coalesced change: a single repaint. A reorder changes which
+        # shape is drawn on top anywhere.
+        large = change.reordered or len(change.added) + len(change.removed) > self.dense_object_count
+        for item, bounds in zip(change.removed, removed_bounds):
+            if not large:
+                self._mark_dirty(bounds)
+            self._hovered_objects.discard(item)
+            if self.currentObject is item:
+                self.currentObject = None
+                self._pending_move = None
+        if large:
+            self._dirty_full = True
+        else:
+            for item in change.added:
+                self._mark_dirty(self.object_index.bounds_of(item))
+        self._flush_dirty()
+
+    def _collection_cleared(self):
+        self._hovered_objects.clear()
+        self.invalidate()
+
+    def _object_geometry_changed(self, item, old_bounds, new_bounds):
+        if self.tracker is not None and not self._applying_tracked_poses:
+            # Edited by hand: track from the new pose from the next frame on
+            self.tracker.reset(item)
+        self._mark_dirty(old_bounds)
+        self._mark_dirty(new_bounds)
+        if item is not self.currentObject and not self._applying_tracked_poses:
+            self._flush_timer.start(0)
+        self.objectGeometryChanged.emit(item)
         
-    def save_pixmapImage(self):
-        try:
-            if self._empty is False:
-                dt_format = datetime.datetime.now().timestamp()
-                QPixmap.save(self._pixmapImage.pixmap(), f"save_image_{dt_format}.png", "JPG")
-        except Exception as e:
-            print(e)
+    def save_pixmapImage(self, overlays=False):
+        dt_format = datetime.datetime.now().timestamp()
+        self.saveImage(f"save_image_{dt_format}.png", overlays)
+
+    def loadImage(self, path):
+        # Returns the ImageJob; progress, failure and cancellation are reported
+        # through self.loader's signals. A newer load cancels this one.
+        if self.document.load_job is not None:
+            self.document.load_job.cancel()
+        self.loader.display_pixels = self.tiled_pixel_threshold
+        self.document.load_job = self.loader.load(path)
+        return self.document.load_job
+
+    def _show_load_preview(self, job_id, preview, scale):
+        if self.document.load_job is None or job_id != self.document.load_job.id:
+            return
+        with self.document.lock:
+            self._removeTiledImage()
+            # Crops and tracking wait for the full frame
+            self.image = None
+            self.document.empty = False
+            self.document.preview_scale = scale
+            self._showPixmap(ndarray_to_qimage(preview))
+            self.document.pixmap_item.setScale(scale)
+            self._image_changed()
+
+    def _cancelLoad(self):
+        # Anything shown directly replaces a load still in flight
+        if self.document.load_job is not None:
+            self.document.load_job.cancel()
+            self.document.load_job = None
+        self.document.preview_scale = None
+        self.document.pixmap_item.setScale(1.0)
+
+    def _finish_load(self, job_id, source, display):
+        if self.document.load_job is None or job_id != self.document.load_job.id:
+            return
+        self.document.load_job = None
+        self.setImage(source, display)
+
+    def saveImage(self, path, overlays=False):
+        # Raw pixels, or with every shape's outline painted at native
+        # resolution. Shapes are collected here, encoding and writing happen
+        # on self.saver's workers. Returns the ImageJob, or None without an image.
+        if self.image is None:
+            return None
+        batch = None
+        if overlays:
+            batch = DrawBatch(1.0, QRectF(0, 0, self.image.shape[1], self.image.shape[0]))
+            batch.draw_handles = False
+            for drawingObject in self.drawable_object_collection:
+                drawingObject.draw_batch(batch)
+        return self.saver.save(path, self.image, batch)
 
     def _save_image_result(self, path):
         pixmap = QPixmap(self.viewport().size())
@@ -95,22 +267,156 @@ class ImageViewer(QGraphicsView):
         pixmap.save(path)
 
     def hasImage(self):
-        return not self._empty
+        return not self.document.empty
 
-    def setImage(self, image=None):
-        with self.locker:
+    def setImage(self, image=None, display=None):
+        # `display` optionally carries the array already converted to a QImage
+        with self.document.lock:
+            self._removeTiledImage()
+            self._cancelLoad()
+            if isinstance(image, (np.ndarray, ImageSource)):
+                # Keep the array or source for crops; the QImage wraps the same memory
+                self.image = image
+                if self.tracker is not None and isinstance(image, np.ndarray):
+                    self._submit_tracking(image)
+                if image.shape[0] * image.shape[1] >= self.tiled_pixel_threshold:
+                    self._setTiledImage(image)
+                    return
+                image = display if display is not None else ndarray_to_qimage(np.asarray(image))
             if image is not None:
-                self._empty = False
-                self._pixmapImage.setPixmap(QPixmap.fromImage(image))
-                if self.autoFit:
-                    self.fitInView()
-                self.invalidate()
+                self.document.empty = False
+                self._showPixmap(image)
+                self._image_changed()
             else:
-                self._empty = True
-                self._pixmapImage.setPixmap(QPixmap())
+                self.document.empty = True
+                self._showPixmap(None)
+
+    def _showPixmap(self, image):
+        # Raster pixmaps made from a 32-bit image share its pixels instead of
+        # copying them, so the image is kept for as long as it is shown
+        self.document.shown_image = image
+        self.document.pixmap_item.setPixmap(QPixmap.fromImage(image) if image is not None else QPixmap())
+
+    def _setTiledImage(self, image):
+        self.document.empty = False
+        self._showPixmap(None)
+        pyramid = ImagePyramid(image, memory_budget=self.tile_memory_budget)
+        self.document.tiled_item = TiledImageItem(pyramid)
+        self.document.tiled_item.setZValue(self.document.pixmap_item.zValue())
+        self.document.scene.addItem(self.document.tiled_item)
+        self._image_changed()
+
+    def _image_changed(self):
+        # The image is shared, so every view of the document refits and repaints
+        for view in self.document.views:
+            if view.autoFit:
+                view.fitInView()
+            view.invalidate()
+
+    def _removeTiledImage(self):
+        if self.document.tiled_item is None:
+            return
+        self.document.scene.removeItem(self.document.tiled_item)
+        self.document.tiled_item.pyramid.shutdown()
+        self.document.tiled_item = None
+
+    def attachStream(self, stream: FrameStream):
+        # One stream per document: it feeds every view
+        for view in self.document.views:
+            view.detachStream()
+        self._stream = stream
+        self.stream_metrics.reset()
+        self.document.frame_item = FrameItem()
+        self.document.frame_item.metrics = self.stream_metrics
+        self.document.scene.addItem(self.document.frame_item)
+        self._removeTiledImage()
+        self._cancelLoad()
+        self._showPixmap(None)
+        stream.frameReady.connect(self._deliver_stream_frame)
+
+    def detachStream(self):
+        if self._stream is None:
+            return
+        self._stream.frameReady.disconnect(self._deliver_stream_frame)
+        self.document.scene.removeItem(self.document.frame_item)
+        self._stream = None
+        self.document.frame_item = None
+
+    def _deliver_stream_frame(self):
+        frame, timestamp = self._stream.buffer.take()
+        if frame is not None:
+            self.showFrame(frame, timestamp)
+
+    def showFrame(self, frame, timestamp=None):
+        # GUI thread only; feed other threads through a FrameStream
+        self.image = frame
+        self.document.empty = False
+        if self.tracker is not None:
+            self._submit_tracking(frame)
+        if self.document.frame_item.setFrame(frame, timestamp):
+            for view in self.document.views:
+                if view.autoFit:
+                    view.fitInView()
+        self.stream_metrics.dropped = self._stream.buffer.dropped
+        self.stream_metrics.record_delivery()
+
+    def startTracking(self, items=None, **options):
+        # Follow `items` (default: every RotationRectangle and Ellipse in the collection)
+        # through the frames given to setImage/showFrame; options go to
+        # RoiTracker. Templates come from the current image.
+        self.stopTracking()
+        if items is None:
+            items = [item for item in self.drawable_object_collection
+                     if isinstance(item, (RotationRectangle, Ellipse))]
+        self._tracked_objects = list(items)
+        self.tracker = RoiTracker(parent=self, **options)
+        self.tracker.posesReady.connect(self._apply_tracked_poses)
+        if isinstance(self.image, np.ndarray):
+            self._submit_tracking(self.image)
+
+    def stopTracking(self):
+        if self.tracker is None:
+            return
+        self.tracker.posesReady.disconnect(self._apply_tracked_poses)
+        self.tracker.stop()
+        self.tracker = None
+        self._tracked_objects = []
+
+    def _submit_tracking(self, frame):
+        # Shapes being dragged sit the frame out
+        poses = {item: (item.center.x(), item.center.y(), item.width, item.height, item.angle)
+                 for item in self._tracked_objects
+                 if item in self.drawable_object_collection and item is not self.currentObject}
+        self.tracker.submit(frame, poses)
+
+    def _apply_tracked_poses(self, results):
+        # Queued from the tracker thread; moves go through the usual geometry
+        # notifications, so only the rectangles' old and new bounds repaint
+        self._applying_tracked_poses = True
+        try:
+            for result in results:
+                item = result.key
+                if (result.lost or result.pose == result.start or item is self.currentObject
+                        or item not in self.drawable_object_collection):
+                    continue
+                current = (item.center.x(), item.center.y(), item.width, item.height, item.angle)
+                if current != result.start:
+                    # Edited while the frame was being tracked
+                    continue
+                item.set_pose(result.pose[0], result.pose[1], result.pose[4])
+        finally:
+            self._applying_tracked_poses = False
+        self._flush_dirty()
+
+    def _image_rect(self):
+        if self.document.frame_item is not None:
+            return self.document.frame_item.boundingRect()
+        if self.document.tiled_item is not None:
+            return self.document.tiled_item.boundingRect()
+        return self.document.pixmap_item.sceneBoundingRect()
 
     def fitInView(self, scale=True):
-        rect = QRectF(self._pixmapImage.pixmap().rect())
+        rect = self._image_rect()
         if not rect.isNull():
             self.setSceneRect(rect)
             if self.hasImage():
@@ -142,12 +448,14 @@ class ImageViewer(QGraphicsView):
         self.zoomRatio = factor
                 
     def clearImage(self):
-        self._pixmapImage.setPixmap(QPixmap())
+        self._removeTiledImage()
+        self._cancelLoad()
+        self._showPixmap(None)
 
     #Part2: adjusting mouse behavior
     def mousePressEvent(self, event):
         self.clicked.emit(self.name)
-        if self._pixmapImage is None: return
+        if self.document.pixmap_item is None: return
         if keyboard.is_pressed('ctrl'):
             self.isDrag = True
             self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
@@ -174,30 +482,96 @@ class ImageViewer(QGraphicsView):
         super(ImageViewer, self).mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
-        if self._pixmapImage is None: return
+        if self.document.pixmap_item is None: return
         emit_point =self.mapToScene(event.pos())
         self.mouseMoving.emit(emit_point)
         #Part2
-        for drawObject in self.drawable_object_collection:
-            if drawObject.findPoint(emit_point):
-                self.invalidate()
-        self.viewport().update()
+        if self._is_dragging_object():
+            # Only the dragged object moves and hover is not tracked meanwhile
+            self._queue_drag_move(emit_point)
+        else:
+            self._find_point(emit_point)
+            self._flush_dirty()
         super(ImageViewer, self).mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
-        if self._pixmapImage is None: return
+        if self.document.pixmap_item is None: return
         self.setDragMode(QGraphicsView.DragMode.NoDrag)
         emit_point = self.mapToScene(event.pos())
         self.mouseReleased.emit(emit_point)
         #Part2
         if event.button() == Qt.LeftButton:
-            for drawObject in self.drawable_object_collection:
-                drawObject.findPoint(emit_point)
+            # The last queued move lands before the drag ends
+            self._apply_pending_move()
+            self._find_point(emit_point)
+            for drawObject in self._hovered_objects:
                 drawObject.resetSelectPoint()
+                self._mark_dirty(self.object_index.bounds_of(drawObject))
+            self._hovered_objects.clear()
             self.isPositionSelected = False
+            self.currentObject = None
+            self._flush_dirty()
         super(ImageViewer, self).mouseMoveEvent(event)
+
+    def _is_dragging_object(self):
+        return (self.coalesce_drag_moves and self.currentObject is not None and
+                self.currentObject.is_position_change)
+
+    def _queue_drag_move(self, emit_point):
+        self._pending_move = emit_point
+        if self._move_timer.isActive():
+            return
+        wait = self._last_move_applied + self.frame_interval - time.perf_counter()
+        if wait <= 0:
+            self._apply_pending_move()
+        else:
+            # Rounded up: firing early would apply a second move in the same frame
+            self._move_timer.start(max(1, math.ceil(wait * 1000)))
+
+    def _apply_pending_move(self):
+        self._move_timer.stop()
+        emit_point, self._pending_move = self._pending_move, None
+        if emit_point is None or self.currentObject is None:
+            return
+        self._last_move_applied = time.perf_counter()
+        self.currentObject.findPoint(emit_point)
+        self._flush_dirty()
     
+    def _find_point(self, emit_point):
+        # Same effect as calling findPoint on every object in order: objects away
+        # from the cursor would miss, so only nearby candidates and objects still
+        # holding a selection are tested.
+        candidates = set(self.object_index.query_point(emit_point))
+        candidates.update(self._hovered_objects)
+        candidates = sorted(candidates, key=self.object_index.order_of)
+        found = False
+        last_cursor_order = -1
+        for drawObject in candidates:
+            dragging = drawObject.is_position_change
+            was_hovered = drawObject in self._hovered_objects
+            # Cursor changes go to the view under the mouse
+            drawObject.display = self
+            if drawObject.findPoint(emit_point):
+                found = True
+                self._hovered_objects.add(drawObject)
+            else:
+                self._hovered_objects.discard(drawObject)
+            if was_hovered != (drawObject in self._hovered_objects):
+                # Dense frames draw handles only for hovered objects
+                self._mark_dirty(self.object_index.bounds_of(drawObject))
+            if not dragging:
+                last_cursor_order = self.object_index.order_of(drawObject)
+        # A skipped object would have reset the cursor on its miss
+        tested = set(candidates)
+        for drawObject in reversed(self.drawable_object_collection):
+            if drawObject not in tested:
+                if self.object_index.order_of(drawObject) > last_cursor_order:
+                    self.unsetCursor()
+                break
+        return found
+
     def paintEvent(self, event):
+        self.repaint_stats.record(sum(r.width() * r.height() for r in event.region().rects()))
         super().paintEvent(event)
         painter = QPainter(self.viewport())
         painter.setRenderHint(QPainter.Antialiasing, True)
@@ -207,12 +581,62 @@ class ImageViewer(QGraphicsView):
         painter.setTransform(self.viewportTransform())
         if self.transform().m11()<0.01: return
         #Part2: Check if view has image then do the draw
-        if self.image is not None:
-            for drawingObject in self.drawable_object_collection:
-                drawingObject.draw(painter)
+        if self.image is not None or self.document.preview_scale is not None:
+            batch = self._draw_batch
+            batch.begin(self.transform().m11())
+            # Handles extend up to handle_size past the indexed bounds
+            margin = batch.handle_size
+            batch.visible_rect = self.mapToScene(event.rect()).boundingRect().adjusted(
+                -margin, -margin, margin, margin)
+            visible_objects = self.object_index.query_rect(batch.visible_rect)
+            dense = batch.dense = len(visible_objects) > self.dense_object_count
+            if dense:
+                painter.setRenderHint(QPainter.Antialiasing, False)
+            hovered = self._hovered_objects if dense else ()
+            batch.draw_handles = not dense
+            for drawingObject in visible_objects:
+                if drawingObject in hovered:
+                    # Dense frames draw handles only for the shapes under the mouse
+                    batch.draw_handles = True
+                    drawingObject.draw_batch(batch)
+                    batch.draw_handles = False
+                else:
+                    drawingObject.draw_batch(batch)
+            batch.flush(painter)
                   
-    def invalidate(self):
-        self.viewport().update()
+    def invalidate(self, scene_rect=None):
+        # Without a rect the whole viewport repaints
+        if scene_rect is None:
+            self._dirty_full = True
+        else:
+            self._mark_dirty(scene_rect)
+        self._flush_dirty()
+
+    def _mark_dirty(self, scene_rect):
+        if scene_rect is None:
+            self._dirty_full = True
+        elif not self._dirty_full and scene_rect.intersects(self._visible_scene_rect()):
+            self._dirty_rect = self._dirty_rect.united(scene_rect)
+
+    def _visible_scene_rect(self):
+        # Scene area this view shows, grown by the repaint margins of _flush_dirty
+        scale = self.transform().m11()
+        margin = max(4, int(6 / scale)) + 3 / scale
+        return self.mapToScene(self.viewport().rect()).boundingRect().adjusted(
+            -margin, -margin, margin, margin)
+
+    def _flush_dirty(self):
+        if self._dirty_full:
+            self.viewport().update()
+        elif not self._dirty_rect.isEmpty():
+            # Handles are drawn up to handle_size scene units past the object
+            # bounds, plus a few device pixels for the cosmetic outline
+            margin = max(4, int(6 / self.transform().m11()))
+            rect = self.mapFromScene(self._dirty_rect.adjusted(
+                -margin, -margin, margin, margin)).boundingRect()
+            self.viewport().update(rect.adjusted(-3, -3, 3, 3))
+        self._dirty_rect = QRectF()
+        self._dirty_full = False
 
 class MainTestWindow(QMainWindow):
     def __init__(self):
@@ -229,11 +653,31 @@ class MainTestWindow(QMainWindow):
         self.btn_load_image.clicked.connect(self.load_image_from_file)
         self.btn_show_crop = QPushButton("Show Crop")
         self.btn_show_crop.clicked.connect(self.show_crop)
+        self.btn_save_shapes = QPushButton("Save Shapes")
+        self.btn_save_shapes.clicked.connect(self.save_shapes_to_file)
+        self.btn_load_shapes = QPushButton("Load Shapes")
+        self.btn_load_shapes.clicked.connect(self.load_shapes_from_file)
+        self.btn_track = QPushButton("Track Shapes")
+        self.btn_track.setCheckable(True)
+        self.btn_track.toggled.connect(self.toggle_tracking)
         buttonsLayout.addWidget(self.btn_load_image)
         buttonsLayout.addWidget(self.btn_show_crop)
+        buttonsLayout.addWidget(self.btn_save_shapes)
+        buttonsLayout.addWidget(self.btn_load_shapes)
+        buttonsLayout.addWidget(self.btn_track)
         mainLayout.addLayout(buttonsLayout)
         mainLayout.addWidget(self.view, stretch=1)
+        #Part2: live crop, refreshed off the GUI thread while the shape moves
+        self.preview = RoiPreview()
+        self.preview.hide()
+        mainLayout.addWidget(self.preview)
+        self.view.objectGeometryChanged.connect(self.update_crop)
         self.setCentralWidget(central_widget)
+        for runner, verb in ((self.view.loader, "Loading"), (self.view.saver, "Saving")):
+            runner.progress.connect(lambda job_id, done, verb=verb:
+                                    self.statusBar().showMessage("%s %d%%" % (verb, done * 100)))
+            runner.failed.connect(lambda job_id, message: self.statusBar().showMessage(message))
+        self.view.saver.saved.connect(lambda job_id, path: self.statusBar().showMessage("Saved " + path))
 
         #Part2: Add rotation rectangle object into view
         self.image = None
@@ -245,36 +689,69 @@ class MainTestWindow(QMainWindow):
             self,
             "Open Image File",
             "", 
-            "Image Files (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;All Files (*)"
+            "Image Files (*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.npy);;All Files (*)"
         )
         
         if file_path:
-            image = self.convert_to_qImage(file_path)
-            self.view.setImage(image)
+            #Part2: decoded off the GUI thread; the view keeps the source for crops
+            self.view.loadImage(file_path)
     
-    def convert_to_qImage(self, image_path):
-        opencv_image = cv2.imread(image_path, 0) #0 = gray scale
-        #Part2: store image for crop
-        self.view.image = opencv_image.copy()
-        qimage = QImage(opencv_image.data, 
-                       opencv_image.shape[1], 
-                       opencv_image.shape[0], 
-                       opencv_image.strides[0], 
-                       QImage.Format_Indexed8) # convert to 8bit image use for gray, binary
-        return qimage
+    def save_shapes_to_file(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Shapes", "", "Shape Arrays (*.npz);;JSON (*.json)")
+        if not file_path:
+            return
+        if file_path.lower().endswith('.json'):
+            export_annotations_json(file_path, self.view.drawable_object_collection)
+        else:
+            save_annotations(file_path, self.view.drawable_object_collection)
+
+    def load_shapes_from_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Load Shapes", "", "Shape Arrays (*.npz);;All Files (*)")
+        if file_path:
+            try:
+                load_annotations(file_path, self.view.drawable_object_collection)
+            except (IOError, ValueError, KeyError) as e:
+                QMessageBox.warning(self, "Load Shapes", "Could not load %s: %s" % (file_path, e))
     
     #Part2
     def show_crop(self):
         if self.view.image is not None:
-            roi = self.rotation_rect.getShapeRegion(self.view.image)
-            cv2.imshow("Crop Image", roi)
-            cv2.waitKey(0)
+            self.preview.show()
+            self.preview.request(self.view.image, self.rotation_rect)
+
+    def update_crop(self, item):
+        if item is self.rotation_rect and self.preview.isVisible():
+            self.preview.request(self.view.image, item)
+
+    def toggle_tracking(self, checked):
+        if checked:
+            self.view.startTracking()
+        else:
+            self.view.stopTracking()
+
+    def closeEvent(self, event):
+        self.view.stopTracking()
+        self.view.loader.shutdown()
+        self.view.saver.shutdown(wait=True)
+        self.preview.stop()
+        super().closeEvent(event)
 
     def mouse_location(self, pos):
         self.statusBar().showMessage("X:{0:.3f}, Y:{1:.3f}".format(pos.x(), pos.y()))
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    # VIEWER_PERF_TRACE=trace.json records timings and writes a Chrome trace on exit
+    trace_path = os.environ.get('VIEWER_PERF_TRACE')
+    if trace_path:
+        tracer.enable()
+        tracer.snapshotReady.connect(lambda summary: print(json.dumps(summary)))
+        tracer.start_snapshots(5000)
     window = MainTestWindow()
     window.show()
-    sys.exit(app.exec_())
+    status = app.exec_()
+    if trace_path:
+        tracer.dump_chrome_trace(trace_path)
+    sys.exit(status)
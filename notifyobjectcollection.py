@@ -1,20 +1,217 @@
-from typing import TypeVar, Generic, List, Optional, Callable, Iterator
+from typing import TypeVar, Generic, Dict, Iterable, List, Optional, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+
 from objects.idrawableobject import InteractDrawableObject
+from objects.rorationrectangle import RotationRectangle
+from objects.regionextract import rotated_rect_corners
+from objects.regionstats import RegionStats, RegionStatsEngine
 
 T = TypeVar('T', bound='InteractDrawableObject')
 
+class CollectionChange(Generic[T]):
+    # One coalesced change. [start, stop) is the index range, in the collection
+    # as it is after the change, that holds every added or replaced item;
+    # removals only pull start down to where the item used to be. added and
+    # removed only list items that became or stopped being members, so a
+    # second copy of an item is not reported again. reordered is set by
+    # sort() and reverse(), which move items without changing membership.
+    def __init__(self, start: int, stop: int, added: Optional[List[T]] = None,
+                 removed: Optional[List[T]] = None, reordered: bool = False):
+        self.start = start
+        self.stop = stop
+        self.added: List[T] = added if added is not None else []
+        self.removed: List[T] = removed if removed is not None else []
+        self.reordered = reordered
+
+    @property
+    def is_append(self) -> bool:
+        return not self.removed and not self.reordered
+
+    def merge(self, other: 'CollectionChange[T]'):
+        self.start = min(self.start, other.start)
+        self.stop = max(self.stop, other.stop)
+        self.reordered |= other.reordered
+        # An item added and removed inside one batch never happened
+        dropped = {id(item) for item in other.removed} & {id(item) for item in self.added}
+        self.added = [item for item in self.added if id(item) not in dropped]
+        self.added.extend(other.added)
+        self.removed.extend(item for item in other.removed if id(item) not in dropped)
+
 class NotifyObjectCollection(list, Generic[T]):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.added_item: Optional[Callable[['NotifyObjectCollection[T]', T], None]] = None
         self.cleared_collection: Optional[Callable[['NotifyObjectCollection[T]', None], None]] = None
+        # Every mutating list method reports through changed_collection, once
+        # per call or once per batch_update; without it, added items fall back
+        # to one added_item call each
+        self.changed_collection: Optional[Callable[['NotifyObjectCollection[T]', CollectionChange[T]], None]] = None
+        # Membership by id(item), with a count per id so duplicates stay
+        # members until their last copy goes
+        self._by_id: Dict[int, T] = {}
+        self._counts: Dict[int, int] = {}
+        self._track(self)
+        self._batch_depth = 0
+        self._pending_change: Optional[CollectionChange[T]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+
+    def _track(self, items: Iterable[T]) -> List[T]:
+        # Returns the items that were not members yet
+        new = []
+        for item in items:
+            key = id(item)
+            count = self._counts.get(key, 0)
+            if not count:
+                self._by_id[key] = item
+                new.append(item)
+            self._counts[key] = count + 1
+        return new
+
+    def _untrack(self, items: Iterable[T]) -> List[T]:
+        # Returns the items whose last copy went
+        gone = []
+        for item in items:
+            key = id(item)
+            count = self._counts[key] - 1
+            if count:
+                self._counts[key] = count
+            else:
+                del self._counts[key]
+                del self._by_id[key]
+                gone.append(item)
+        return gone
+
+    def _changed(self, start: int, stop: int, added: List[T], removed: List[T]) -> None:
+        if added or removed:
+            self._notify_changed(CollectionChange(start, stop, added, removed))
 
     def add(self, item: T) -> None:
         self.append(item)
-        self.notify_added_item(item)
+
+    def append(self, item: T) -> None:
+        super().append(item)
+        self._changed(len(self) - 1, len(self), self._track((item,)), [])
+
+    def insert(self, index: int, item: T) -> None:
+        # Where list.insert puts it
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        super().insert(index, item)
+        self._changed(index, index + 1, self._track((item,)), [])
+
+    def extend(self, items: Iterable[T]) -> None:
+        start = len(self)
+        items = list(items)
+        super().extend(items)
+        self._changed(start, len(self), self._track(items), [])
+
+    def pop(self, index: int = -1) -> T:
+        item = super().pop(index)
+        index = index + len(self) + 1 if index < 0 else index
+        self._changed(index, index, [], self._untrack((item,)))
+        return item
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            positions = range(*index.indices(len(self)))
+            removed = [self[i] for i in positions]
+            start = min(positions) if positions else 0
+        else:
+            start = index + len(self) if index < 0 else index
+            removed = [self[index]]
+        super().__delitem__(index)
+        self._changed(start, start, [], self._untrack(removed))
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            start, stop, step = index.indices(len(self))
+            positions = range(start, stop, step)
+            removed = [self[i] for i in positions]
+            super().__setitem__(index, value)
+            if step == 1:
+                stop = start + len(value)
+            elif positions:
+                start, stop = min(positions), max(positions) + 1
+            else:
+                stop = start
+        else:
+            value = [value]
+            start = index + len(self) if index < 0 else index
+            stop = start + 1
+            removed = [self[index]]
+            super().__setitem__(index, value[0])
+        # Tracked before untracking, so assigning an item over itself keeps it
+        added = self._track(value)
+        gone = self._untrack(removed)
+        self._changed(start, stop, added, gone)
+
+    def __iadd__(self, items: Iterable[T]) -> 'NotifyObjectCollection[T]':
+        self.extend(items)
+        return self
+
+    def __imul__(self, count: int) -> 'NotifyObjectCollection[T]':
+        if count <= 0:
+            del self[:]
+        elif count > 1:
+            self.extend(list(self) * (count - 1))
+        return self
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._notify_changed(CollectionChange(0, len(self), reordered=True))
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._notify_changed(CollectionChange(0, len(self), reordered=True))
+
+    def remove(self, item: T) -> None:
+        del self[self.index(item)]
+
+    def remove_items(self, items: Iterable[T]) -> None:
+        # Removes many items (every copy of each) in one pass and one change,
+        # instead of an index() scan per remove(); items not in the collection
+        # are ignored
+        ids = {id(item) for item in items if id(item) in self._by_id}
+        if not ids:
+            return
+        start = next(index for index, item in enumerate(self) if id(item) in ids)
+        removed = [self._by_id[object_id] for object_id in ids]
+        super().__setitem__(slice(None), [item for item in self if id(item) not in ids])
+        for object_id in ids:
+            del self._by_id[object_id]
+            del self._counts[object_id]
+        self._notify_changed(CollectionChange(start, start, removed=removed))
+
+    def replace(self, old: T, new: T) -> None:
+        self[self.index(old)] = new
+
+    def get_by_id(self, object_id: int) -> Optional[T]:
+        # O(1) lookup by id(item)
+        return self._by_id.get(object_id)
+
+    def __contains__(self, item) -> bool:
+        return id(item) in self._by_id
+
+    @contextmanager
+    def batch_update(self):
+        # Changes made inside are reported once, when the outermost batch exits
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending_change is not None:
+                change, self._pending_change = self._pending_change, None
+                self._dispatch_changed(change)
 
     def clear(self) -> None:
         super().clear()
+        self._by_id.clear()
+        self._counts.clear()
+        self._pending_change = None
         if self.cleared_collection is not None:
             self.cleared_collection(self, None)
 
@@ -22,5 +219,78 @@ class NotifyObjectCollection(list, Generic[T]):
         if self.added_item is not None:
             self.added_item(self, item)
 
+    def _notify_changed(self, change: CollectionChange[T]) -> None:
+        if self._batch_depth:
+            if self._pending_change is None:
+                self._pending_change = change
+            else:
+                self._pending_change.merge(change)
+            return
+        self._dispatch_changed(change)
+
+    def _dispatch_changed(self, change: CollectionChange[T]) -> None:
+        change.stop = min(change.stop, len(self))
+        change.start = min(change.start, change.stop)
+        if self.changed_collection is not None:
+            self.changed_collection(self, change)
+        else:
+            for item in change.added:
+                self.notify_added_item(item)
+
+    def extract_regions(self, frame: np.ndarray, workers: int = 1) -> List[np.ndarray]:
+        # One ROI per item, in collection order. Rotated rectangles get their
+        # corners in a single vectorized pass and go through their ShapeMask,
+        # which keeps the window mask while the rectangle does not change;
+        # other shapes use getShapeRegion, which does the same.
+        rects = [(i, item) for i, item in enumerate(self) if isinstance(item, RotationRectangle)]
+        regions: List[Optional[np.ndarray]] = [None] * len(self)
+        jobs = []
+        if rects:
+            corners = rotated_rect_corners(
+                [item.center.x() for _, item in rects],
+                [item.center.y() for _, item in rects],
+                [item.width for _, item in rects],
+                [item.height for _, item in rects],
+                [item.angle for _, item in rects]).astype(np.int32)
+            jobs.extend((i, lambda item=item, pts=pts: item.shape_mask.extract(frame, pts))
+                        for (i, item), pts in zip(rects, corners))
+        jobs.extend((i, lambda item=item: item.getShapeRegion(frame))
+                    for i, item in enumerate(self) if not isinstance(item, RotationRectangle))
+
+        if workers > 1 and len(jobs) > 1:
+            results = self._get_executor(workers).map(lambda job: job[1](), jobs)
+        else:
+            results = (job() for _, job in jobs)
+        for (i, _), region in zip(jobs, results):
+            regions[i] = region
+        return regions
+
+    def shape_polygons(self) -> List[np.ndarray]:
+        # Integer mask polygons in collection order; a RotationRectangleArray
+        # contributes one per stored rectangle, shapes without one are skipped
+        polygons = []
+        for item in self:
+            if hasattr(item, 'get_polygon'):
+                polygons.append(item.get_polygon())
+            elif hasattr(item, 'get_corners'):
+                polygons.extend(np.asarray(item.get_corners()).astype(np.int32))
+        return polygons
+
+    def stats_engine(self, **options) -> RegionStatsEngine:
+        # Fixed ROIs for a run of frames; build a new engine after edits
+        return RegionStatsEngine(self.shape_polygons(), **options)
+
+    def region_stats(self, frame: np.ndarray, **options) -> RegionStats:
+        # One row per polygon from shape_polygons()
+        return self.stats_engine(**options).compute(frame)
+
+    def _get_executor(self, workers: int) -> ThreadPoolExecutor:
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+            self._executor_workers = workers
+        return self._executor
+
     def __iter__(self) -> Iterator[T]:
-        return super().__iter__()
\ No newline at end of file
+        return super().__iter__()
@@ -0,0 +1,17 @@
+class CacheStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses,
+                'invalidations': self.invalidations, 'hit_rate': self.hit_rate}
@@ -0,0 +1,102 @@
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt5.QtGui import QBrush, QColor, QPainter, QPen, QPolygonF
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (pen colour, pen width, cosmetic pen, brush colour or None)
+Style = Tuple[int, float, bool, Optional[int]]
+
+class DrawBatch:
+    # Collects primitives from many drawable objects and issues them grouped by
+    # style, so pen and brush change once per style per frame. Pens and brushes
+    # are kept across frames, so reuse one batch per view.
+    def __init__(self, scale: float = 1.0, visible_rect: Optional[QRectF] = None):
+        self._polygons: Dict[Style, List[QPolygonF]] = {}
+        self._ellipses: Dict[Style, List[QRectF]] = {}
+        self._lines: Dict[Style, List[QLineF]] = {}
+        # Dense outlines as endpoint pairs, one drawLines call per style
+        self._segments: Dict[Style, List[QPointF]] = {}
+        self._callbacks: List[Callable[[QPainter], None]] = []
+        self._pens: Dict[Tuple[Style, bool], QPen] = {}
+        self._brushes: Dict[Style, QBrush] = {}
+        self.begin(scale, visible_rect)
+
+    def begin(self, scale: float = 1.0, visible_rect: Optional[QRectF] = None):
+        self.scale = scale
+        self.visible_rect = visible_rect
+        self.handle_size = max(4, int(6 / scale))
+        # Cleared by the view for objects whose handles should not be drawn
+        self.draw_handles = True
+        # Dense frames draw every outline with a 1 px pen
+        self.dense = False
+
+    @staticmethod
+    def style(pen_color, pen_width=1, cosmetic=False, brush_color=None) -> Style:
+        brush = QColor(brush_color).rgba() if brush_color is not None else None
+        return QColor(pen_color).rgba(), pen_width, cosmetic, brush
+
+    def draw_handles_for(self, extent: float) -> bool:
+        # Handles keep a fixed on-screen size, so once the shape is smaller than
+        # a handle they only hide it
+        return self.draw_handles and extent >= self.handle_size
+
+    def add_polygon(self, style: Style, polygon: QPolygonF):
+        self._polygons.setdefault(style, []).append(polygon)
+
+    def add_polygons(self, style: Style, polygons: List[QPolygonF]):
+        self._polygons.setdefault(style, []).extend(polygons)
+
+    def add_segments(self, style: Style, points: List[QPointF]):
+        # Line segments as consecutive endpoint pairs
+        self._segments.setdefault(style, []).extend(points)
+
+    def add_ellipse(self, style: Style, rect: QRectF):
+        self._ellipses.setdefault(style, []).append(rect)
+
+    def add_line(self, style: Style, line: QLineF):
+        self._lines.setdefault(style, []).append(line)
+
+    def add_callback(self, draw: Callable[[QPainter], None]):
+        self._callbacks.append(draw)
+
+    def _pen(self, style: Style) -> QPen:
+        key = (style, self.dense)
+        pen = self._pens.get(key)
+        if pen is None:
+            if self.dense:
+                pen = self._pens[key] = QPen(QColor.fromRgba(style[0]), 1)
+                pen.setCosmetic(True)
+            else:
+                pen = self._pens[key] = QPen(QColor.fromRgba(style[0]), style[1])
+                pen.setCosmetic(style[2])
+        return pen
+
+    def _brush(self, style: Style):
+        if style[3] is None:
+            return Qt.NoBrush
+        brush = self._brushes.get(style)
+        if brush is None:
+            brush = self._brushes[style] = QBrush(QColor.fromRgba(style[3]))
+        return brush
+
+    def flush(self, painter: QPainter):
+        for primitives, draw in ((self._polygons, painter.drawPolygon),
+                                 (self._ellipses, painter.drawEllipse)):
+            for style, items in primitives.items():
+                painter.setPen(self._pen(style))
+                painter.setBrush(self._brush(style))
+                for item in items:
+                    draw(item)
+        for style, lines in self._lines.items():
+            painter.setPen(self._pen(style))
+            painter.drawLines(lines)
+        for style, points in self._segments.items():
+            painter.setPen(self._pen(style))
+            painter.drawLines(points)
+        for draw in self._callbacks:
+            draw(painter)
+        self._polygons.clear()
+        self._ellipses.clear()
+        self._lines.clear()
+        self._segments.clear()
+        self._callbacks.clear()
@@ -0,0 +1,143 @@
+from .polygonshape import PolygonShape
+from .drawbatch import DrawBatch
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
+
+from typing import List
+import numpy as np
+import math
+
+# Handle indices: axis ends (+x, +y, -x, -y in the ellipse frame), then rotation
+ROTATE_HANDLE = 4
+
+class Ellipse(PolygonShape):
+    # Rotated ellipse, e.g. a round fiducial. The outline is sampled with
+    # chords of about CHORD_LENGTH scene units, so it stays within a fraction
+    # of a pixel of the true curve; masks and hit tests use that outline.
+    CHORD_LENGTH = 4.0
+
+    def __init__(self, center_x=300, center_y=300, width=100, height=100, angle=0):
+        super().__init__()
+        self._center = QPointF(center_x, center_y)
+        self._width = width
+        self._height = height
+        self._angle = angle  # degrees
+        self._rotation_handle_color = Qt.red
+
+    @property
+    def center(self) -> QPointF:
+        return self._center
+
+    @center.setter
+    def center(self, value: QPointF):
+        self._center = value
+        self._invalidate_geometry()
+
+    @property
+    def width(self) -> float:
+        return self._width
+
+    @width.setter
+    def width(self, value: float):
+        self._width = max(10, value)
+        self._invalidate_geometry()
+
+    @property
+    def height(self) -> float:
+        return self._height
+
+    @height.setter
+    def height(self, value: float):
+        self._height = max(10, value)
+        self._invalidate_geometry()
+
+    @property
+    def angle(self) -> float:
+        return self._angle
+
+    @angle.setter
+    def angle(self, value: float):
+        self._angle = value % 360
+        self._invalidate_geometry()
+
+    def set_pose(self, center_x: float, center_y: float, angle: float):
+        # Moves and turns with a single geometry notification
+        self._center = QPointF(center_x, center_y)
+        self._angle = angle % 360
+        self._invalidate_geometry()
+
+    def _axes(self):
+        angle_rad = math.radians(self._angle)
+        return math.cos(angle_rad), math.sin(angle_rad)
+
+    def _compute_outline(self) -> np.ndarray:
+        half_w = self._width / 2
+        half_h = self._height / 2
+        # Ramanujan's perimeter approximation
+        perimeter = math.pi * (3 * (half_w + half_h) - math.sqrt((3 * half_w + half_h) * (half_w + 3 * half_h)))
+        count = int(min(360, max(16, math.ceil(perimeter / self.CHORD_LENGTH))))
+        t = np.linspace(0, 2 * math.pi, count, endpoint=False)
+        x = half_w * np.cos(t)
+        y = half_h * np.sin(t)
+        cos_a, sin_a = self._axes()
+        return np.stack((x * cos_a - y * sin_a + self._center.x(),
+                         x * sin_a + y * cos_a + self._center.y()), axis=1)
+
+    def get_handles(self) -> List[QPointF]:
+        return self._cached('handles', self._compute_handles)
+
+    def _compute_handles(self):
+        cos_a, sin_a = self._axes()
+        half_w = self._width / 2
+        half_h = self._height / 2
+        x_axis = QPointF(half_w * cos_a, half_w * sin_a)
+        y_axis = QPointF(-half_h * sin_a, half_h * cos_a)
+        distance = max(self._width, self._height) / 2 + 20
+        rotation = QPointF(self._center.x() + distance * sin_a, self._center.y() - distance * cos_a)
+        return [self._center + x_axis, self._center + y_axis,
+                self._center - x_axis, self._center - y_axis, rotation]
+
+    def _handle_cursor(self, index: int):
+        return Qt.ClosedHandCursor if index == ROTATE_HANDLE else Qt.CrossCursor
+
+    def _drag_handle(self, index: int, mouse_location: QPointF):
+        vector = mouse_location - self._center
+        if index == ROTATE_HANDLE:
+            self._angle = math.degrees(math.atan2(vector.x(), -vector.y()))
+            self._invalidate_geometry()
+            return
+        # Axis handles resize about the centre
+        cos_a, sin_a = self._axes()
+        if index % 2 == 0:
+            size = abs(vector.x() * cos_a + vector.y() * sin_a) * 2
+            if size >= 10:
+                self._width = size
+                self._invalidate_geometry()
+        else:
+            size = abs(-vector.x() * sin_a + vector.y() * cos_a) * 2
+            if size >= 10:
+                self._height = size
+                self._invalidate_geometry()
+
+    def _translate(self, dx: float, dy: float):
+        self._center = self._center + QPointF(dx, dy)
+        self._invalidate_geometry()
+
+    def _get_styles(self):
+        if self._styles is None:
+            self._styles = super()._get_styles() + (DrawBatch.style(self._rotation_handle_color, 2),)
+        return self._styles
+
+    def draw_batch(self, batch):
+        outline, handle, rotation = self._get_styles()
+        batch.add_polygon(outline, self.get_polygonf())
+        if not batch.draw_handles_for(max(self._width, self._height)):
+            return
+        handles = self.get_handles()
+        handle_size = batch.handle_size
+        for point in handles[:ROTATE_HANDLE]:
+            batch.add_ellipse(handle, QRectF(point.x() - handle_size / 2, point.y() - handle_size / 2,
+                                             handle_size, handle_size))
+        rot_handle = handles[ROTATE_HANDLE]
+        batch.add_ellipse(rotation, QRectF(rot_handle.x() - handle_size, rot_handle.y() - handle_size,
+                                           handle_size * 2, handle_size * 2))
+        batch.add_line(rotation, QLineF(self._center, rot_handle))
@@ -1,8 +1,8 @@
 from abc import abstractmethod
-from typing import Callable
+from typing import Callable, Optional, Tuple
 from PyQt5.QtWidgets import QGraphicsView
 from PyQt5.QtGui import QPainter
-from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QObject, QRectF
 
 Drawing = Callable[[QPainter], None]
 
@@ -11,6 +11,7 @@ class InteractDrawableObject(QObject):
         super(InteractDrawableObject, self).__init__()
         self._display = None
         self._is_position_change = False
+        self.geometry_changed: Optional[Callable[..., None]] = None
 
     @property
     @abstractmethod
@@ -54,7 +55,25 @@ class InteractDrawableObject(QObject):
     @abstractmethod
     def getShapeRegion(self, image):
         pass
+
+    def draw_batch(self, batch):
+        # Shapes override this to add their primitives to a DrawBatch
+        batch.add_callback(self.draw)
+
+    def get_bounding_rect(self) -> Optional[QRectF]:
+        # Scene rect covering everything findPoint can hit; None means unbounded
+        return None
+
+    def notify_geometry_changed(self, dirty: Optional[Tuple[QRectF, QRectF]] = None):
+        # `dirty` is the (old, new) scene rect of the part that moved, for
+        # objects that change only a small part of their bounds
+        if self.geometry_changed is None:
+            return
+        if dirty is None:
+            self.geometry_changed(self)
+        else:
+            self.geometry_changed(self, dirty)
     
     def update(self):
         if self.display:
-            self.display.invalidate()
\ No newline at end of file
+            self.display.invalidate(self.get_bounding_rect())
\ No newline at end of file
@@ -0,0 +1,41 @@
+from .polygonshape import PolygonShape
+from PyQt5.QtCore import QPointF
+
+from typing import List
+import numpy as np
+
+class Polygon(PolygonShape):
+    # Free polygon; every vertex is a handle
+    def __init__(self, points=((250, 250), (350, 250), (350, 350), (250, 350))):
+        super().__init__()
+        self._points = np.array([(p.x(), p.y()) if isinstance(p, QPointF) else p for p in points],
+                                dtype=np.float64).reshape(-1, 2)
+        if len(self._points) < 3:
+            raise ValueError('a polygon needs at least 3 points, got %d' % len(self._points))
+
+    @property
+    def points(self) -> np.ndarray:
+        return self._points.copy()
+
+    @points.setter
+    def points(self, value):
+        points = np.array(value, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 3:
+            raise ValueError('a polygon needs at least 3 points, got %d' % len(points))
+        self._points = points
+        self._invalidate_geometry()
+
+    def _compute_outline(self) -> np.ndarray:
+        return self._points
+
+    def get_handles(self) -> List[QPointF]:
+        return self._cached('handles', lambda: [QPointF(x, y) for x, y in self._points.tolist()])
+
+    def _drag_handle(self, index: int, mouse_location: QPointF):
+        self._points = self._points.copy()
+        self._points[index] = (mouse_location.x(), mouse_location.y())
+        self._invalidate_geometry()
+
+    def _translate(self, dx: float, dy: float):
+        self._points = self._points + (dx, dy)
+        self._invalidate_geometry()
@@ -0,0 +1,189 @@
+from .idrawableobject import InteractDrawableObject
+from .shapemask import EdgeTable, ShapeMask
+from .regionstats import RegionStats, polygon_stats
+from .cachestats import CacheStats
+from .drawbatch import DrawBatch
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QPolygonF
+
+from abc import abstractmethod
+from typing import List
+import numpy as np
+
+# selectedHandle values besides handle indices
+NO_HANDLE = -1
+MOVE_HANDLE = -2
+
+class PolygonShape(InteractDrawableObject):
+    # Base for shapes described by a closed float outline (polygons, ellipses).
+    # Subclasses provide the outline, their handles and how dragging a handle
+    # edits them; hit testing goes through an EdgeTable and ROI extraction
+    # through a ShapeMask, both rebuilt only when the geometry changes.
+    cache_stats = CacheStats()
+
+    def __init__(self):
+        super().__init__()
+        self.selectedHandle = NO_HANDLE
+        self._last_mouse_pos = QPointF()
+        self._color = Qt.blue
+        self._handle_color = Qt.green
+        self._geometry_cache = {}
+        self._styles = None
+        self.shape_mask = ShapeMask()
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, value):
+        self._color = value
+        self._styles = None
+
+    @property
+    def display(self):
+        return self._display
+
+    @display.setter
+    def display(self, value):
+        self._display = value
+
+    def _invalidate_geometry(self):
+        self._geometry_cache.clear()
+        self.cache_stats.invalidations += 1
+        self.notify_geometry_changed()
+
+    def _cached(self, key, compute):
+        value = self._geometry_cache.get(key)
+        if value is None:
+            self.cache_stats.misses += 1
+            value = self._geometry_cache[key] = compute()
+        else:
+            self.cache_stats.hits += 1
+        return value
+
+    @abstractmethod
+    def _compute_outline(self) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def get_handles(self) -> List[QPointF]:
+        pass
+
+    @abstractmethod
+    def _drag_handle(self, index: int, mouse_location: QPointF):
+        pass
+
+    @abstractmethod
+    def _translate(self, dx: float, dy: float):
+        pass
+
+    def _handle_cursor(self, index: int):
+        return Qt.CrossCursor
+
+    def get_outline(self) -> np.ndarray:
+        # (N, 2) float64 outline in scene coordinates
+        return self._cached('outline', self._compute_outline)
+
+    def get_polygon(self) -> np.ndarray:
+        # Integer outline used for masks
+        return self._cached('polygon', lambda: np.rint(self.get_outline()).astype(np.int32))
+
+    def get_polygonf(self) -> QPolygonF:
+        return self._cached('polygonf', lambda: QPolygonF(
+            [QPointF(x, y) for x, y in self.get_outline().tolist()]))
+
+    def get_edge_table(self) -> EdgeTable:
+        return self._cached('edge_table', lambda: EdgeTable(self.get_outline()))
+
+    def contains(self, point: QPointF) -> bool:
+        return self.get_edge_table().contains(point.x(), point.y())
+
+    def get_bounding_rect(self):
+        return self._cached('bounding_rect', self._compute_bounding_rect)
+
+    def _compute_bounding_rect(self):
+        outline = self.get_outline()
+        handles = self.get_handles()
+        xs = outline[:, 0].tolist() + [p.x() for p in handles]
+        ys = outline[:, 1].tolist() + [p.y() for p in handles]
+        margin = self.selection_size
+        return QRectF(min(xs) - margin, min(ys) - margin,
+                      max(xs) - min(xs) + 2 * margin, max(ys) - min(ys) + 2 * margin)
+
+    def findPoint(self, mouse_location):
+        if self.is_position_change:
+            return self._handle_drag(mouse_location)
+
+        for i, handle in enumerate(self.get_handles()):
+            if (handle - mouse_location).manhattanLength() < self.selection_size:
+                self.selectedHandle = i
+                self._last_mouse_pos = mouse_location
+                self.display.setCursor(self._handle_cursor(i))
+                return True
+
+        if self.contains(mouse_location):
+            self.selectedHandle = MOVE_HANDLE
+            self._last_mouse_pos = mouse_location
+            self.display.setCursor(Qt.SizeAllCursor)
+            return True
+
+        self.selectedHandle = NO_HANDLE
+        self.display.unsetCursor()
+        return False
+
+    def _handle_drag(self, mouse_location):
+        if self.selectedHandle == NO_HANDLE:
+            self.resetSelectPoint()
+            return False
+        if self.selectedHandle == MOVE_HANDLE:
+            delta = mouse_location - self._last_mouse_pos
+            self._translate(delta.x(), delta.y())
+        else:
+            self._drag_handle(self.selectedHandle, mouse_location)
+        self._last_mouse_pos = mouse_location
+        return True
+
+    def selectPoint(self):
+        if self.selectedHandle != NO_HANDLE:
+            self.is_position_change = True
+
+    def resetSelectPoint(self):
+        self.is_position_change = False
+        self.selectedHandle = NO_HANDLE
+
+    def getShapeRegion(self, image: np.ndarray) -> np.ndarray:
+        return self.shape_mask.extract(image, self.get_polygon())
+
+    def getShapeStats(self, image: np.ndarray, **options) -> RegionStats:
+        # Masked statistics over the pixels inside the outline
+        return polygon_stats(image, self.get_polygon(), **options)
+
+    def draw(self, painter):
+        scale = self.display.transform().m11() if self.display else 1.0
+        batch = DrawBatch(scale)
+        self.draw_batch(batch)
+        batch.flush(painter)
+
+    def _get_styles(self):
+        if self._styles is None:
+            self._styles = (DrawBatch.style(self._color, 2, cosmetic=True),
+                            DrawBatch.style(self._handle_color, 1, brush_color=self._handle_color))
+        return self._styles
+
+    def _extent(self) -> float:
+        table = self.get_edge_table()
+        return max(table.x_max - table.x_min, table.y_max - table.y_min)
+
+    def draw_batch(self, batch):
+        outline, handle = self._get_styles()
+        batch.add_polygon(outline, self.get_polygonf())
+        if not batch.draw_handles_for(self._extent()):
+            return
+        self._draw_handles(batch, handle)
+
+    def _draw_handles(self, batch, style):
+        handle_size = batch.handle_size
+        for point in self.get_handles():
+            batch.add_ellipse(style, QRectF(point.x() - handle_size / 2, point.y() - handle_size / 2,
+                                            handle_size, handle_size))
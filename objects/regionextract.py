@@ -0,0 +1,66 @@
+import numpy as np
+import math
+import cv2
+
+def clip_bounding_rect(pts: np.ndarray, shape) -> tuple:
+    x, y, w, h = cv2.boundingRect(pts)
+    if (x + w <= 0 or x >= shape[1] or
+        y + h <= 0 or y >= shape[0]):
+        return None
+    return max(0, x), max(0, y), min(x + w, shape[1]), min(y + h, shape[0])
+
+def extract_polygon_region(image: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    # Mask and AND only the clipped bounding window, never the whole frame.
+    # `image` may also be an ImageSource; only that window is read from it.
+    window = clip_bounding_rect(pts, image.shape)
+    if window is None:
+        return np.array([])
+    x0, y0, x1, y1 = window
+    roi = image[y0:y1, x0:x1]
+    mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [pts], 255, offset=(-x0, -y0))
+    return cv2.bitwise_and(roi, roi, mask=mask)
+
+# Extra source pixels around the window so every kernel up to Lanczos4
+# samples the same neighbours it would see in the full frame
+WARP_PADDING = 4
+
+def extract_deskewed_region(image: np.ndarray, origin, angle: float, size,
+                            interpolation=cv2.INTER_LINEAR) -> np.ndarray:
+    width, height = size
+    angle_rad = math.radians(angle)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    ox, oy = origin
+
+    xs = [ox, ox + width * cos_a, ox + width * cos_a - height * sin_a, ox - height * sin_a]
+    ys = [oy, oy + width * sin_a, oy + width * sin_a + height * cos_a, oy + height * cos_a]
+    pts = np.array([xs, ys], dtype=np.int32).T
+    if clip_bounding_rect(pts, image.shape) is None:
+        return np.array([])
+
+    x0 = max(0, int(math.floor(min(xs))) - WARP_PADDING)
+    y0 = max(0, int(math.floor(min(ys))) - WARP_PADDING)
+    x1 = min(image.shape[1], int(math.ceil(max(xs))) + WARP_PADDING + 1)
+    y1 = min(image.shape[0], int(math.ceil(max(ys))) + WARP_PADDING + 1)
+
+    # Maps patch pixel (u, v) to window pixel, so warpAffine runs inverse-mapped
+    matrix = np.array([[cos_a, -sin_a, ox - x0],
+                       [sin_a, cos_a, oy - y0]], dtype=np.float64)
+    return cv2.warpAffine(image[y0:y1, x0:x1], matrix, (width, height),
+                          flags=interpolation | cv2.WARP_INVERSE_MAP,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+def rotated_rect_corners(cx, cy, width, height, angle) -> np.ndarray:
+    # (N, 4, 2) corners in get_corners order for N rectangles in one pass
+    cx, cy, width, height, angle = (np.asarray(v, dtype=np.float64)
+                                    for v in (cx, cy, width, height, angle))
+    angle_rad = np.radians(angle)
+    cos_a = np.cos(angle_rad)[:, None]
+    sin_a = np.sin(angle_rad)[:, None]
+    half_w = (width / 2)[:, None] * np.array([-1.0, 1.0, 1.0, -1.0])
+    half_h = (height / 2)[:, None] * np.array([-1.0, -1.0, 1.0, 1.0])
+    corners = np.empty(cx.shape + (4, 2), dtype=np.float64)
+    corners[..., 0] = half_w * cos_a - half_h * sin_a + cx[:, None]
+    corners[..., 1] = half_w * sin_a + half_h * cos_a + cy[:, None]
+    return corners
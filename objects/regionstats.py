@@ -0,0 +1,203 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import numpy as np
+import cv2
+
+from .regionextract import clip_bounding_rect
+
+class RegionStats:
+    # Masked statistics for N regions, one row per region. Per-channel values
+    # are (N, C) arrays, hist is (N, C, bins); a region outside the image has
+    # count 0 and NaN statistics. Indexing with an int gives a single row.
+    def __init__(self, count: np.ndarray, mean: np.ndarray, std: np.ndarray,
+                 minimum: Optional[np.ndarray] = None, maximum: Optional[np.ndarray] = None,
+                 hist: Optional[np.ndarray] = None):
+        self.count = count
+        self.mean = mean
+        self.std = std
+        self.min = minimum
+        self.max = maximum
+        self.hist = hist
+
+    def __len__(self):
+        return len(self.count)
+
+    def __getitem__(self, index) -> 'RegionStats':
+        pick = lambda values: None if values is None else values[index]
+        return RegionStats(self.count[index], self.mean[index], self.std[index],
+                           pick(self.min), pick(self.max), pick(self.hist))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name)
+                for name in ('count', 'mean', 'std', 'min', 'max', 'hist')
+                if getattr(self, name) is not None}
+
+def is_axis_aligned_rect(pts: np.ndarray) -> bool:
+    # Every edge horizontal or vertical and the outline enclosing its whole
+    # bounding box: the fillPoly mask covers the bounding window, so no mask is
+    # needed. The area test rejects L shapes and other rectilinear polygons.
+    pts = pts.reshape(-1, 2).astype(np.int64)
+    following = np.roll(pts, -1, axis=0)
+    edges = following - pts
+    if not np.all((edges[:, 0] == 0) | (edges[:, 1] == 0)):
+        return False
+    area = abs(int((pts[:, 0] * following[:, 1] - following[:, 0] * pts[:, 1]).sum()))
+    extent = pts.max(axis=0) - pts.min(axis=0)
+    return area == 2 * int(extent[0]) * int(extent[1])
+
+def default_value_range(dtype) -> Tuple[float, float]:
+    dtype = np.dtype(dtype)
+    if dtype.kind not in 'ui':
+        raise ValueError('value_range is required for %s histograms' % dtype)
+    info = np.iinfo(dtype)
+    return float(info.min), float(info.max) + 1
+
+class RegionStatsEngine:
+    # Statistics for a fixed set of polygons over any number of frames. The
+    # clipped window and local mask of every polygon are built once per frame
+    # shape, so a video frame only pays for the masked reductions. Pixels
+    # outside a polygon are excluded, unlike stats taken on getShapeRegion.
+    #
+    # Axis-aligned rectangles need no mask; when they cover enough of the frame
+    # their mean and std come from one integral image instead of per-region
+    # passes (integral=None decides by area, True/False forces it).
+    def __init__(self, polygons, bins: int = 0, value_range: Optional[Tuple[float, float]] = None,
+                 minmax: bool = True, integral: Optional[bool] = None, workers: int = 1):
+        self.polygons = [np.asarray(pts, dtype=np.int32) for pts in polygons]
+        self.bins = bins
+        self.value_range = value_range
+        self.minmax = minmax
+        self.integral = integral
+        self.workers = workers
+        self._shape: Optional[tuple] = None
+        self._windows: List[Optional[Tuple[int, int, int, int]]] = []
+        self._masks: List[Optional[np.ndarray]] = []
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._aligned = np.zeros(0, dtype=bool)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def _prepare(self, shape):
+        shape = tuple(shape[:2])
+        if shape == self._shape:
+            return
+        self._windows = []
+        self._masks = []
+        counts = []
+        aligned = []
+        for pts in self.polygons:
+            window = clip_bounding_rect(pts, shape)
+            mask = None
+            count = 0
+            axis_aligned = False
+            if window is not None:
+                x0, y0, x1, y1 = window
+                if is_axis_aligned_rect(pts):
+                    axis_aligned = True
+                    count = (x1 - x0) * (y1 - y0)
+                else:
+                    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+                    cv2.fillPoly(mask, [pts], 255, offset=(-x0, -y0))
+                    count = cv2.countNonZero(mask)
+                    if count == 0:
+                        window = None
+            self._windows.append(window)
+            self._masks.append(mask)
+            counts.append(count)
+            aligned.append(axis_aligned)
+        self._counts = np.array(counts, dtype=np.int64)
+        self._aligned = np.array(aligned, dtype=bool)
+        self._shape = shape
+
+    def _use_integral(self, frame: np.ndarray) -> bool:
+        if self.integral is not None:
+            return self.integral and isinstance(frame, np.ndarray)
+        if not isinstance(frame, np.ndarray) or not self._aligned.any():
+            return False
+        # integral2 touches every pixel of the frame, at roughly the cost of
+        # per-region passes over twice its area
+        return self._counts[self._aligned].sum() >= 2 * frame.shape[0] * frame.shape[1]
+
+    def compute(self, frame) -> RegionStats:
+        # `frame` may be an ndarray or an ImageSource; the integral path needs
+        # the whole frame in memory, so sources always take per-region passes
+        self._prepare(frame.shape)
+        count = len(self.polygons)
+        channels = frame.shape[2] if len(frame.shape) > 2 else 1
+        mean = np.full((count, channels), np.nan)
+        std = np.full((count, channels), np.nan)
+        minimum = np.full((count, channels), np.nan) if self.minmax else None
+        maximum = np.full((count, channels), np.nan) if self.minmax else None
+        hist = None
+        value_range = None
+        if self.bins:
+            value_range = list(self.value_range or default_value_range(frame.dtype))
+            hist = np.zeros((count, channels, self.bins), dtype=np.int64)
+
+        integral_rows = np.zeros(count, dtype=bool)
+        if self._use_integral(frame):
+            integral_rows = self._aligned.copy()
+            rows = np.flatnonzero(integral_rows)
+            mean[rows], std[rows] = self._integral_mean_std(frame, rows)
+
+        def run(rows):
+            for i in rows:
+                window = self._windows[i]
+                if window is None:
+                    continue
+                x0, y0, x1, y1 = window
+                roi = frame[y0:y1, x0:x1]
+                mask = self._masks[i]
+                if not integral_rows[i]:
+                    m, s = cv2.meanStdDev(roi, mask=mask)
+                    mean[i], std[i] = m[:channels, 0], s[:channels, 0]
+                if self.minmax:
+                    planes = cv2.split(roi) if channels > 1 else (roi,)
+                    for c, plane in enumerate(planes):
+                        minimum[i, c], maximum[i, c] = cv2.minMaxLoc(plane, mask)[:2]
+                if hist is not None:
+                    for c in range(channels):
+                        hist[i, c] = cv2.calcHist([roi], [c], mask, [self.bins],
+                                                  value_range).reshape(-1)
+
+        indices = range(count)
+        if self.workers > 1 and count > 1:
+            # OpenCV releases the GIL, so regions split across threads scale
+            chunks = [indices[start::self.workers] for start in range(self.workers)]
+            list(self._get_executor().map(run, chunks))
+        else:
+            run(indices)
+        return RegionStats(self._counts.copy(), mean, std, minimum, maximum, hist)
+
+    def _integral_mean_std(self, frame: np.ndarray, rows: np.ndarray):
+        sums, squares = cv2.integral2(frame, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        if sums.ndim == 2:
+            sums, squares = sums[..., None], squares[..., None]
+        windows = np.array([self._windows[i] for i in rows], dtype=np.intp).reshape(-1, 4)
+        x0, y0, x1, y1 = windows.T
+        area = self._counts[rows][:, None].astype(np.float64)
+        box = lambda table: table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+        mean = box(sums) / area
+        variance = np.maximum(box(squares) / area - mean * mean, 0.0)
+        return mean, np.sqrt(variance)
+
+    def stream(self, frames):
+        # One RegionStats per frame, reusing the cached masks
+        for frame in frames:
+            yield self.compute(frame)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+def polygon_stats(image, pts: np.ndarray, **options) -> RegionStats:
+    # Single-region convenience; returns one row
+    return RegionStatsEngine([pts], **options).compute(image)[0]
@@ -1,6 +1,11 @@
 from .idrawableobject import InteractDrawableObject
-from PyQt5.QtCore import QPointF, Qt
-from PyQt5.QtGui import QPen
+from .regionextract import extract_deskewed_region
+from .shapemask import ShapeMask
+from .regionstats import RegionStats, polygon_stats
+from .cachestats import CacheStats
+from .drawbatch import DrawBatch
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt5.QtGui import QPolygonF
 
 from enum import Enum
 import numpy as np
@@ -17,6 +22,9 @@ class SelectionPoint(Enum):
     ROTATE = 4
 
 class RotationRectangle(InteractDrawableObject):
+    # Shared by all instances; derived geometry lookups and invalidations
+    cache_stats = CacheStats()
+
     def __init__(self, center_x=300, center_y=300, width=200, height=100, angle=0):
         super().__init__()
         self._center = QPointF(center_x, center_y)
@@ -32,6 +40,9 @@ class RotationRectangle(InteractDrawableObject):
         self._color = Qt.blue
         self._handle_color = Qt.green
         self._rotation_handle_color = Qt.red
+        self._geometry_cache = {}
+        self._styles = None
+        self.shape_mask = ShapeMask()
         
     @property
     def center(self) -> QPointF:
@@ -40,6 +51,7 @@ class RotationRectangle(InteractDrawableObject):
     @center.setter
     def center(self, value: QPointF):
         self._center = value
+        self._invalidate_geometry()
     
     @property
     def width(self) -> float:
@@ -48,6 +60,7 @@ class RotationRectangle(InteractDrawableObject):
     @width.setter
     def width(self, value: float):
         self._width = max(10, value)  
+        self._invalidate_geometry()
     
     @property
     def height(self) -> float:
@@ -56,6 +69,7 @@ class RotationRectangle(InteractDrawableObject):
     @height.setter
     def height(self, value: float):
         self._height = max(10, value) 
+        self._invalidate_geometry()
     
     @property
     def angle(self) -> float:
@@ -64,7 +78,14 @@ class RotationRectangle(InteractDrawableObject):
     @angle.setter
     def angle(self, value: float):
         self._angle = value % 360 
+        self._invalidate_geometry()
     
+    def set_pose(self, center_x: float, center_y: float, angle: float):
+        # Moves and turns with a single geometry notification
+        self._center = QPointF(center_x, center_y)
+        self._angle = angle % 360
+        self._invalidate_geometry()
+
     @property
     def color(self):
         return self._color
@@ -72,6 +93,7 @@ class RotationRectangle(InteractDrawableObject):
     @color.setter
     def color(self, value):
         self._color = value
+        self._styles = None
     
     @property
     def display(self):
@@ -81,30 +103,50 @@ class RotationRectangle(InteractDrawableObject):
     def display(self, value):
         self._display = value
 
+    def _invalidate_geometry(self):
+        self._geometry_cache.clear()
+        self.cache_stats.invalidations += 1
+        self.notify_geometry_changed()
+
+    def _cached(self, key, compute):
+        value = self._geometry_cache.get(key)
+        if value is None:
+            self.cache_stats.misses += 1
+            value = self._geometry_cache[key] = compute()
+        else:
+            self.cache_stats.hits += 1
+        return value
+
     def get_corners(self):
+        return self._cached('corners', self._compute_corners)
+
+    def _compute_corners(self):
         corners = []
         half_w = self._width / 2
         half_h = self._height / 2
         
         local_corners = [
-            QPointF(-half_w, -half_h),  # Top-left
-            QPointF(half_w, -half_h),   # Top-right
-            QPointF(half_w, half_h),    # Bottom-right
-            QPointF(-half_w, half_h)    # Bottom-left
+            (-half_w, -half_h),  # Top-left
+            (half_w, -half_h),   # Top-right
+            (half_w, half_h),    # Bottom-right
+            (-half_w, half_h)    # Bottom-left
         ]
         
         angle_rad = math.radians(self._angle)
         cos_a = math.cos(angle_rad)
         sin_a = math.sin(angle_rad)
         
-        for corner in local_corners:
-            x_rot = corner.x() * cos_a - corner.y() * sin_a
-            y_rot = corner.x() * sin_a + corner.y() * cos_a
+        for x, y in local_corners:
+            x_rot = x * cos_a - y * sin_a
+            y_rot = x * sin_a + y * cos_a
             corners.append(QPointF(x_rot + self._center.x(), y_rot + self._center.y()))
         
         return corners
     
     def get_rotation_handle_pos(self):
+        return self._cached('rotation_handle', self._compute_rotation_handle_pos)
+
+    def _compute_rotation_handle_pos(self):
         distance = max(self._width, self._height) / 2 + 20
         angle_rad = math.radians(self._angle)
         
@@ -112,6 +154,33 @@ class RotationRectangle(InteractDrawableObject):
         y = self._center.y() - distance * math.cos(angle_rad)
         
         return QPointF(x, y)
+
+    def get_inverse_rotation(self):
+        # (cos, sin) of -angle, maps scene offsets into the rectangle's local frame
+        return self._cached('inverse_rotation', self._compute_inverse_rotation)
+
+    def _compute_inverse_rotation(self):
+        angle_rad = math.radians(-self._angle)
+        return math.cos(angle_rad), math.sin(angle_rad)
+
+    def _compute_polygonf(self):
+        return QPolygonF(self.get_corners())
+
+    def get_polygon(self) -> np.ndarray:
+        # Integer corner polygon used for masks
+        return self._cached('polygon', lambda: np.array(
+            [[p.x(), p.y()] for p in self.get_corners()], dtype=np.int32))
+
+    def get_bounding_rect(self):
+        return self._cached('bounding_rect', self._compute_bounding_rect)
+
+    def _compute_bounding_rect(self):
+        points = self.get_corners() + [self.get_rotation_handle_pos()]
+        xs = [p.x() for p in points]
+        ys = [p.y() for p in points]
+        margin = self.selection_size
+        return QRectF(min(xs) - margin, min(ys) - margin,
+                      max(xs) - min(xs) + 2 * margin, max(ys) - min(ys) + 2 * margin)
     
     def findPoint(self, mouse_location):
         if self.is_position_change:
@@ -151,6 +220,7 @@ class RotationRectangle(InteractDrawableObject):
         if self.selectionPoint == SelectionPoint.MOVE:
             self._center += delta
             self._last_mouse_pos = mouse_location
+            self._invalidate_geometry()
             return True
         
         elif self.selectionPoint == SelectionPoint.ROTATE:
@@ -158,6 +228,7 @@ class RotationRectangle(InteractDrawableObject):
             new_angle = math.degrees(math.atan2(vec_to_mouse.x(), -vec_to_mouse.y()))
             self._angle = new_angle
             self._last_mouse_pos = mouse_location
+            self._invalidate_geometry()
             return True
         
         elif 0 <= self.selectionPoint.value <= 3: 
@@ -174,9 +245,7 @@ class RotationRectangle(InteractDrawableObject):
             
             new_center = (fixed_corner + moving_corner) / 2
             
-            angle_rad = math.radians(-self._angle)
-            cos_a = math.cos(angle_rad)
-            sin_a = math.sin(angle_rad)
+            cos_a, sin_a = self.get_inverse_rotation()
             
             local_vec = moving_corner - new_center
             local_x = local_vec.x() * cos_a - local_vec.y() * sin_a
@@ -189,15 +258,14 @@ class RotationRectangle(InteractDrawableObject):
                 self._width = new_width
                 self._height = new_height
                 self._center = new_center
+                self._invalidate_geometry()
             
             return True
         
         return False
     
     def _is_point_in_rotated_rect(self, point):
-        angle_rad = math.radians(-self._angle)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
+        cos_a, sin_a = self.get_inverse_rotation()
         
         local_point = point - self._center
         local_x = local_point.x() * cos_a - local_point.y() * sin_a
@@ -217,70 +285,79 @@ class RotationRectangle(InteractDrawableObject):
         self.selectionPoint = SelectionPoint.NONE
 
     def getShapeRegion(self, image: np.ndarray) -> np.ndarray:
-        corners = self.get_corners()
-        if len(corners) < 3:
-            return None
-        
-        pts = np.array([[p.x(), p.y()] for p in corners], dtype=np.int32)
-        mask = np.zeros(image.shape[:2], dtype=np.uint8)
-        cv2.fillPoly(mask, [pts], 255)
-        
-        result = cv2.bitwise_and(image, image, mask=mask)
-        
-        x, y, w, h = cv2.boundingRect(pts)
-        
-        if (x + w <= 0 or x >= image.shape[1] or 
-            y + h <= 0 or y >= image.shape[0]):
-            return np.array([])
-        
-        cropped = result[max(0, y):min(y+h, image.shape[0]), 
-                        max(0, x):min(x+w, image.shape[1])]
-        
-        return cropped
+        return self.shape_mask.extract(image, self.get_polygon())
+
+    def getShapeStats(self, image: np.ndarray, **options) -> RegionStats:
+        # Masked mean/std/min/max (and histogram with bins=N) over the pixels
+        # inside the rectangle, without building the crop
+        return polygon_stats(image, self.get_polygon(), **options)
+
+    def getDeskewedRegion(self, image: np.ndarray, interpolation=cv2.INTER_LINEAR) -> np.ndarray:
+        top_left = self.get_corners()[0]
+        size = (max(1, int(round(self._width))), max(1, int(round(self._height))))
+        return extract_deskewed_region(image, (top_left.x(), top_left.y()),
+                                       self._angle, size, interpolation)
 
     def draw(self, painter):
-        pen = QPen(self._color, 2)
-        pen.setCosmetic(True)
-        painter.setPen(pen)
-        painter.setBrush(Qt.NoBrush)
-        
-        corners = self.get_corners()
-        painter.drawPolygon(*corners)
-        
         scale = self.display.transform().m11() if self.display else 1.0
-        handle_size = max(4, int(6 / scale))
-        
-        painter.setPen(QPen(self._handle_color, 1))
-        painter.setBrush(self._handle_color)
+        batch = DrawBatch(scale)
+        self.draw_batch(batch)
+        batch.flush(painter)
+
+    def _get_styles(self):
+        if self._styles is None:
+            self._styles = (DrawBatch.style(self._color, 2, cosmetic=True),
+                            DrawBatch.style(self._handle_color, 1, brush_color=self._handle_color),
+                            DrawBatch.style(self._rotation_handle_color, 2),
+                            DrawBatch.style(Qt.yellow, 1, brush_color=Qt.yellow))
+        return self._styles
+
+    def _compute_outline_segments(self):
+        corners = self.get_corners()
+        return [corners[0], corners[1], corners[1], corners[2],
+                corners[2], corners[3], corners[3], corners[0]]
+
+    def draw_batch(self, batch):
+        styles = self._styles or self._get_styles()
+        if batch.dense and not batch.draw_handles:
+            # 1 px outlines without handles: edges join the style's single
+            # drawLines call instead of one drawPolygon per rectangle. This
+            # runs for thousands of shapes per frame, so the cache is read
+            # inline rather than through _cached.
+            segments = self._geometry_cache.get('segments')
+            if segments is None:
+                segments = self._cached('segments', self._compute_outline_segments)
+            else:
+                self.cache_stats.hits += 1
+            batch.add_segments(styles[0], segments)
+            return
+        outline, handle, rotation, center = styles
+        batch.add_polygon(outline, self._cached('polygonf', self._compute_polygonf))
+        if not batch.draw_handles_for(max(self._width, self._height)):
+            return
+
+        corners = self.get_corners()
+        handle_size = batch.handle_size
         for corner in corners:
-            painter.drawEllipse(
+            batch.add_ellipse(handle, QRectF(
                 corner.x() - handle_size / 2,
                 corner.y() - handle_size / 2,
                 handle_size,
                 handle_size
-            )
+            ))
         
         rot_handle = self.get_rotation_handle_pos()
-        painter.setPen(QPen(self._rotation_handle_color, 2))
-        painter.setBrush(Qt.NoBrush)
-        painter.drawEllipse(
+        batch.add_ellipse(rotation, QRectF(
             rot_handle.x() - handle_size,
             rot_handle.y() - handle_size,
             handle_size * 2,
             handle_size * 2
-        )
+        ))
+        batch.add_line(rotation, QLineF(self._center, rot_handle))
         
-        painter.drawLine(self._center, rot_handle)
-        
-        painter.setPen(QPen(Qt.yellow, 1))
-        painter.setBrush(Qt.yellow)
-        painter.drawEllipse(
+        batch.add_ellipse(center, QRectF(
             self._center.x() - handle_size / 3,
             self._center.y() - handle_size / 3,
             handle_size / 1.5,
             handle_size / 1.5
-        )
-    
-    def update(self):
-        if self.display:
-            self.display.invalidate()
\ No newline at end of file
+        ))
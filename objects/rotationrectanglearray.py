@@ -0,0 +1,283 @@
+from .idrawableobject import InteractDrawableObject
+from .rorationrectangle import RotationRectangle, SelectionPoint
+from .regionextract import extract_polygon_region, rotated_rect_corners
+from .regionstats import RegionStats, RegionStatsEngine
+from .drawbatch import DrawBatch
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPolygonF
+
+from typing import Dict, List, Optional
+import numpy as np
+
+class RotationRectangleArray(InteractDrawableObject):
+    # Structure-of-arrays store for many rotated rectangles. The whole store is
+    # one drawable object; a RotationRectangle proxy is created only for the
+    # row under the mouse and its edits are written back into the arrays.
+    CHUNK_SIZE = 256
+    # Per-row arrays, in the order they are saved
+    COLUMNS = ('cx', 'cy', 'width', 'height', 'angle', 'color', 'selected')
+
+    def __init__(self, cx=(), cy=(), width=(), height=(), angle=(), color=None):
+        super().__init__()
+        self._display = None
+        self.cx = np.asarray(cx, dtype=np.float64)
+        self.cy = np.asarray(cy, dtype=np.float64)
+        # Sizes are kept as given, like RotationRectangle's constructor; the
+        # 10 pixel floor only applies to edits through the proxy
+        self.width = np.asarray(width, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64)
+        self.angle = np.asarray(angle, dtype=np.float64)
+        if color is None:
+            color = np.full(len(self.cx), QColor(Qt.blue).rgba(), dtype=np.uint32)
+        self.color = np.asarray(color, dtype=np.uint32)
+        self.selected = np.zeros(len(self.cx), dtype=bool)
+
+        self._active_index: Optional[int] = None
+        self._active_proxy: Optional[RotationRectangle] = None
+        # Proxy bounds as of its last write-back
+        self._active_bounds: Optional[QRectF] = None
+        self._corners: Optional[np.ndarray] = None
+        self._chunk_paths = {}
+
+    def __len__(self):
+        return len(self.cx)
+
+    @classmethod
+    def from_columns(cls, columns) -> 'RotationRectangleArray':
+        # Any mapping of COLUMNS names to arrays, e.g. an open .npz file
+        store = cls(columns['cx'], columns['cy'], columns['width'], columns['height'],
+                    columns['angle'], columns['color'] if 'color' in columns else None)
+        if 'selected' in columns:
+            store.selected = np.asarray(columns['selected'], dtype=bool)
+        return store
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    @property
+    def display(self):
+        return self._display
+
+    @display.setter
+    def display(self, value):
+        self._display = value
+        if self._active_proxy is not None:
+            self._active_proxy.display = value
+
+    @property
+    def is_position_change(self) -> bool:
+        return self._active_proxy is not None and self._active_proxy.is_position_change
+
+    @is_position_change.setter
+    def is_position_change(self, value: bool):
+        if self._active_proxy is not None:
+            self._active_proxy.is_position_change = value
+
+    @property
+    def active_index(self) -> Optional[int]:
+        return self._active_index
+
+    def extend(self, cx, cy, width, height, angle, color=None):
+        count = len(np.atleast_1d(cx))
+        if color is None:
+            color = np.full(count, QColor(Qt.blue).rgba(), dtype=np.uint32)
+        first = len(self)
+        self.cx = np.concatenate([self.cx, np.atleast_1d(cx).astype(np.float64)])
+        self.cy = np.concatenate([self.cy, np.atleast_1d(cy).astype(np.float64)])
+        self.width = np.concatenate([self.width, np.atleast_1d(width).astype(np.float64)])
+        self.height = np.concatenate([self.height, np.atleast_1d(height).astype(np.float64)])
+        self.angle = np.concatenate([self.angle, np.atleast_1d(angle).astype(np.float64)])
+        self.color = np.concatenate([self.color, np.atleast_1d(color).astype(np.uint32)])
+        self.selected = np.concatenate([self.selected, np.zeros(count, dtype=bool)])
+        # Only the chunk the new rows start in and those after it change
+        self._invalidate_rows(first)
+
+    def set_rows(self, indices, cx, cy, width, height, angle):
+        # Overwrites the geometry of existing rows; they keep their color and
+        # are unselected
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.intp))
+        if not len(indices):
+            return
+        if self._active_index is not None and (indices == self._active_index).any():
+            self._release_proxy()
+        self.cx[indices] = cx
+        self.cy[indices] = cy
+        self.width[indices] = width
+        self.height[indices] = height
+        self.angle[indices] = angle
+        self.selected[indices] = False
+        self._corners = None
+        for chunk in np.unique(indices // self.CHUNK_SIZE).tolist():
+            self._chunk_paths.pop(chunk, None)
+        self.notify_geometry_changed()
+
+    def remove_rows(self, indices):
+        # Row indices or a boolean mask; later rows move up
+        keep = np.ones(len(self), dtype=bool)
+        keep[indices] = False
+        if keep.all():
+            return
+        first = int(np.argmin(keep))
+        # The proxy's row may move; it is re-created on the next hover
+        self._release_proxy()
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(self, name)[keep])
+        self._invalidate_rows(first)
+
+    def _invalidate_rows(self, first: int):
+        self._corners = None
+        first_chunk = first // self.CHUNK_SIZE
+        for chunk in [chunk for chunk in self._chunk_paths if chunk >= first_chunk]:
+            del self._chunk_paths[chunk]
+        self.notify_geometry_changed()
+
+    def select(self, indices, selected: bool = True):
+        self.selected[indices] = selected
+        self._chunk_paths.clear()
+
+    def invalidate_geometry(self, index: Optional[int] = None):
+        # Call after writing to the arrays directly
+        self._corners = None
+        if index is None:
+            self._chunk_paths.clear()
+        else:
+            self._chunk_paths.pop(index // self.CHUNK_SIZE, None)
+        self.notify_geometry_changed()
+
+    def get_corners(self) -> np.ndarray:
+        if self._corners is None:
+            self._corners = rotated_rect_corners(self.cx, self.cy, self.width,
+                                                 self.height, self.angle)
+        return self._corners
+
+    def get_bounding_rect(self):
+        if len(self) == 0:
+            return QRectF()
+        corners = self.get_corners()
+        reach = np.max(np.maximum(self.width, self.height)) / 2 + 20
+        margin = self.selection_size + reach
+        x0 = min(corners[..., 0].min(), self.cx.min() - reach) - margin
+        y0 = min(corners[..., 1].min(), self.cy.min() - reach) - margin
+        x1 = max(corners[..., 0].max(), self.cx.max() + reach) + margin
+        y1 = max(corners[..., 1].max(), self.cy.max() + reach) + margin
+        return QRectF(x0, y0, x1 - x0, y1 - y0)
+
+    def hit_test(self, mouse_location) -> np.ndarray:
+        # Indices of every rectangle whose handles or body are under the point
+        px, py = mouse_location.x(), mouse_location.y()
+        size = self.selection_size
+        angle_rad = np.radians(self.angle)
+        cos_a, sin_a = np.cos(angle_rad), np.sin(angle_rad)
+
+        distance = np.maximum(self.width, self.height) / 2 + 20
+        hit = (np.abs(self.cx + distance * sin_a - px) +
+               np.abs(self.cy - distance * cos_a - py)) < size
+        corners = self.get_corners()
+        hit |= ((np.abs(corners[..., 0] - px) + np.abs(corners[..., 1] - py)) < size).any(axis=1)
+        dx, dy = px - self.cx, py - self.cy
+        hit |= ((np.abs(dx * cos_a + dy * sin_a) <= self.width / 2) &
+                (np.abs(-dx * sin_a + dy * cos_a) <= self.height / 2))
+        return np.flatnonzero(hit)
+
+    def item(self, index: int) -> RotationRectangle:
+        if self._active_index == index:
+            return self._active_proxy
+        self._release_proxy()
+        proxy = RotationRectangle(self.cx[index], self.cy[index], self.width[index],
+                                  self.height[index], self.angle[index])
+        proxy.color = QColor.fromRgba(int(self.color[index]))
+        proxy.display = self._display
+        proxy.geometry_changed = self._write_back
+        self._active_index = index
+        self._active_proxy = proxy
+        self._active_bounds = proxy.get_bounding_rect()
+        self._chunk_paths.pop(index // self.CHUNK_SIZE, None)
+        return proxy
+
+    def _release_proxy(self):
+        if self._active_index is not None:
+            self._chunk_paths.pop(self._active_index // self.CHUNK_SIZE, None)
+        self._active_index = None
+        self._active_proxy = None
+        self._active_bounds = None
+
+    def _write_back(self, proxy):
+        index = self._active_index
+        self.cx[index] = proxy.center.x()
+        self.cy[index] = proxy.center.y()
+        self.width[index] = proxy.width
+        self.height[index] = proxy.height
+        self.angle[index] = proxy.angle
+        if self._corners is not None:
+            self._corners[index] = rotated_rect_corners(
+                self.cx[index:index + 1], self.cy[index:index + 1], self.width[index:index + 1],
+                self.height[index:index + 1], self.angle[index:index + 1])[0]
+        # The proxy draws the active row, so its chunk path stays valid and
+        # only the row's old and new area need repainting
+        old_bounds, self._active_bounds = self._active_bounds, proxy.get_bounding_rect()
+        self.notify_geometry_changed((old_bounds, self._active_bounds))
+
+    def findPoint(self, mouse_location):
+        if self.is_position_change:
+            return self._active_proxy.findPoint(mouse_location)
+
+        hits = self.hit_test(mouse_location)
+        if len(hits) == 0:
+            if self._active_proxy is not None:
+                self._active_proxy.selectionPoint = SelectionPoint.NONE
+            if self.display:
+                self.display.unsetCursor()
+            return False
+        return self.item(int(hits[0])).findPoint(mouse_location)
+
+    def selectPoint(self):
+        if self._active_proxy is not None:
+            self._active_proxy.selectPoint()
+
+    def resetSelectPoint(self):
+        if self._active_proxy is not None:
+            self._active_proxy.resetSelectPoint()
+
+    def getShapeRegion(self, image: np.ndarray) -> List[np.ndarray]:
+        polygons = self.get_corners().astype(np.int32)
+        return [extract_polygon_region(image, pts) for pts in polygons]
+
+    def getShapeStats(self, image: np.ndarray, **options) -> RegionStats:
+        return self.stats_engine(**options).compute(image)
+
+    def stats_engine(self, **options) -> RegionStatsEngine:
+        # Engine over the current rectangles, for running many frames
+        return RegionStatsEngine(self.get_corners().astype(np.int32), **options)
+
+    def _chunk_path(self, chunk: int):
+        paths = self._chunk_paths.get(chunk)
+        if paths is None:
+            start = chunk * self.CHUNK_SIZE
+            stop = min(start + self.CHUNK_SIZE, len(self))
+            corners = self.get_corners()
+            by_style = {}
+            for index in range(start, stop):
+                if index == self._active_index:
+                    continue
+                style = (int(self.color[index]), 3 if self.selected[index] else 2, True, None)
+                by_style.setdefault(style, []).append(
+                    QPolygonF([QPointF(x, y) for x, y in corners[index]]))
+            paths = self._chunk_paths[chunk] = [
+                (style, polygons, QPolygonF([p for polygon in polygons for p in polygon]).boundingRect())
+                for style, polygons in by_style.items()]
+        return paths
+
+    def draw(self, painter):
+        scale = self.display.transform().m11() if self.display else 1.0
+        batch = DrawBatch(scale)
+        self.draw_batch(batch)
+        batch.flush(painter)
+
+    def draw_batch(self, batch):
+        visible = batch.visible_rect
+        for chunk in range((len(self) + self.CHUNK_SIZE - 1) // self.CHUNK_SIZE):
+            for style, polygons, bounds in self._chunk_path(chunk):
+                if visible is None or visible.intersects(bounds):
+                    batch.add_polygons(style, polygons)
+        if self._active_proxy is not None:
+            self._active_proxy.draw_batch(batch)
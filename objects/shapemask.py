@@ -0,0 +1,104 @@
+from typing import List, Optional, Tuple
+import numpy as np
+import cv2
+
+from .cachestats import CacheStats
+
+class EdgeTable:
+    # Even-odd point-in-polygon test over a float outline. Non-horizontal
+    # edges are stored once as (y_low, y_high, x at y_low, dx/dy) and bucketed
+    # into horizontal bands, so a query only walks the few edges crossing its
+    # band instead of every edge of the outline.
+    def __init__(self, points: np.ndarray):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        start = points
+        end = np.roll(points, -1, axis=0)
+        keep = start[:, 1] != end[:, 1]
+        start, end = start[keep], end[keep]
+        swap = start[:, 1] > end[:, 1]
+        low = np.where(swap[:, None], end, start)
+        high = np.where(swap[:, None], start, end)
+        slope = (high[:, 0] - low[:, 0]) / (high[:, 1] - low[:, 1])
+        self.edges: List[Tuple[float, float, float, float]] = list(zip(
+            low[:, 1].tolist(), high[:, 1].tolist(), low[:, 0].tolist(), slope.tolist()))
+
+        if len(points):
+            self.x_min, self.y_min = points.min(axis=0).tolist()
+            self.x_max, self.y_max = points.max(axis=0).tolist()
+        else:
+            self.x_min = self.y_min = self.x_max = self.y_max = 0.0
+        # About one band per edge keeps two or three edges per band on
+        # convex outlines
+        bands = max(1, min(256, len(self.edges)))
+        self._band_height = (self.y_max - self.y_min) / bands or 1.0
+        self._bands: List[List[Tuple[float, float, float, float]]] = [[] for _ in range(bands)]
+        for edge in self.edges:
+            first = self._band(edge[0])
+            last = self._band(edge[1])
+            for band in range(first, last + 1):
+                self._bands[band].append(edge)
+
+    def _band(self, y: float) -> int:
+        return min(len(self._bands) - 1, max(0, int((y - self.y_min) / self._band_height)))
+
+    def contains(self, x: float, y: float) -> bool:
+        if not (self.x_min <= x <= self.x_max and self.y_min <= y <= self.y_max):
+            return False
+        inside = False
+        for y_low, y_high, x_low, slope in self._bands[self._band(y)]:
+            if y_low <= y < y_high and x_low + (y - y_low) * slope > x:
+                inside = not inside
+        return inside
+
+class ShapeMask:
+    # Rasterized mask of one shape over its bounding window clipped to the
+    # frame, reused while the integer polygon keeps its shape relative to that
+    # window and the window its size: unchanged ROIs on a video stream, and
+    # also shapes moved by whole pixels, only pay for the masked copy. The
+    # entry is replaced as one tuple, so a worker thread extracting while the
+    # GUI thread edits the shape sees either the old or the new mask.
+    cache_stats = CacheStats()
+
+    def __init__(self):
+        # (polygon, frame size, key, window, mask)
+        self._entry: Optional[tuple] = None
+
+    def window_mask(self, pts: np.ndarray, shape) -> Optional[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+        # Clipped window (x0, y0, x1, y1) and its uint8 mask, or None when the
+        # polygon misses the frame
+        size = shape[:2]
+        entry = self._entry
+        if entry is not None and entry[0] is pts and entry[1] == size:
+            # Shapes hand out the same cached polygon until their geometry changes
+            self.cache_stats.hits += 1
+            return entry[3], entry[4]
+        x, y, w, h = cv2.boundingRect(pts)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(x + w, shape[1]), min(y + h, shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return None
+        local = pts - np.array([x0, y0], dtype=pts.dtype)
+        key = local.tobytes() + np.array([x1 - x0, y1 - y0], dtype=np.int64).tobytes()
+        window = (x0, y0, x1, y1)
+        if entry is not None and entry[2] == key:
+            self.cache_stats.hits += 1
+            mask = entry[4]
+        else:
+            self.cache_stats.misses += 1
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv2.fillPoly(mask, [local], 255)
+        self._entry = (pts, size, key, window, mask)
+        return window, mask
+
+    def extract(self, image, pts: np.ndarray) -> np.ndarray:
+        # Same pixels as extract_polygon_region; `image` may be an ImageSource
+        found = self.window_mask(pts, image.shape)
+        if found is None:
+            return np.array([])
+        (x0, y0, x1, y1), mask = found
+        # copyTo into a new array zero-fills it first, and skips the AND
+        # bitwise_and would do
+        return cv2.copyTo(np.asarray(image[y0:y1, x0:x1]), mask)
+
+    def clear(self):
+        self._entry = None
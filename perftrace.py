@@ -0,0 +1,197 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+# (module, class or None for a module function, attribute, sample name)
+Hook = Tuple[str, Optional[str], str, str]
+
+DEFAULT_HOOKS: List[Hook] = [
+    ('imageviewer', 'ImageViewer', 'setImage', 'ImageViewer.setImage'),
+    ('imageviewer', 'ImageViewer', 'paintEvent', 'ImageViewer.paintEvent'),
+    ('imageviewer', 'ImageViewer', '_find_point', 'ImageViewer.hitTest'),
+    ('imageviewer', 'ImageViewer', '_apply_pending_move', 'ImageViewer.dragMove'),
+    ('objects.rorationrectangle', 'RotationRectangle', 'draw', 'RotationRectangle.draw'),
+    ('objects.rorationrectangle', 'RotationRectangle', 'draw_batch', 'RotationRectangle.draw_batch'),
+    ('objects.rorationrectangle', 'RotationRectangle', 'findPoint', 'RotationRectangle.findPoint'),
+    ('objects.rorationrectangle', 'RotationRectangle', 'getShapeRegion', 'RotationRectangle.getShapeRegion'),
+    ('objects.polygonshape', 'PolygonShape', 'findPoint', 'PolygonShape.findPoint'),
+    ('objects.polygonshape', 'PolygonShape', 'getShapeRegion', 'PolygonShape.getShapeRegion'),
+    ('imageconvert', None, 'ndarray_to_qimage', 'ndarray_to_qimage'),
+]
+
+def _load_module(name: str):
+    # A script run directly is loaded as __main__, not under its own name
+    main = sys.modules.get('__main__')
+    main_file = getattr(main, '__file__', None) or ''
+    if name not in sys.modules and os.path.splitext(os.path.basename(main_file))[0] == name:
+        return main
+    return importlib.import_module(name)
+
+class SampleRing:
+    # Fixed-size ring of (start, duration, thread id); old samples are
+    # overwritten. Plain lists keep append cheap; arrays() converts on read.
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.start = [0.0] * capacity
+        self.duration = [0.0] * capacity
+        self.thread = [0] * capacity
+        self.count = 0
+
+    def append(self, start: float, duration: float, thread: int):
+        i = self.count % self.capacity
+        self.start[i] = start
+        self.duration[i] = duration
+        self.thread[i] = thread
+        self.count += 1
+
+    def arrays(self):
+        valid = min(self.count, self.capacity)
+        return (np.array(self.start[:valid]), np.array(self.duration[:valid]),
+                self.thread[:valid])
+
+class PerfTracer(QObject):
+    # Timing hooks that are patched in by enable() and removed by disable(),
+    # so a disabled tracer leaves the original functions in place and costs
+    # nothing. Samples land in one SampleRing per hook name.
+    snapshotReady = pyqtSignal(dict)
+
+    def __init__(self, capacity: int = 4096, hooks: Optional[List[Hook]] = None, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.hooks = list(DEFAULT_HOOKS if hooks is None else hooks)
+        self.enabled = False
+        self._rings: Dict[str, SampleRing] = {}
+        self._lock = threading.Lock()
+        self._installed: List[Tuple[object, str, object]] = []
+        self._origin = time.perf_counter()
+        self._timer: Optional[QTimer] = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        for module_name, class_name, attribute, name in self.hooks:
+            module = _load_module(module_name)
+            if class_name is None:
+                original = getattr(module, attribute)
+                # `from module import fn` copies the reference, so rebind it in
+                # every loaded module that holds the same function
+                owners = [m for m in list(sys.modules.values())
+                          if getattr(m, '__dict__', {}).get(attribute) is original]
+            else:
+                owner = getattr(module, class_name)
+                original = owner.__dict__[attribute]
+                owners = [owner]
+            wrapper = self._wrap(original, self._ring(name))
+            for owner in owners:
+                self._installed.append((owner, attribute, original))
+                setattr(owner, attribute, wrapper)
+        self.enabled = True
+
+    def disable(self):
+        for owner, attribute, original in reversed(self._installed):
+            setattr(owner, attribute, original)
+        self._installed.clear()
+        self.enabled = False
+
+    def _ring(self, name: str) -> SampleRing:
+        with self._lock:
+            ring = self._rings.get(name)
+            if ring is None:
+                ring = self._rings[name] = SampleRing(self.capacity)
+            return ring
+
+    @staticmethod
+    def _wrap(function, ring: SampleRing):
+        # No lock on the hot path: under the GIL a sample racing another
+        # thread's can at worst overwrite one slot
+        append = ring.append
+        clock = time.perf_counter
+        get_ident = threading.get_ident
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                append(start, clock() - start, get_ident())
+        return timed
+
+    def record(self, name: str, start: float, duration: float):
+        self._ring(name).append(start, duration, threading.get_ident())
+
+    @contextmanager
+    def span(self, name: str):
+        # Ad-hoc timing for code that is not a hook; skipped while disabled
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            for ring in self._rings.values():
+                ring.count = 0
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        with self._lock:
+            rings = {name: (ring.arrays()[1] * 1000.0, ring.count)
+                     for name, ring in self._rings.items()}
+        for name, (durations, count) in rings.items():
+            if not len(durations):
+                continue
+            p50, p95, p99 = np.percentile(durations, (50, 95, 99))
+            result[name] = {'count': count, 'mean_ms': float(durations.mean()),
+                            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+                            'max_ms': float(durations.max())}
+        return result
+
+    def emit_snapshot(self):
+        self.snapshotReady.emit(self.summary())
+
+    def start_snapshots(self, interval_ms: int = 1000):
+        # Emits snapshotReady every interval from the GUI event loop
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self.emit_snapshot)
+        self._timer.start(interval_ms)
+
+    def stop_snapshots(self):
+        if self._timer is not None:
+            self._timer.stop()
+
+    def chrome_trace(self) -> dict:
+        # Complete ("X") events in microseconds, loadable in chrome://tracing
+        # and Perfetto
+        events = []
+        pid = os.getpid()
+        with self._lock:
+            for name, ring in self._rings.items():
+                starts, durations, threads = ring.arrays()
+                for start, duration, thread in zip(starts.tolist(), durations.tolist(), threads):
+                    events.append({'name': name, 'cat': name.split('.')[0], 'ph': 'X',
+                                   'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+                                   'pid': pid, 'tid': thread})
+        events.sort(key=lambda event: event['ts'])
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+# Shared tracer for the application; disabled until enable() is called
+tracer = PerfTracer()
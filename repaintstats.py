@@ -0,0 +1,40 @@
+from collections import deque
+import time
+
+class RepaintStats:
+    # Counts viewport repaints and repainted pixel area, with rates over a
+    # sliding window of `window` seconds
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.repaints = 0
+        self.pixels = 0
+        self._recent = deque()
+
+    def record(self, pixels: int):
+        now = time.perf_counter()
+        self.repaints += 1
+        self.pixels += pixels
+        self._recent.append((now, pixels))
+        self._trim(now)
+
+    def _trim(self, now):
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+    @property
+    def repaints_per_second(self) -> float:
+        self._trim(time.perf_counter())
+        return len(self._recent) / self.window
+
+    @property
+    def pixels_per_second(self) -> float:
+        self._trim(time.perf_counter())
+        return sum(pixels for _, pixels in self._recent) / self.window
+
+    def snapshot(self) -> dict:
+        return {'repaints': self.repaints, 'pixels': self.pixels,
+                'repaints_per_second': self.repaints_per_second,
+                'pixels_per_second': self.pixels_per_second}
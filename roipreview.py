@@ -0,0 +1,164 @@
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+from PyQt5.QtCore import QRectF, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+
+from collections import deque
+from typing import Optional
+import threading
+import time
+import numpy as np
+
+from framestream import LatestFrameBuffer
+from imageconvert import ndarray_to_qimage, qimage_format
+from objects.regionextract import extract_polygon_region
+
+class RoiPreview(QWidget):
+    # Live crop of one shape, extracted on a worker thread. request() only
+    # snapshots the geometry and drops it into a latest-wins slot, so a burst
+    # of drag updates costs one extraction and the GUI thread never waits.
+    # A request whose extraction raises is reported through failed and
+    # clears the preview; the worker keeps serving later requests.
+    resultReady = pyqtSignal(int, float, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(160, 120)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
+        self._requests = LatestFrameBuffer()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sequence = 0
+        self._shown_sequence = 0
+        self._image = None
+        self.resultReady.connect(self._show_result)
+        self.failed.connect(self._show_failure)
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.requested = 0
+        self.shown = 0
+        self.stale = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=256)
+        self._requests.dropped = 0
+
+    @property
+    def skipped(self) -> int:
+        # Requests replaced by a newer one before the worker got to them
+        return self._requests.dropped
+
+    def snapshot(self) -> dict:
+        latencies = np.array(self._latencies) * 1000.0
+        return {'requested': self.requested, 'shown': self.shown,
+                'skipped': self.skipped, 'stale': self.stale, 'errors': self.errors,
+                'latency_ms_mean': float(latencies.mean()) if len(latencies) else 0.0,
+                'latency_ms_max': float(latencies.max()) if len(latencies) else 0.0}
+
+    def request(self, image, shape):
+        # GUI thread. Shapes with a polygon hand over a copy of it so a drag in
+        # progress cannot change the geometry under the worker; their mask
+        # cache is keyed on the polygon, so reusing it stays consistent.
+        if image is None:
+            return
+        self._sequence += 1
+        self.requested += 1
+        if hasattr(shape, 'get_polygon'):
+            pts = shape.get_polygon().copy()
+            shape_mask = getattr(shape, 'shape_mask', None)
+            if shape_mask is not None:
+                extract = lambda: shape_mask.extract(image, pts)
+            else:
+                extract = lambda: extract_polygon_region(image, pts)
+        else:
+            extract = lambda: shape.getShapeRegion(image)
+        self._requests.put((self._sequence, extract))
+        self._ensure_worker()
+        self._wake.set()
+
+    def clear(self):
+        # Also discards results still in flight
+        self._sequence += 1
+        self._shown_sequence = self._sequence
+        self._requests.take()
+        self._image = None
+        self.update()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stop.is_set():
+                job, requested_at = self._requests.take()
+                if job is None:
+                    break
+                sequence, extract = job
+                try:
+                    image = self._to_qimage(extract())
+                except Exception as e:
+                    self.failed.emit(sequence, str(e))
+                    continue
+                self.resultReady.emit(sequence, requested_at, image)
+
+    @staticmethod
+    def _to_qimage(roi):
+        if isinstance(roi, list):
+            # Stores return one crop per row; show the first
+            roi = roi[0] if roi else np.array([])
+        if not roi.size:
+            return None
+        if qimage_format(roi) is None:
+            roi = ((roi >> 8) if roi.dtype == np.uint16 else
+                   np.clip(roi, 0, 255)).astype(np.uint8)
+        return ndarray_to_qimage(roi)
+
+    def _show_result(self, sequence, requested_at, image):
+        if sequence <= self._shown_sequence:
+            # Overtaken by clear() or a newer result
+            self.stale += 1
+            return
+        self._shown_sequence = sequence
+        self._image = image
+        self.shown += 1
+        self._latencies.append(time.perf_counter() - requested_at)
+        self.update()
+
+    def _show_failure(self, sequence, message):
+        self.errors += 1
+        if sequence <= self._shown_sequence:
+            return
+        self._shown_sequence = sequence
+        self._image = None
+        self.update()
+
+    def sizeHint(self):
+        return QSize(240, 240)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 88))
+        if self._image is None:
+            return
+        size = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+        target = QRectF((self.width() - size.width()) / 2, (self.height() - size.height()) / 2,
+                        size.width(), size.height())
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        painter.drawImage(target, self._image)
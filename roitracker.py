@@ -0,0 +1,299 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import math
+import os
+import threading
+import time
+import numpy as np
+import cv2
+
+from framestream import LatestFrameBuffer
+
+# (center x, center y, width, height, angle in degrees)
+Pose = Tuple[float, float, float, float, float]
+
+def gray_pyramid(frame: np.ndarray, levels: int) -> List[np.ndarray]:
+    if frame.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        frame = cv2.cvtColor(frame, code)
+    if frame.dtype != np.uint8:
+        frame = frame.astype(np.float32)
+    pyramid = [frame]
+    for _ in range(levels):
+        if min(pyramid[-1].shape[:2]) < 16:
+            break
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+def sample_patch(pyramid: List[np.ndarray], level: int, cx: float, cy: float,
+                 angle: float, size: Tuple[int, int]) -> np.ndarray:
+    # Patch of `size` pixels at pyramid `level`, centered on (cx, cy) in
+    # level-0 coordinates and rotated by `angle`, i.e. the deskewed contents
+    # pyrDown centers level pixel i on level-0 pixel 2i
+    scale = 2 ** level
+    cx /= scale
+    cy /= scale
+    angle_rad = math.radians(angle)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    ux = (size[0] - 1) / 2
+    uy = (size[1] - 1) / 2
+    matrix = np.array([[cos_a, -sin_a, cx - cos_a * ux + sin_a * uy],
+                       [sin_a, cos_a, cy - sin_a * ux - cos_a * uy]])
+    return cv2.warpAffine(pyramid[level], matrix, size,
+                          flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+def subpixel_peak(scores: np.ndarray, x: int, y: int) -> Tuple[float, float]:
+    # Parabola through the peak and its neighbours, per axis
+    def offset(left, center, right):
+        denominator = left - 2 * center + right
+        return 0.5 * (left - right) / denominator if denominator < 0 else 0.0
+    dx = offset(scores[y, x - 1], scores[y, x], scores[y, x + 1]) \
+        if 0 < x < scores.shape[1] - 1 else 0.0
+    dy = offset(scores[y - 1, x], scores[y, x], scores[y + 1, x]) \
+        if 0 < y < scores.shape[0] - 1 else 0.0
+    return x + dx, y + dy
+
+class TrackResult:
+    def __init__(self, key, start: Pose, pose: Pose, score: float, lost: bool):
+        self.key = key
+        # Pose the search started from; a shape edited since then is not moved
+        self.start = start
+        self.pose = pose
+        self.score = score
+        self.lost = lost
+
+class TrackState:
+    # Templates of the shape's deskewed contents, captured once per pyramid
+    # level it is matched on, plus the last tracked pose
+    def __init__(self, pose: Pose, coarse_level: int, fine_level: int):
+        self.pose = pose
+        self.coarse_level = coarse_level
+        self.fine_level = fine_level
+        self.templates: Dict[int, np.ndarray] = {}
+
+class TrackerStats:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.skipped = 0
+        self.lost = 0
+        self.over_budget = 0
+        # Frames whose tracking raised; the worker skips them and goes on
+        self.errors = 0
+        self.last_error = ''
+        self._times = deque(maxlen=256)
+
+    def record(self, seconds: float, lost: int):
+        self.frames += 1
+        self.lost += lost
+        self.over_budget += seconds > self.budget
+        self._times.append(seconds)
+
+    def record_error(self, message: str):
+        self.errors += 1
+        self.last_error = message
+
+    def snapshot(self) -> dict:
+        times = np.array(self._times) * 1000.0
+        return {'frames': self.frames, 'skipped': self.skipped, 'lost': self.lost,
+                'over_budget': self.over_budget, 'budget_ms': self.budget * 1000.0,
+                'errors': self.errors, 'last_error': self.last_error,
+                'mean_ms': float(times.mean()) if len(times) else 0.0,
+                'p95_ms': float(np.percentile(times, 95)) if len(times) else 0.0,
+                'max_ms': float(times.max()) if len(times) else 0.0}
+
+class RoiTracker(QObject):
+    # Follows rotated rectangles from frame to frame by matching the contents
+    # captured when tracking started. Each shape is searched only within
+    # search_radius pixels and max_rotation degrees of its last pose: a coarse
+    # pass over a downscaled pyramid level at a few candidate angles, then a
+    # refinement at a finer level with sub-pixel and sub-step interpolation.
+    # Shapes are matched in parallel; OpenCV releases the GIL.
+    #
+    # track() runs synchronously. submit() hands the frame to a worker thread
+    # through a latest-wins slot, so frames arriving faster than tracking are
+    # skipped instead of queued, and emits posesReady with the results.
+    posesReady = pyqtSignal(object)
+
+    def __init__(self, search_radius: float = 24.0, max_rotation: float = 3.0,
+                 min_score: float = 0.5, coarse_size: int = 24, fine_size: int = 32,
+                 workers: int = os.cpu_count() or 1, budget: float = 1.0 / 30, parent=None):
+        super().__init__(parent)
+        self.search_radius = search_radius
+        self.max_rotation = max_rotation
+        self.min_score = min_score
+        # Template sides, in pixels, that pick the coarse and fine levels
+        self.coarse_size = coarse_size
+        self.fine_size = fine_size
+        self.workers = workers
+        self.stats = TrackerStats(budget)
+        self._states: Dict[object, TrackState] = {}
+        self._resets = set()
+        self._reset_all = False
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._requests = LatestFrameBuffer()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reset(self, key=None):
+        # Forget a shape (or all of them); its template is captured again from
+        # the next frame at the pose it has then
+        with self._lock:
+            if key is None:
+                self._reset_all = True
+            else:
+                self._resets.add(key)
+
+    def _level_for(self, size: float, target: int) -> int:
+        return max(0, int(math.ceil(math.log2(max(size, 1) / target))))
+
+    def _capture(self, pyramid, pose: Pose) -> TrackState:
+        cx, cy, width, height, angle = pose
+        side = max(width, height)
+        fine = min(self._level_for(side, self.fine_size), len(pyramid) - 1)
+        coarse = min(max(fine, self._level_for(side, self.coarse_size)), len(pyramid) - 1)
+        state = TrackState(pose, coarse, fine)
+        for level in {coarse, fine}:
+            scale = 2 ** level
+            size = (max(4, int(round(width / scale))), max(4, int(round(height / scale))))
+            state.templates[level] = sample_patch(pyramid, level, cx, cy, angle, size)
+        return state
+
+    def _match(self, pyramid, state: TrackState, level: int, cx: float, cy: float,
+               angle: float, radius: int):
+        # Best (score, x offset, y offset) of the template in the rect's own
+        # frame, offsets in level-0 pixels
+        template = state.templates[level]
+        th, tw = template.shape[:2]
+        patch = sample_patch(pyramid, level, cx, cy, angle, (tw + 2 * radius, th + 2 * radius))
+        scores = cv2.matchTemplate(patch, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, peak = cv2.minMaxLoc(scores)
+        x, y = subpixel_peak(scores, *peak)
+        scale = 2 ** level
+        return score, (x - radius) * scale, (y - radius) * scale
+
+    def _track_one(self, pyramid, key, state: TrackState) -> TrackResult:
+        start = state.pose
+        cx, cy, width, height, angle = start
+        coarse, fine = state.coarse_level, state.fine_level
+
+        # Coarse: whole search window at three candidate angles
+        radius = max(2, int(math.ceil(self.search_radius / 2 ** coarse)))
+        best = None
+        for candidate in (angle - self.max_rotation, angle, angle + self.max_rotation):
+            score, du, dv = self._match(pyramid, state, coarse, cx, cy, candidate, radius)
+            if best is None or score > best[0]:
+                best = (score, candidate, du, dv)
+        score, angle, du, dv = best
+        if score < self.min_score:
+            return TrackResult(key, start, start, score, True)
+        angle_rad = math.radians(angle)
+        cx += du * math.cos(angle_rad) - dv * math.sin(angle_rad)
+        cy += du * math.sin(angle_rad) + dv * math.cos(angle_rad)
+
+        # Fine: a few pixels around the coarse hit, half a step either side,
+        # angle from a parabola through the three scores
+        radius = 2 ** (coarse - fine) + 1
+        step = self.max_rotation / 2
+        fits = [self._match(pyramid, state, fine, cx, cy, angle + k * step, radius)
+                for k in (-1, 0, 1)]
+        scores = [fit[0] for fit in fits]
+        k = int(np.argmax(scores))
+        score, du, dv = fits[k]
+        fine_angle = angle + (k - 1) * step
+        denominator = scores[0] - 2 * scores[1] + scores[2]
+        if denominator < 0:
+            vertex = 0.5 * (scores[0] - scores[2]) / denominator
+            fine_angle = angle + step * min(max(vertex, -1.5), 1.5)
+        angle_rad = math.radians(fine_angle)
+        cx += du * math.cos(angle_rad) - dv * math.sin(angle_rad)
+        cy += du * math.sin(angle_rad) + dv * math.cos(angle_rad)
+        pose = (cx, cy, width, height, fine_angle % 360)
+        state.pose = pose
+        return TrackResult(key, start, pose, score, False)
+
+    def track(self, frame: np.ndarray, poses: Dict[object, Pose]) -> List[TrackResult]:
+        # `poses` maps each tracked key to its current pose; keys seen for the
+        # first time (or reset) have their template captured from this frame
+        begin = time.perf_counter()
+        with self._lock:
+            resets, self._resets = self._resets, set()
+            if self._reset_all:
+                resets.update(self._states)
+                self._reset_all = False
+        for key in resets:
+            self._states.pop(key, None)
+        for key in list(self._states):
+            if key not in poses:
+                del self._states[key]
+
+        levels = max([self._level_for(max(p[2], p[3]), self.coarse_size) for p in poses.values()] or [0])
+        pyramid = gray_pyramid(frame, levels)
+        results = []
+        tracked = []
+        for key, pose in poses.items():
+            state = self._states.get(key)
+            if state is None or state.pose[2:4] != tuple(pose[2:4]):
+                self._states[key] = self._capture(pyramid, tuple(pose))
+                results.append(TrackResult(key, tuple(pose), tuple(pose), 1.0, False))
+            else:
+                tracked.append((key, state))
+
+        run = lambda item: self._track_one(pyramid, *item)
+        if self.workers > 1 and len(tracked) > 1:
+            matched = list(self._get_executor().map(run, tracked))
+        else:
+            matched = [run(item) for item in tracked]
+        results.extend(matched)
+        self.stats.record(time.perf_counter() - begin, sum(result.lost for result in matched))
+        return results
+
+    def submit(self, frame: np.ndarray, poses: Dict[object, Pose]):
+        # GUI thread; never blocks
+        self._requests.put((frame, poses))
+        self.stats.skipped = self._requests.dropped
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stop.is_set():
+                job, _ = self._requests.take()
+                if job is None:
+                    break
+                try:
+                    results = self.track(*job)
+                except Exception as e:
+                    self.stats.record_error(str(e))
+                    continue
+                self.posesReady.emit(results)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional, Set, Tuple
+from PyQt5.QtCore import QPointF, QRectF
+import math
+
+from objects.idrawableobject import InteractDrawableObject
+
+Cell = Tuple[int, int]
+
+class SpatialGridIndex:
+    # Uniform grid over object bounding rects. Objects without bounds, or whose
+    # bounds cover more than max_cells, are returned by every query.
+    def __init__(self, cell_size: float = 128, max_cells: int = 1024):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: Dict[Cell, Set[InteractDrawableObject]] = {}
+        self._object_cells: Dict[InteractDrawableObject, List[Cell]] = {}
+        self._object_rects: Dict[InteractDrawableObject, Optional[QRectF]] = {}
+        self._order: Dict[InteractDrawableObject, int] = {}
+        self._unbounded: Set[InteractDrawableObject] = set()
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, obj):
+        return obj in self._order
+
+    def clear(self):
+        self._cells.clear()
+        self._object_cells.clear()
+        self._object_rects.clear()
+        self._order.clear()
+        self._unbounded.clear()
+        self._next_order = 0
+
+    def rebuild(self, objects):
+        self.clear()
+        for obj in objects:
+            self.insert(obj)
+
+    def insert(self, obj: InteractDrawableObject):
+        self._order[obj] = self._next_order
+        self._next_order += 1
+        self._place(obj)
+
+    def update(self, obj: InteractDrawableObject):
+        if obj not in self._order:
+            return
+        self._unplace(obj)
+        self._place(obj)
+
+    def remove(self, obj: InteractDrawableObject):
+        if obj not in self._order:
+            return
+        self._unplace(obj)
+        del self._order[obj]
+
+    def bounds_of(self, obj: InteractDrawableObject) -> Optional[QRectF]:
+        # Bounding rect as of the last insert/update
+        return self._object_rects.get(obj)
+
+    def order_of(self, obj: InteractDrawableObject) -> int:
+        return self._order[obj]
+
+    def query_point(self, point: QPointF) -> List[InteractDrawableObject]:
+        cell = (math.floor(point.x() / self.cell_size), math.floor(point.y() / self.cell_size))
+        found = set(self._unbounded)
+        found.update(self._cells.get(cell, ()))
+        return sorted(found, key=self._order.__getitem__)
+
+    def query_rect(self, rect: QRectF) -> List[InteractDrawableObject]:
+        cells = self._cells_for(rect)
+        if cells is None:
+            # _order keeps insertion order
+            return list(self._order)
+        found = set(self._unbounded)
+        for cell in cells:
+            found.update(self._cells.get(cell, ()))
+        return sorted(found, key=self._order.__getitem__)
+
+    def _cells_for(self, rect: QRectF) -> Optional[List[Cell]]:
+        x0 = math.floor(rect.left() / self.cell_size)
+        y0 = math.floor(rect.top() / self.cell_size)
+        x1 = math.floor(rect.right() / self.cell_size)
+        y1 = math.floor(rect.bottom() / self.cell_size)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_cells:
+            return None
+        return [(i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1)]
+
+    def _place(self, obj):
+        rect = self._object_rects[obj] = obj.get_bounding_rect()
+        cells = self._cells_for(rect) if rect is not None else None
+        if cells is None:
+            self._unbounded.add(obj)
+            return
+        self._object_cells[obj] = cells
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(obj)
+
+    def _unplace(self, obj):
+        self._object_rects.pop(obj, None)
+        self._unbounded.discard(obj)
+        for cell in self._object_cells.pop(obj, ()):
+            bucket = self._cells[cell]
+            bucket.discard(obj)
+            if not bucket:
+                del self._cells[cell]
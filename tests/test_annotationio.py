@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
+
+from annotationio import (export_annotations_json, import_annotations_json, load_annotations,
+                          read_annotations, read_annotations_json, save_annotations)
+from notifyobjectcollection import NotifyObjectCollection
+from objects.ellipse import Ellipse
+from objects.idrawableobject import InteractDrawableObject
+from objects.polygon import Polygon
+from objects.rorationrectangle import RotationRectangle
+from objects.rotationrectanglearray import RotationRectangleArray
+
+def make_shapes():
+    rectangle = RotationRectangle(100.5, 80.25, 60, 30, 12.5)
+    rectangle.color = Qt.red
+    store = RotationRectangleArray([10, 20], [30, 40], [50, 60], [70, 80], [0, 90])
+    ellipse = Ellipse(200, 150, 40, 24, 33)
+    ellipse.color = QColor(10, 20, 30, 200)
+    triangle = Polygon([(0, 0), (50, 0), (25.5, 40)])
+    star = Polygon([(300 + 20 * np.cos(t), 300 + 20 * np.sin(t)) for t in np.linspace(0, 6, 7)])
+    star.color = Qt.green
+    return [rectangle, store, ellipse, triangle, star]
+
+def assert_same(collection, shapes):
+    rectangle, store, ellipse, triangle, star = shapes
+    loaded_store = collection[0]
+    assert isinstance(loaded_store, RotationRectangleArray) and len(loaded_store) == 3
+    assert np.allclose(loaded_store.cx, [rectangle.center.x(), 10, 20])
+    assert np.allclose(loaded_store.angle, [rectangle.angle, 0, 90])
+    assert loaded_store.color[0] == QColor(Qt.red).rgba()
+    loaded_ellipse, loaded_triangle, loaded_star = collection[1:]
+    assert isinstance(loaded_ellipse, Ellipse)
+    assert ((loaded_ellipse.center.x(), loaded_ellipse.center.y(), loaded_ellipse.width,
+             loaded_ellipse.height, loaded_ellipse.angle) ==
+            (ellipse.center.x(), ellipse.center.y(), ellipse.width, ellipse.height, ellipse.angle))
+    assert QColor(loaded_ellipse.color).rgba() == QColor(ellipse.color).rgba()
+    for loaded, original in ((loaded_triangle, triangle), (loaded_star, star)):
+        assert isinstance(loaded, Polygon)
+        assert np.allclose(loaded.points, original.points)
+        assert QColor(loaded.color).rgba() == QColor(original.color).rgba()
+
+@pytest.mark.parametrize('extension', ['.npz', '.json'])
+def test_round_trip_keeps_every_shape_type(tmp_path, extension):
+    shapes = make_shapes()
+    path = str(tmp_path / ('shapes' + extension))
+    collection = NotifyObjectCollection()
+    if extension == '.json':
+        export_annotations_json(path, shapes)
+        import_annotations_json(path, collection)
+    else:
+        save_annotations(path, shapes)
+        load_annotations(path, collection)
+    assert_same(collection, shapes)
+
+def test_version_1_file_still_loads(tmp_path):
+    path = str(tmp_path / 'old.npz')
+    store = RotationRectangleArray([1.0], [2.0], [30.0], [40.0], [5.0])
+    np.savez(path, version=np.array(1), **store.columns())
+    loaded, shapes = read_annotations(path)
+    assert len(loaded) == 1 and shapes == []
+
+def test_unsupported_objects_are_refused(tmp_path):
+    class Marker(InteractDrawableObject):
+        pass
+    with pytest.raises(ValueError):
+        save_annotations(str(tmp_path / 'bad.npz'), [RotationRectangle(), Marker()])
+
+def random_store(rng, count):
+    store = RotationRectangleArray(rng.uniform(0, 8000, count), rng.uniform(0, 6000, count),
+                                   rng.uniform(2, 300, count), rng.uniform(2, 300, count),
+                                   rng.uniform(0, 360, count),
+                                   rng.integers(0, 2 ** 32, count, dtype=np.uint32))
+    store.select(rng.random(count) < 0.1)
+    return store
+
+@pytest.mark.parametrize('save, read, name', [
+    (save_annotations, read_annotations, 'rows.npz'),
+    (lambda path, objects: save_annotations(path, objects, compressed=True), read_annotations, 'rows.npz'),
+    (export_annotations_json, read_annotations_json, 'rows.json'),
+])
+def test_rectangle_columns_round_trip_exactly(tmp_path, save, read, name):
+    store = random_store(np.random.default_rng(0), 5000)
+    path = str(tmp_path / name)
+    save(path, [store])
+    loaded, shapes = read(path)
+    assert shapes == []
+    for column in RotationRectangleArray.COLUMNS:
+        assert np.array_equal(getattr(loaded, column), getattr(store, column)), column
+        assert getattr(loaded, column).dtype == getattr(store, column).dtype, column
+
+@pytest.mark.parametrize('name', ['empty.npz', 'empty.json'])
+def test_empty_collection_round_trips(tmp_path, name):
+    path = str(tmp_path / name)
+    collection = NotifyObjectCollection()
+    if name.endswith('.json'):
+        export_annotations_json(path, [])
+        store = import_annotations_json(path, collection)
+    else:
+        save_annotations(path, [])
+        store = load_annotations(path, collection)
+    assert len(store) == 0
+    assert list(collection) == [store]
+
+def test_window_reports_a_broken_shapes_file(qapp, tmp_path, monkeypatch):
+    import keyboard
+    monkeypatch.setattr(keyboard, 'is_pressed', lambda key: False)
+    import imageviewer
+
+    path = str(tmp_path / 'broken.npz')
+    with open(path, 'wb') as f:
+        f.write(b'not an archive')
+    warnings = []
+    monkeypatch.setattr(imageviewer.QFileDialog, 'getOpenFileName', lambda *args: (path, ''))
+    monkeypatch.setattr(imageviewer.QMessageBox, 'warning', lambda *args: warnings.append(args))
+    window = imageviewer.MainTestWindow()
+    try:
+        before = list(window.view.drawable_object_collection)
+        window.load_shapes_from_file()
+        ((parent, title, message),) = warnings
+        assert parent is window and path in message
+        assert list(window.view.drawable_object_collection) == before
+    finally:
+        window.close()
@@ -0,0 +1,106 @@
+import json
+import os
+
+import numpy as np
+import cv2
+
+import batchextract
+from annotationio import save_annotations
+from objects.regionextract import extract_polygon_region
+from objects.rorationrectangle import RotationRectangle
+
+def write_layout(directory):
+    path = os.path.join(directory, 'layout.npz')
+    save_annotations(path, [RotationRectangle(40, 30, 40, 20, 0), RotationRectangle(60, 50, 30, 30, 45)])
+    return path
+
+def write_image(path, seed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    image = np.random.default_rng(seed).integers(0, 256, (80, 100, 3), dtype=np.uint8)
+    cv2.imwrite(path, image)
+    return cv2.imread(path, cv2.IMREAD_UNCHANGED)
+
+def read_entries(output):
+    with open(os.path.join(output, batchextract.INDEX_NAME)) as f:
+        return [json.loads(line) for line in f]
+
+def test_same_stem_inputs_get_separate_crops(tmp_path):
+    layout = write_layout(str(tmp_path))
+    images = {}
+    for seed, name in enumerate(('in/a/img.png', 'in/b/img.png', 'in/img.jpg')):
+        path = str(tmp_path / name)
+        images[path] = write_image(path, seed)
+    output = str(tmp_path / 'out')
+    batchextract.run(layout, [str(tmp_path / 'in' / '**' / '*.*')], output, workers=1)
+
+    entries = read_entries(output)
+    assert sorted(entry['image'] for entry in entries) == sorted(images)
+    files = [crop['file'] for entry in entries for crop in entry['crops']]
+    assert len(files) == len(set(files)) == 3 * 2
+    polygons = batchextract.load_layout(layout)
+    for entry in entries:
+        for crop, pts in zip(entry['crops'], polygons):
+            saved = cv2.imread(os.path.join(output, crop['file']), cv2.IMREAD_UNCHANGED)
+            assert np.array_equal(saved, extract_polygon_region(images[entry['image']], pts))
+
+def write_images(directory, names):
+    return {os.path.join(directory, name): write_image(os.path.join(directory, name), seed)
+            for seed, name in enumerate(names)}
+
+def test_resume_skips_images_already_in_the_index(tmp_path):
+    layout = write_layout(str(tmp_path))
+    inputs = str(tmp_path / 'in')
+    images = write_images(inputs, ('a.png', 'b.png', 'c.png'))
+    output = str(tmp_path / 'out')
+    batchextract.run(layout, [inputs], output, workers=1)
+    first = sorted(images)[0]
+    for crop in read_entries(output)[0]['crops']:
+        os.remove(os.path.join(output, crop['file']))
+
+    images.update(write_images(inputs, ('d.png',)))
+    batchextract.run(layout, [inputs], output, workers=1)
+    entries = read_entries(output)
+    assert [entry['image'] for entry in entries] == sorted(images)
+    # The first image was not processed again, so its removed crops stay gone
+    assert entries[0]['image'] == first
+    assert not any(os.path.exists(os.path.join(output, crop['file'])) for crop in entries[0]['crops'])
+    assert all(os.path.exists(os.path.join(output, crop['file']))
+               for entry in entries[1:] for crop in entry['crops'])
+
+def test_line_cut_off_by_a_crash_is_redone(tmp_path):
+    layout = write_layout(str(tmp_path))
+    inputs = str(tmp_path / 'in')
+    images = write_images(inputs, ('a.png', 'b.png', 'c.png'))
+    output = str(tmp_path / 'out')
+    batchextract.run(layout, [inputs], output, workers=1)
+    index_path = os.path.join(output, batchextract.INDEX_NAME)
+    with open(index_path) as f:
+        lines = f.readlines()
+    # Killed while writing the last entry
+    with open(index_path, 'w') as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:len(lines[2]) // 2])
+
+    batchextract.run(layout, [inputs], output, workers=1)
+    entries = read_entries(output)
+    assert [entry['image'] for entry in entries] == sorted(images)
+    assert all(entry['status'] == 'ok' for entry in entries)
+
+def test_failed_images_are_retried(tmp_path):
+    layout = write_layout(str(tmp_path))
+    inputs = str(tmp_path / 'in')
+    images = write_images(inputs, ('a.png',))
+    broken = os.path.join(inputs, 'b.png')
+    with open(broken, 'wb') as f:
+        f.write(b'not an image')
+    output = str(tmp_path / 'out')
+    batchextract.run(layout, [inputs], output, workers=1)
+    assert [entry['status'] for entry in read_entries(output)] == ['ok', 'unreadable']
+
+    write_image(broken, 7)
+    batchextract.run(layout, [inputs], output, workers=1)
+    entries = read_entries(output)
+    assert [(entry['image'], entry['status']) for entry in entries] == \
+        [(sorted(images)[0], 'ok'), (broken, 'unreadable'), (broken, 'ok')]
+    assert set(batchextract.read_index(os.path.join(output, batchextract.INDEX_NAME))) == \
+        set(images) | {broken}
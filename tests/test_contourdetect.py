@@ -0,0 +1,67 @@
+import numpy as np
+import cv2
+
+from contourdetect import ContourDetector, box_corners
+from notifyobjectcollection import NotifyObjectCollection
+from objects.rotationrectanglearray import RotationRectangleArray
+
+def make_board(rng, rows=12, columns=20, pitch=20):
+    image = np.zeros((rows * pitch, columns * pitch), dtype=np.uint8)
+    ys, xs = np.mgrid[0:rows, 0:columns]
+    boxes = np.column_stack([(xs.ravel() + 0.5) * pitch, (ys.ravel() + 0.5) * pitch,
+                             rng.uniform(8, 14, xs.size), rng.uniform(4, 8, xs.size),
+                             rng.uniform(0, 180, xs.size)])
+    cv2.fillPoly(image, list(box_corners(boxes).astype(np.int32)), 255)
+    return image
+
+def store_boxes(store):
+    return np.array(sorted(zip(store.cx, store.cy, store.width, store.height)))
+
+def detected_boxes(boxes):
+    return np.array(sorted(map(tuple, boxes[:, :4])))
+
+def test_populate_adds_one_store_with_every_detection():
+    image = make_board(np.random.default_rng(0))
+    detector = ContourDetector(min_area=10)
+    collection = NotifyObjectCollection()
+    store = detector.populate(collection, image)
+    assert list(collection) == [store]
+    assert isinstance(store, RotationRectangleArray)
+    # Small parts keep their detected size
+    assert np.allclose(store_boxes(store), detected_boxes(detector.detect(image)))
+
+    again = detector.populate(collection, image)
+    assert list(collection) == [again]
+
+def test_redetect_matches_full_detection():
+    rng = np.random.default_rng(1)
+    image = make_board(rng)
+    detector = ContourDetector(min_area=10)
+    collection = NotifyObjectCollection()
+    store = detector.populate(collection, image)
+    for _ in range(20):
+        x0, y0 = rng.integers(0, 360), rng.integers(0, 200)
+        window = (x0, y0, x0 + rng.integers(1, 60), y0 + rng.integers(1, 60))
+        image[window[1]:window[3], window[0]:window[2]] = 0
+        box = np.array([[rng.uniform(0, 400), rng.uniform(0, 240), rng.uniform(10, 80), 8, rng.uniform(0, 180)]])
+        patch = np.zeros_like(image)
+        cv2.fillPoly(patch, [box_corners(box).astype(np.int32)], 255)
+        image[window[1]:window[3], window[0]:window[2]] |= patch[window[1]:window[3], window[0]:window[2]]
+        detector.redetect(collection, image, window)
+        assert list(collection) == [store]
+        assert np.allclose(store_boxes(store), detected_boxes(detector.detect(image)))
+
+def test_row_edits_keep_untouched_chunk_paths():
+    count = 3 * RotationRectangleArray.CHUNK_SIZE
+    store = RotationRectangleArray(np.arange(count) * 2.0, np.zeros(count), np.full(count, 4.0),
+                                   np.full(count, 4.0), np.zeros(count))
+    for chunk in range(3):
+        store._chunk_path(chunk)
+    store.set_rows([count - 1], 5, 5, 20, 20, 0)
+    assert set(store._chunk_paths) == {0, 1}
+    assert store.width[-1] == 20
+    store.remove_rows([RotationRectangleArray.CHUNK_SIZE])
+    assert set(store._chunk_paths) == {0}
+    assert len(store) == count - 1
+    store.extend([1.0], [1.0], [3.0], [3.0], [0.0])
+    assert len(store) == count and store.width[-1] == 3
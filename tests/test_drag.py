@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+
+from objects.rorationrectangle import RotationRectangle
+
+class CountingRectangle(RotationRectangle):
+    # Counts hover tests, which a drag of another shape should not run
+    calls = 0
+
+    def findPoint(self, mouse_location):
+        CountingRectangle.calls += 1
+        return super().findPoint(mouse_location)
+
+def recorded_stream(seconds=0.5, rate=1000, center=(320, 200), radius=80):
+    # (t, x, y) rows of a 1000 Hz mouse tracing a circle, in scene coordinates
+    t = np.arange(int(seconds * rate) + 1) / rate
+    phase = 2 * np.pi * t / seconds
+    return np.stack([t, center[0] + radius * np.sin(phase),
+                     center[1] - radius * np.cos(phase) + radius], axis=1)
+
+def replay(app, stream, coalesce):
+    from imageviewer import ImageViewer
+    view = ImageViewer()
+    view.resize(640, 480)
+    view.show()
+    view.setImage(np.zeros((480, 640), dtype=np.uint8))
+    view.resetTransform()
+    view.setSceneRect(0, 0, 640, 480)
+    view.coalesce_drag_moves = coalesce
+    rng = np.random.default_rng(0)
+    collection = view.drawable_object_collection
+    with collection.batch_update():
+        collection.extend(CountingRectangle(*row) for row in zip(
+            rng.uniform(0, 640, 100).tolist(), rng.uniform(0, 480, 100).tolist(),
+            [30.0] * 100, [20.0] * 100, rng.uniform(0, 360, 100).tolist()))
+        dragged = RotationRectangle(stream[0, 1], stream[0, 2], 60, 40, 0)
+        collection.append(dragged)
+    app.processEvents()
+
+    updates = []
+    view.objectGeometryChanged.connect(lambda item: updates.append((time.perf_counter(), item)))
+    view.repaint_stats.reset()
+    to_view = lambda x, y: QPointF(view.mapFromScene(QPointF(x, y)))
+    start = to_view(*stream[0, 1:])
+    view.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, start, Qt.NoButton, Qt.NoButton, Qt.NoModifier))
+    view.mousePressEvent(QMouseEvent(QEvent.MouseButtonPress, start, Qt.LeftButton,
+                                     Qt.LeftButton, Qt.NoModifier))
+    assert view.currentObject is dragged
+    CountingRectangle.calls = 0
+    begin = time.perf_counter()
+    for t, x, y in stream[1:]:
+        while time.perf_counter() - begin < t:
+            app.processEvents()
+        view.mouseMoveEvent(QMouseEvent(QEvent.MouseMove, to_view(x, y), Qt.LeftButton,
+                                        Qt.LeftButton, Qt.NoModifier))
+    hover_tests = CountingRectangle.calls
+    during_drag = [t for t, item in updates]
+    view.mouseReleaseEvent(QMouseEvent(QEvent.MouseButtonRelease, to_view(*stream[-1, 1:]),
+                                       Qt.LeftButton, Qt.NoButton, Qt.NoModifier))
+    app.processEvents()
+    elapsed = time.perf_counter() - begin
+    pose = (dragged.center.x(), dragged.center.y(), dragged.width, dragged.height, dragged.angle)
+    paints = view.repaint_stats.repaints
+    view.close()
+    return {'updates': len(updates), 'paints': paints, 'elapsed': elapsed,
+            'hover_tests': hover_tests, 'pose': pose, 'frame_interval': view.frame_interval,
+            'times': during_drag,
+            'dragged': all(item is dragged for t, item in updates)}
+
+@pytest.fixture
+def viewer_app(qapp, monkeypatch):
+    import keyboard
+    monkeypatch.setattr(keyboard, 'is_pressed', lambda key: False)
+    return qapp
+
+def test_1000hz_drag_applies_one_move_per_frame(viewer_app):
+    stream = recorded_stream()
+    every = replay(viewer_app, stream, coalesce=False)
+    coalesced = replay(viewer_app, stream, coalesce=True)
+
+    # At most one geometry update per display frame, plus the move the
+    # release flushes, instead of one per event
+    frames = coalesced['elapsed'] / coalesced['frame_interval']
+    assert every['updates'] >= 0.9 * (len(stream) - 1)
+    assert 0 < coalesced['updates'] <= frames + 2
+    assert coalesced['dragged']
+    # Updates during the drag are a frame apart; only the release flush may come sooner
+    gaps = np.diff(coalesced['times'])
+    assert gaps.min() >= coalesced['frame_interval'] - 1e-3
+    # Paints follow the updates, not the event rate
+    assert coalesced['paints'] <= frames + 2
+    # Only the dragged shape is processed; hover is not tracked meanwhile
+    assert coalesced['hover_tests'] == 0
+    # Same final pose either way
+    assert np.allclose(coalesced['pose'], every['pose'])
+    assert np.allclose(coalesced['pose'][:2], stream[-1, 1:], atol=1e-6)
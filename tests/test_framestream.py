@@ -0,0 +1,60 @@
+import threading
+
+import numpy as np
+
+from framestream import FrameStream, LatestFrameBuffer
+
+def frames(count, shape=(48, 64)):
+    return [np.full(shape, index, dtype=np.uint8) for index in range(count)]
+
+def test_buffer_keeps_only_the_latest_frame():
+    buffer = LatestFrameBuffer()
+    first, second, third = frames(3)
+    assert buffer.put(first, 1.0)
+    assert not buffer.put(second, 2.0)
+    assert not buffer.put(third, 3.0)
+    frame, timestamp = buffer.take()
+    assert frame is third and timestamp == 3.0
+    assert (buffer.received, buffer.dropped) == (3, 2)
+    assert buffer.take()[0] is None
+    # A frame taken in time is not dropped
+    assert buffer.put(first)
+    assert buffer.take()[0] is first
+    assert buffer.dropped == 2
+
+def test_slow_consumer_gets_the_newest_frame(qapp):
+    source = frames(200)
+    stream = FrameStream(source)
+    taken = []
+    stream.frameReady.connect(lambda: taken.append(stream.buffer.take()[0]))
+    # The GUI thread is busy until the producer is done: every frame after
+    # the first only replaces the one waiting in the slot
+    stream.start()
+    stream._thread.join(5)
+    qapp.processEvents()
+    stream.stop()
+    delivered = [frame for frame in taken if frame is not None]
+    assert delivered[-1] is source[-1]
+    assert len(delivered) + stream.buffer.dropped == len(source)
+    assert stream.buffer.dropped > 0
+
+def test_viewer_shows_the_latest_pushed_frame(qapp, monkeypatch):
+    import keyboard
+    monkeypatch.setattr(keyboard, 'is_pressed', lambda key: False)
+    from imageviewer import ImageViewer
+
+    view = ImageViewer()
+    stream = FrameStream()
+    view.attachStream(stream)
+    try:
+        # From another thread, so deliveries queue behind the GUI thread
+        pushed = frames(5)
+        producer = threading.Thread(target=lambda: [stream.push(frame) for frame in pushed])
+        producer.start()
+        producer.join()
+        qapp.processEvents()
+        assert view.image is pushed[-1]
+        snapshot = view.stream_metrics.snapshot()
+        assert (snapshot['delivered'], snapshot['dropped']) == (1, 4)
+    finally:
+        view.detachStream()
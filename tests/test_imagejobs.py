@@ -0,0 +1,141 @@
+import os
+import threading
+
+import numpy as np
+import cv2
+from PyQt5.QtCore import QLineF, Qt
+
+from imagejobs import ImageLoader, ImageSaver
+from objects.drawbatch import DrawBatch
+
+class Recorder:
+    # Signal arguments per signal name; slots run queued on the GUI thread
+    def __init__(self, runner, *names):
+        self.calls = {name: [] for name in names}
+        for name in names:
+            getattr(runner, name).connect(lambda *args, name=name: self.calls[name].append(args))
+
+def make_image(height=120, width=160):
+    return np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+def block_worker(runner):
+    # Keeps the runner's only worker busy until the returned event is set, so
+    # jobs submitted meanwhile can be cancelled before they start
+    release = threading.Event()
+    runner._get_executor().submit(release.wait)
+    return release
+
+def test_load_decodes_the_file(qapp, tmp_path):
+    path = str(tmp_path / 'frame.png')
+    image = make_image()
+    cv2.imwrite(path, image)
+    loader = ImageLoader(workers=1)
+    recorder = Recorder(loader, 'loaded', 'progress', 'failed')
+    try:
+        job = loader.load(path)
+        source = job.wait(5)
+        qapp.processEvents()
+        assert np.array_equal(np.asarray(source), image)
+        ((job_id, loaded, display),) = recorder.calls['loaded']
+        assert job_id == job.id and loaded is source
+        assert (display.width(), display.height()) == (160, 120)
+        assert recorder.calls['progress'][-1] == (job.id, 1.0)
+        assert recorder.calls['failed'] == []
+    finally:
+        loader.shutdown(wait=True)
+
+def test_large_jpeg_sends_a_preview_first(qapp, tmp_path):
+    path = str(tmp_path / 'frame.jpg')
+    cv2.imwrite(path, make_image(800, 1200))
+    loader = ImageLoader(workers=1, preview_pixels=100 * 1000)
+    recorder = Recorder(loader, 'previewReady', 'loaded')
+    try:
+        job = loader.load(path)
+        assert job.wait(5).shape == (800, 1200, 3)
+        qapp.processEvents()
+        ((job_id, preview, factor),) = recorder.calls['previewReady']
+        assert job_id == job.id and factor == 4.0
+        assert preview.shape[:2] == (200, 300)
+        assert len(recorder.calls['loaded']) == 1
+    finally:
+        loader.shutdown(wait=True)
+
+def test_unreadable_file_fails(qapp, tmp_path):
+    path = str(tmp_path / 'broken.png')
+    with open(path, 'wb') as f:
+        f.write(b'not an image')
+    loader = ImageLoader(workers=1)
+    recorder = Recorder(loader, 'loaded', 'failed')
+    try:
+        job = loader.load(path)
+        assert job.wait(5) is None
+        qapp.processEvents()
+        assert [args[0] for args in recorder.calls['failed']] == [job.id]
+        assert recorder.calls['loaded'] == []
+    finally:
+        loader.shutdown(wait=True)
+
+def test_cancelled_load_emits_cancelled_only(qapp, tmp_path):
+    path = str(tmp_path / 'frame.png')
+    cv2.imwrite(path, make_image())
+    loader = ImageLoader(workers=1)
+    recorder = Recorder(loader, 'loaded', 'cancelled', 'failed')
+    try:
+        release = block_worker(loader)
+        job = loader.load(path)
+        job.cancel()
+        release.set()
+        assert job.wait(5) is None and job.cancelled
+        qapp.processEvents()
+        assert recorder.calls['cancelled'] == [(job.id,)]
+        assert recorder.calls['loaded'] == recorder.calls['failed'] == []
+    finally:
+        loader.shutdown(wait=True)
+
+def test_save_writes_the_image_and_overlays(qapp, tmp_path):
+    image = make_image()
+    saver = ImageSaver(workers=1)
+    recorder = Recorder(saver, 'saved', 'failed')
+    try:
+        plain = str(tmp_path / 'plain.png')
+        job = saver.save(plain, image)
+        assert job.wait(5) == plain
+        assert np.array_equal(cv2.imread(plain), image)
+
+        overlays = DrawBatch()
+        overlays.add_line(DrawBatch.style(Qt.red, 3), QLineF(0, 60, 160, 60))
+        marked = str(tmp_path / 'marked.png')
+        marked_job = saver.save(marked, image, overlays)
+        assert marked_job.wait(5) == marked
+        qapp.processEvents()
+        saved = cv2.imread(marked)
+        assert tuple(saved[60, 80]) == (0, 0, 255)
+        assert np.array_equal(saved[:50], image[:50])
+        assert recorder.calls['saved'] == [(job.id, plain), (marked_job.id, marked)]
+        assert recorder.calls['failed'] == []
+    finally:
+        saver.shutdown(wait=True)
+
+def test_cancelled_or_failed_save_keeps_the_previous_file(qapp, tmp_path):
+    path = str(tmp_path / 'frame.png')
+    previous = make_image(40, 50)
+    cv2.imwrite(path, previous)
+    saver = ImageSaver(workers=1)
+    recorder = Recorder(saver, 'saved', 'cancelled', 'failed')
+    try:
+        release = block_worker(saver)
+        job = saver.save(path, make_image())
+        job.cancel()
+        release.set()
+        assert job.wait(5) is None
+
+        bad = saver.save(str(tmp_path / 'frame.unknown'), make_image())
+        assert bad.wait(5) is None
+        qapp.processEvents()
+        assert recorder.calls['cancelled'] == [(job.id,)]
+        assert [args[0] for args in recorder.calls['failed']] == [bad.id]
+        assert recorder.calls['saved'] == []
+        assert np.array_equal(cv2.imread(path), previous)
+        assert sorted(os.listdir(str(tmp_path))) == ['frame.png']
+    finally:
+        saver.shutdown(wait=True)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from imagesource import ArraySource, ImageSource
+from objects.regionextract import extract_polygon_region
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROI = (12000.0, 9000.0, 300.0, 120.0, 30.0)
+
+# Peak RSS growth (VmHWM) of opening a file and cropping one ROI from it,
+# measured in a fresh process after its imports
+CROP = '''
+import sys
+from imagesource import open_image_source
+from objects.rorationrectangle import RotationRectangle
+
+def peak():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmHWM:'))
+
+path, height, width = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+before = peak()
+shape = None if path.endswith('.npy') else (height, width)
+roi = RotationRectangle(%r, %r, %r, %r, %r).getShapeRegion(open_image_source(path, shape=shape))
+print(peak() - before, int(roi.sum()))
+''' % ROI
+
+def test_image_source_is_abstract():
+    with pytest.raises(TypeError):
+        ImageSource()
+
+    class Incomplete(ImageSource):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_windows_match_the_array():
+    array = np.arange(40 * 30 * 3, dtype=np.uint8).reshape(30, 40, 3)
+    source = ArraySource(array)
+    assert source.shape == array.shape and source.ndim == 3
+    assert np.array_equal(source[5:20, 7:33], array[5:20, 7:33])
+    pts = np.array([[3, 2], [30, 6], [25, 25], [5, 20]], dtype=np.int32)
+    assert np.array_equal(extract_polygon_region(source, pts), extract_polygon_region(array, pts))
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason='needs /proc for peak RSS')
+@pytest.mark.parametrize('extension', ['.npy', '.raw'])
+def test_crop_from_large_file_keeps_rss_bounded(tmp_path, extension):
+    # 1 GiB sparse file; only the rows around the ROI are written
+    height, width = 2 ** 30 // 40000, 40000
+    path = str(tmp_path / ('big' + extension))
+    if extension == '.npy':
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(height, width))
+    else:
+        array = np.memmap(path, dtype=np.uint8, mode='w+', shape=(height, width))
+    array[8500:9500, 11500:12500] = np.arange(1000, dtype=np.uint8)
+    array.flush()
+    del array
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, '-c', CROP, path, str(height), str(width)],
+                         capture_output=True, text=True, check=True, env=env, cwd=ROOT).stdout.split()
+    growth, total = int(out[0]), int(out[1])
+    assert total > 0
+    assert growth < 64 * 2 ** 20
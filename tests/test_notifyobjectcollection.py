@@ -0,0 +1,151 @@
+from notifyobjectcollection import NotifyObjectCollection
+from objects.rorationrectangle import RotationRectangle
+
+def make(count):
+    return [RotationRectangle(10 * i, 10, 20, 20, 0) for i in range(count)]
+
+def assert_members(collection, outside=()):
+    for item in collection:
+        assert item in collection
+        assert collection.get_by_id(id(item)) is item
+    for item in outside:
+        assert item not in collection
+        assert collection.get_by_id(id(item)) is None
+
+def test_membership_follows_list_mutations():
+    a, b, c, d = make(4)
+    collection = NotifyObjectCollection([a])
+    collection.insert(0, b)
+    assert_members(collection, (c, d))
+    del collection[0]
+    assert_members(collection, (b, c, d))
+    collection += [c, d]
+    assert collection.pop() is d
+    assert_members(collection, (b, d))
+    collection[0] = b
+    assert_members(collection, (a, d))
+    collection[:] = [c, d]
+    assert_members(collection, (a, b))
+    del collection[:1]
+    assert_members(collection, (a, b, c))
+    collection *= 2
+    assert_members(collection, (a, b, c))
+
+def test_duplicates_stay_members_until_last_copy():
+    a, b = make(2)
+    collection = NotifyObjectCollection()
+    collection.append(a)
+    collection.append(a)
+    collection.remove(a)
+    assert len(collection) == 1 and a in collection
+    collection.remove(a)
+    assert a not in collection
+
+def test_remove_items_drops_every_copy_and_reports_once():
+    a, b, c = make(3)
+    collection = NotifyObjectCollection()
+    changes = []
+    collection.changed_collection = lambda sender, change: changes.append(change)
+    collection.extend([a, b, a, c])
+    collection.remove_items([a, b])
+    assert list(collection) == [c]
+    assert_members(collection, (a, b))
+    assert len(changes) == 2 and sorted(map(id, changes[1].removed)) == sorted((id(a), id(b)))
+
+def test_replace_and_clear():
+    a, b = make(2)
+    collection = NotifyObjectCollection([a])
+    collection.replace(a, b)
+    assert_members(collection, (a,))
+    collection.clear()
+    assert_members(collection, (a, b))
+
+def test_extract_regions_matches_per_shape_masks_and_reuses_them():
+    import numpy as np
+    from objects.ellipse import Ellipse
+    from objects.polygon import Polygon
+    from objects.regionextract import extract_polygon_region
+    from objects.shapemask import ShapeMask
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (240, 320, 3), dtype=np.uint8) for _ in range(2)]
+    collection = NotifyObjectCollection(make(5) + [Ellipse(150, 120, 60, 30, 20),
+                                                   Polygon([(200, 20), (300, 40), (260, 200)])])
+    for workers in (1, 2):
+        for frame in frames:
+            regions = collection.extract_regions(frame, workers=workers)
+            expected = [extract_polygon_region(frame, item.get_polygon()) for item in collection]
+            assert all(np.array_equal(a, b) for a, b in zip(regions, expected))
+        ShapeMask.cache_stats.reset()
+    collection.extract_regions(frames[0])
+    assert ShapeMask.cache_stats.misses == 0
+
+def test_every_mutation_reports_a_change():
+    a, b, c, d = make(4)
+    collection = NotifyObjectCollection()
+    changes = []
+    collection.changed_collection = lambda sender, change: changes.append(change)
+    collection.append(a)
+    collection.insert(0, b)
+    collection += [c]
+    assert [[id(item) for item in change.added] for change in changes] == [[id(a)], [id(b)], [id(c)]]
+    del changes[:]
+    assert collection.pop(0) is b
+    del collection[-1]
+    collection[0] = d
+    assert [(change.start, [id(i) for i in change.added], [id(i) for i in change.removed])
+            for change in changes] == [(0, [], [id(b)]), (1, [], [id(c)]), (0, [id(d)], [id(a)])]
+    # A second copy is no new member, and removing it leaves the first
+    del changes[:]
+    collection.append(d)
+    del collection[0]
+    collection *= 1
+    assert changes == []
+    collection.reverse()
+    assert changes[-1].reordered
+
+class RecordingRectangle(RotationRectangle):
+    drawn = set()
+
+    def draw_batch(self, batch):
+        self.drawn.add(id(self))
+        super().draw_batch(batch)
+
+def test_viewer_follows_plain_list_mutations(qapp, monkeypatch):
+    import keyboard
+    import numpy as np
+    from PyQt5.QtCore import QPointF
+    monkeypatch.setattr(keyboard, 'is_pressed', lambda key: False)
+    from imageviewer import ImageViewer
+
+    view = ImageViewer()
+    view.resize(640, 480)
+    view.setImage(np.zeros((300, 400, 3), dtype=np.uint8))
+    collection = view.drawable_object_collection
+    a, b, c, d, e = [RecordingRectangle(40 + 80 * i, 150, 40, 40, 0) for i in range(5)]
+    collection.extend([a, b, c])
+
+    def check():
+        RecordingRectangle.drawn.clear()
+        view.viewport().grab()
+        assert RecordingRectangle.drawn == {id(item) for item in collection}
+        assert sorted(collection, key=view.object_index.order_of) == list(collection)
+        assert len(view.object_index) == len(collection)
+        for item in (a, b, c, d, e):
+            view._hovered_objects.clear()
+            assert view._find_point(item.center) == (item in collection)
+
+    collection.append(d)
+    check()
+    collection.pop(0)
+    check()
+    del collection[0]
+    check()
+    collection[0] = e
+    check()
+    collection.insert(0, a)
+    collection[1:1] = [b]
+    check()
+    collection.reverse()
+    check()
+    collection.sort(key=lambda item: item.center.x())
+    check()
@@ -0,0 +1,60 @@
+import numpy as np
+import cv2
+import pytest
+
+from notifyobjectcollection import NotifyObjectCollection
+from objects.polygon import Polygon
+from objects.regionstats import RegionStatsEngine, is_axis_aligned_rect
+
+# L shape over a 51x51 window whose missing top-right 20x20 corner is bright
+L_SHAPE = [(0, 0), (30, 0), (30, 30), (50, 30), (50, 50), (0, 50)]
+
+def make_frame():
+    frame = np.full((80, 80), 10, dtype=np.uint8)
+    frame[0:30, 31:51] = 200
+    return frame
+
+def masked_truth(frame, pts):
+    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [np.asarray(pts, dtype=np.int32)], 255)
+    values = frame[mask > 0].astype(np.float64)
+    return len(values), values.mean(), values.std(), values.min(), values.max()
+
+def test_only_full_rectangles_skip_the_mask():
+    assert is_axis_aligned_rect(np.array([(5, 5), (40, 5), (40, 20), (5, 20)]))
+    # Extra collinear vertex, still the full box
+    assert is_axis_aligned_rect(np.array([(5, 5), (20, 5), (40, 5), (40, 20), (5, 20)]))
+    assert not is_axis_aligned_rect(np.array(L_SHAPE))
+    assert not is_axis_aligned_rect(np.array([(0, 0), (40, 10), (30, 40)]))
+
+@pytest.mark.parametrize('integral', [None, True, False])
+def test_l_shaped_polygon_stats_exclude_the_missing_corner(integral):
+    frame = make_frame()
+    count, mean, std, low, high = masked_truth(frame, L_SHAPE)
+    stats = RegionStatsEngine([L_SHAPE], integral=integral).compute(frame)[0]
+    assert stats.count == count == 51 * 51 - 20 * 30
+    assert np.allclose(stats.mean, mean) and np.allclose(stats.std, std)
+    assert (stats.min[0], stats.max[0]) == (low, high) == (10, 10)
+
+def test_l_shape_through_shapes_and_collection():
+    frame = make_frame()
+    polygon = Polygon(L_SHAPE)
+    count, mean = masked_truth(frame, polygon.get_polygon())[:2]
+    stats = polygon.getShapeStats(frame)
+    assert stats.count == count and np.allclose(stats.mean, mean)
+    collection_stats = NotifyObjectCollection([polygon]).region_stats(frame)
+    assert collection_stats.count[0] == count and np.allclose(collection_stats.mean[0], mean)
+
+def test_rectangles_match_with_and_without_the_integral_image():
+    frame = np.random.default_rng(0).integers(0, 256, (60, 90, 3), dtype=np.uint8)
+    rectangles = [[(2, 3), (40, 3), (40, 30), (2, 30)], [(50, 10), (85, 10), (85, 55), (50, 55)]]
+    fast = RegionStatsEngine(rectangles, integral=True).compute(frame)
+    slow = RegionStatsEngine(rectangles, integral=False).compute(frame)
+    for i, pts in enumerate(rectangles):
+        x0, y0 = pts[0]
+        x1, y1 = pts[2]
+        window = frame[y0:y1 + 1, x0:x1 + 1].reshape(-1, 3).astype(np.float64)
+        assert fast.count[i] == len(window)
+        assert np.allclose(fast.mean[i], window.mean(axis=0))
+        assert np.allclose(slow.mean[i], window.mean(axis=0))
+        assert np.allclose(fast.std[i], slow.std[i])
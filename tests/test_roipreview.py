@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+
+from roipreview import RoiPreview
+from objects.rorationrectangle import RotationRectangle
+from objects.rotationrectanglearray import RotationRectangleArray
+
+class FailingShape:
+    def getShapeRegion(self, image):
+        raise RuntimeError('extractor failed')
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return condition()
+
+def test_failing_extractor_does_not_stop_the_worker(qapp):
+    image = np.random.default_rng(0).integers(0, 256, (200, 200, 3), dtype=np.uint8)
+    preview = RoiPreview()
+    messages = []
+    preview.failed.connect(lambda sequence, message: messages.append(message))
+    try:
+        preview.request(image, RotationRectangle(100, 100, 60, 40, 0))
+        assert wait_for(qapp, lambda: preview.shown == 1)
+        assert preview._image is not None
+
+        preview.request(image, FailingShape())
+        assert wait_for(qapp, lambda: preview.errors == 1)
+        assert messages == ['extractor failed']
+        assert preview._image is None
+        assert preview.snapshot()['errors'] == 1
+
+        preview.request(image, RotationRectangle(80, 80, 30, 30, 45))
+        assert wait_for(qapp, lambda: preview.shown == 2)
+        assert preview._image is not None
+    finally:
+        preview.stop()
+
+def test_store_results_show_one_crop(qapp):
+    image = np.zeros((200, 200), dtype=np.uint8)
+    preview = RoiPreview()
+    try:
+        store = RotationRectangleArray([50, 150], [50, 150], [40, 20], [30, 20], [0, 0])
+        preview.request(image, store)
+        assert wait_for(qapp, lambda: preview.shown == 1)
+        assert preview.errors == 0
+        height, width = store.getShapeRegion(image)[0].shape
+        assert (preview._image.width(), preview._image.height()) == (width, height)
+    finally:
+        preview.stop()
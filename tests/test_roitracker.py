@@ -0,0 +1,35 @@
+import time
+
+import numpy as np
+
+from roitracker import RoiTracker
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return condition()
+
+def test_failing_frame_is_recorded_and_worker_keeps_going(qapp):
+    frame = np.random.default_rng(0).integers(0, 256, (240, 320), dtype=np.uint8)
+    poses = {'a': (160.0, 120.0, 60.0, 40.0, 0.0)}
+    tracker = RoiTracker(workers=1)
+    results = []
+    tracker.posesReady.connect(results.append)
+    try:
+        # Not an image: tracking this frame raises on the worker
+        tracker.submit(None, poses)
+        assert wait_for(qapp, lambda: tracker.stats.errors == 1)
+        assert tracker.stats.snapshot()['last_error']
+
+        tracker.submit(frame, poses)
+        assert wait_for(qapp, lambda: len(results) == 1)
+        tracker.submit(frame, poses)
+        assert wait_for(qapp, lambda: len(results) == 2)
+        (result,) = results[-1]
+        assert not result.lost
+        assert np.allclose(result.pose[:2], poses['a'][:2], atol=0.5)
+        assert tracker.stats.snapshot()['errors'] == 1
+    finally:
+        tracker.stop()
@@ -0,0 +1,66 @@
+import numpy as np
+from PyQt5.QtCore import QEvent, QPointF, QRectF, Qt
+from PyQt5.QtGui import QMouseEvent
+
+from objects.regionextract import rotated_rect_corners
+from objects.rotationrectanglearray import RotationRectangleArray
+
+def make_viewer(monkeypatch, store):
+    import keyboard
+    monkeypatch.setattr(keyboard, 'is_pressed', lambda key: False)
+    from imageviewer import ImageViewer
+    view = ImageViewer()
+    view.resize(800, 600)
+    view.show()
+    view.setImage(np.zeros((600, 800), dtype=np.uint8))
+    view.resetTransform()
+    view.setSceneRect(0, 0, 800, 600)
+    view.coalesce_drag_moves = False
+    view.drawable_object_collection.append(store)
+    return view
+
+def mouse(view, kind, point, buttons=Qt.LeftButton):
+    button = Qt.NoButton if kind == QEvent.MouseMove else Qt.LeftButton
+    event = QMouseEvent(kind, QPointF(view.mapFromScene(point)), button, buttons, Qt.NoModifier)
+    {QEvent.MouseMove: view.mouseMoveEvent, QEvent.MouseButtonPress: view.mousePressEvent,
+     QEvent.MouseButtonRelease: view.mouseReleaseEvent}[kind](event)
+
+def test_dragging_a_row_repaints_only_that_row(qapp, monkeypatch):
+    rng = np.random.default_rng(0)
+    store = RotationRectangleArray(rng.uniform(50, 750, 400), rng.uniform(50, 550, 400),
+                                   np.full(400, 20.0), np.full(400, 12.0), rng.uniform(0, 90, 400))
+    store.cx[0], store.cy[0], store.angle[0] = 400.0, 300.0, 0.0
+    view = make_viewer(monkeypatch, store)
+    try:
+        corners = store.get_corners()
+        indexed = view.object_index.bounds_of(store)
+        dirty = []
+        monkeypatch.setattr(view, '_mark_dirty', dirty.append)
+
+        mouse(view, QEvent.MouseMove, QPointF(400, 300), Qt.NoButton)
+        mouse(view, QEvent.MouseButtonPress, QPointF(400, 300))
+        assert store.active_index == 0 and view.currentObject is store
+        dirty.clear()
+        mouse(view, QEvent.MouseMove, QPointF(430, 310))
+
+        # Corners are updated in place, for the dragged row only
+        assert store.get_corners() is corners
+        expected = rotated_rect_corners(store.cx, store.cy, store.width, store.height, store.angle)
+        assert np.allclose(corners, expected)
+        assert np.allclose(corners[0].mean(axis=0), (430, 310))
+        # Only the row's old and new area is dirty, not the whole store
+        assert len(dirty) == 2
+        old, new = dirty
+        assert old.contains(QPointF(400, 300)) and new.contains(QPointF(430, 310))
+        assert max(old.width(), new.width()) < 60
+        assert view.object_index.bounds_of(store) == indexed
+
+        # Dragged past the store's bounds, the index grows to follow
+        mouse(view, QEvent.MouseMove, QPointF(790, 590))
+        mouse(view, QEvent.MouseButtonRelease, QPointF(790, 590), Qt.NoButton)
+        assert view.object_index.bounds_of(store).contains(dirty[-1])
+        assert store in view.object_index.query_point(QPointF(790, 590))
+        assert np.allclose(store.get_corners(), rotated_rect_corners(
+            store.cx, store.cy, store.width, store.height, store.angle))
+    finally:
+        view.close()
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem, QWidget
+
+from tiledimage import ImagePyramid, TiledImageItem
+
+def paint(item, widget, rect):
+    # What a view's viewport does when `rect` of the image is exposed at 1:1
+    target = QImage(int(rect.width()), int(rect.height()), QImage.Format_RGB32)
+    painter = QPainter(target)
+    painter.translate(-rect.left(), -rect.top())
+    option = QStyleOptionGraphicsItem()
+    option.exposedRect = rect
+    item.paint(painter, option, widget)
+    painter.end()
+
+def test_views_sharing_the_image_keep_each_others_tiles(qapp):
+    pyramid = ImagePyramid(np.zeros((512, 1024), dtype=np.uint8), tile_size=256, workers=1)
+    item = TiledImageItem(pyramid)
+    left, right = QWidget(), QWidget()
+    # Keeps the only worker busy so requested tiles stay queued
+    release = threading.Event()
+    pyramid._executor.submit(release.wait)
+    try:
+        paint(item, left, QRectF(28, 28, 200, 200))
+        paint(item, right, QRectF(796, 284, 200, 200))
+        assert set(pyramid._pending) == {(0, 0, 0), (0, 3, 1)}
+
+        # The left view scrolling away cancels only its own tile
+        paint(item, left, QRectF(284, 28, 200, 200))
+        assert set(pyramid._pending) == {(0, 1, 0), (0, 3, 1)}
+
+        # Offscreen renders cancel nothing
+        paint(item, None, QRectF(540, 28, 200, 200))
+        assert set(pyramid._pending) == {(0, 1, 0), (0, 2, 0), (0, 3, 1)}
+    finally:
+        release.set()
+        pyramid.shutdown()
@@ -0,0 +1,224 @@
+from PyQt5.QtWidgets import QGraphicsItem
+from PyQt5.QtCore import QObject, QRectF, pyqtSignal
+from PyQt5 import sip
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import math
+import threading
+import numpy as np
+import cv2
+
+from imageconvert import NDArrayImage, ndarray_to_qimage
+
+TileKey = Tuple[int, int, int]  # (level, tx, ty)
+
+class TileCache:
+    # Thread-safe LRU of tile images, bounded by total pixel bytes
+    def __init__(self, memory_budget: int = 256 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self._tiles: 'OrderedDict[TileKey, NDArrayImage]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def get(self, key: TileKey) -> Optional[NDArrayImage]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return tile
+
+    def put(self, key: TileKey, tile: NDArrayImage):
+        with self._lock:
+            old = self._tiles.pop(key, None)
+            if old is not None:
+                self._bytes -= old.array.nbytes
+            self._tiles[key] = tile
+            self._bytes += tile.array.nbytes
+            while self._bytes > self.memory_budget and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self._bytes -= evicted.array.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self._bytes = 0
+
+class ImagePyramid(QObject):
+    # Mip pyramid over a full-resolution image, built lazily tile by tile on a
+    # worker pool. A level-L tile is the 2x area-downsample of its four
+    # level-(L-1) children, so each source pixel is read once per level.
+    tileReady = pyqtSignal(int, int, int)
+
+    def __init__(self, image: np.ndarray, tile_size: int = 256,
+                 memory_budget: int = 256 * 1024 * 1024, workers: int = 4, parent=None):
+        super().__init__(parent)
+        self.image = image
+        self.tile_size = tile_size
+        self.height, self.width = image.shape[:2]
+        self.max_level = max(0, math.ceil(math.log2(max(self.width, self.height) / tile_size)))
+        self.cache = TileCache(memory_budget)
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending: Dict[TileKey, Future] = {}
+        self._lock = threading.Lock()
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        scale = 1 << level
+        return -(-self.width // scale), -(-self.height // scale)
+
+    def tile_range(self, level: int, rect: QRectF):
+        # Tile indices at `level` covering a full-resolution scene rect
+        scale = self.tile_size << level
+        width, height = self.level_size(level)
+        columns = -(-width // self.tile_size)
+        rows = -(-height // self.tile_size)
+        tx0 = max(0, int(rect.left() // scale))
+        ty0 = max(0, int(rect.top() // scale))
+        tx1 = min(columns - 1, int(rect.right() // scale))
+        ty1 = min(rows - 1, int(rect.bottom() // scale))
+        return range(tx0, tx1 + 1), range(ty0, ty1 + 1)
+
+    def tile_scene_rect(self, level: int, tx: int, ty: int) -> QRectF:
+        scale = 1 << level
+        width, height = self.level_size(level)
+        x0, y0 = tx * self.tile_size, ty * self.tile_size
+        x1, y1 = min(x0 + self.tile_size, width), min(y0 + self.tile_size, height)
+        return QRectF(x0 * scale, y0 * scale,
+                      min(x1 * scale, self.width) - x0 * scale,
+                      min(y1 * scale, self.height) - y0 * scale)
+
+    def request(self, key: TileKey):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = self._executor.submit(self._load, key)
+
+    def cancel_except(self, keep):
+        # Drop queued requests that are no longer visible
+        with self._lock:
+            for key in [k for k in self._pending if k not in keep]:
+                if self._pending[key].cancel():
+                    del self._pending[key]
+
+    def _load(self, key: TileKey):
+        try:
+            self.tile(*key)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        self.tileReady.emit(*key)
+
+    def tile(self, level: int, tx: int, ty: int, cache: bool = True) -> NDArrayImage:
+        # Builds synchronously; GUI code should call request() instead
+        key = (level, tx, ty)
+        tile = self.cache.get(key)
+        if tile is not None:
+            return tile
+        if level == 0:
+            rect = self.tile_scene_rect(0, tx, ty)
+            x0, y0 = int(rect.left()), int(rect.top())
+            array = np.ascontiguousarray(self.read(x0, y0, x0 + int(rect.width()), y0 + int(rect.height())))
+            if array.dtype == np.uint16:
+                array = cv2.convertScaleAbs(array, alpha=1 / 257)
+        else:
+            width, height = self.level_size(level - 1)
+            children = [[self._child(level - 1, 2 * tx + i, 2 * ty + j, width, height)
+                         for i in (0, 1)] for j in (0, 1)]
+            rows = [np.concatenate([c for c in row if c is not None], axis=1)
+                    for row in children if row[0] is not None]
+            merged = np.concatenate(rows, axis=0)
+            size = (-(-merged.shape[1] // 2), -(-merged.shape[0] // 2))
+            array = cv2.resize(merged, size, interpolation=cv2.INTER_AREA)
+        tile = ndarray_to_qimage(array)
+        if cache:
+            self.cache.put(key, tile)
+        return tile
+
+    def _child(self, level, tx, ty, width, height):
+        if tx * self.tile_size >= width or ty * self.tile_size >= height:
+            return None
+        # Full-resolution children are re-read cheaply; caching them while
+        # building a zoomed-out view would flush the whole budget
+        return self.tile(level, tx, ty, cache=level > 0).array
+
+    def read(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        return self.image[y0:y1, x0:x1]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class TiledImageItem(QGraphicsItem):
+    # Draws an ImagePyramid in full-resolution scene coordinates. Only tiles
+    # intersecting the exposed rect at the level matching the view scale are
+    # fetched; missing tiles fall back to any cached coarser level.
+    def __init__(self, pyramid: ImagePyramid, parent=None):
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.pyramid = pyramid
+        # Missing tiles each view's last paint asked for. Views of one document
+        # share this item, so a view may only cancel tiles no other view wants
+        self._wanted = {}
+        pyramid.tileReady.connect(self._tile_ready)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.pyramid.width, self.pyramid.height)
+
+    def level_for_scale(self, scale: float) -> int:
+        if scale >= 1:
+            return 0
+        return min(self.pyramid.max_level, int(math.floor(math.log2(1 / scale))))
+
+    def _tile_ready(self, level, tx, ty):
+        self.update(self.pyramid.tile_scene_rect(level, tx, ty))
+
+    def paint(self, painter, option, widget=None):
+        pyramid = self.pyramid
+        level = self.level_for_scale(painter.worldTransform().m11())
+        exposed = option.exposedRect
+        columns, rows = pyramid.tile_range(level, exposed)
+        wanted = set()
+        for ty in rows:
+            for tx in columns:
+                key = (level, tx, ty)
+                target = pyramid.tile_scene_rect(level, tx, ty)
+                tile = pyramid.cache.get(key)
+                if tile is not None:
+                    painter.drawImage(target, tile)
+                    continue
+                wanted.add(key)
+                pyramid.request(key)
+                self._paint_fallback(painter, level, tx, ty, target)
+        if widget is None:
+            # Offscreen render: keep whatever the views queued
+            return
+        self._wanted = {view: keys for view, keys in self._wanted.items() if not sip.isdeleted(view)}
+        self._wanted[widget] = wanted
+        pyramid.cancel_except(set().union(*self._wanted.values()))
+
+    def _paint_fallback(self, painter, level, tx, ty, target):
+        pyramid = self.pyramid
+        for coarser in range(level + 1, pyramid.max_level + 1):
+            shift = coarser - level
+            key = (coarser, tx >> shift, ty >> shift)
+            tile = pyramid.cache.get(key)
+            if tile is None:
+                continue
+            scale = 1 << coarser
+            origin = pyramid.tile_scene_rect(*key)
+            source = QRectF((target.left() - origin.left()) / scale,
+                            (target.top() - origin.top()) / scale,
+                            target.width() / scale, target.height() / scale)
+            painter.drawImage(target, tile, source)
+            return